@@ -1,8 +1,25 @@
+import itertools
+import json
 import pygame
 import random
 import sys
+import time
+from collections import OrderedDict
 from pathlib import Path
 
+import pong_audio
+from pong_input import InputState
+from pong_profiler import FrameProfiler, NULL_PROFILER
+from pong_replay import ReplayWriter
+# Gameplay and power-shot settings live with the rules in pong_sim
+from pong_sim import (
+    PADDLE_W, PADDLE_H, BALL_SIZE, MAX_SCORE,
+    INPUT_LEFT_POWER, INPUT_RIGHT_POWER, INPUT_SERVE,
+    EVENT_HIT, EVENT_SCORE_LEFT, EVENT_SCORE_RIGHT, EVENT_POWER_USED,
+    PHYSICS_DISCRETE, PHYSICS_SWEPT, AI_POLICIES, AI_DIFFICULTY, PongSimulation, make_ai,
+)
+from pong_telemetry import TelemetryWriter, RallyTracker
+
 # Window size (used for windowed mode)
 SCREEN_WIDTH = 960
 SCREEN_HEIGHT = 720
@@ -22,33 +39,26 @@ COLOR_GREEN = (80, 200, 120)
 COLOR_BUTTON = (30, 120, 70)
 COLOR_BUTTON_HOVER = (50, 150, 90)
 
-# Gameplay settings
-PADDLE_W, PADDLE_H = 12, 110
-BALL_SIZE = 20
-PADDLE_SPEED = 0.6           # pixels per ms (player)
-AI_MAX_SPEED = 0.45          # max speed of AI paddle (pixels per ms)
-BALL_BASE_SPEED = 0.35       # base speed factor (pixels per ms)
-SPEED_INCREMENT = 1.05       # multiply speed on paddle hit
-
-# Power-shot settings
-POWER_MULTIPLIER = 1.6         # how much stronger the ball gets on a power-hit
-POWER_COOLDOWN_MS = 3000       # cooldown after using power (ms)
-POWER_WINDOW_MS = 250          # how long the "power active" window lasts after pressing key (ms)
-POWER_BONUS_POINTS = 1         # immediate points awarded on successful power-hit
-
-# Optional sound files (put these in the same folder or comment out sound code)
-HIT_SOUND_FILE = "hit.wav"
-SCORE_SOUND_FILE = "score.wav"
-POWER_SOUND_FILE = "power.wav"
-
-def load_sound(name):
-    p = Path(name)
-    if p.exists():
-        try:
-            return pygame.mixer.Sound(str(p))
-        except Exception:
-            return None
-    return None
+MAX_FRAME_MS = 250   # longest frame the simulation will catch up on (avoids a spiral after stalls)
+
+# Presentation: 'native' draws at window resolution; the others draw a fixed
+# SCREEN_WIDTH x SCREEN_HEIGHT canvas and scale it onto the window once per frame
+SCALE_NATIVE = 'native'
+SCALE_INTEGER = 'integer'     # nearest-neighbour, largest whole-number factor that fits
+SCALE_SMOOTH = 'smooth'       # smoothscale to fill the window, aspect ratio kept
+SCALE_MODES = (SCALE_NATIVE, SCALE_INTEGER, SCALE_SMOOTH)
+
+# Frame pacing: a frame-rate cap (any number), 'vsync' (the flip waits for the display)
+# or 'uncapped'. Physics always runs at the fixed pong_sim tick rate.
+PACING_VSYNC = 'vsync'
+PACING_UNCAPPED = 'uncapped'
+PACING_DEFAULT = '60'
+PACING_SPIN_S = 0.002   # the last part of a capped frame is busy-waited for precise timing
+# pygame only honours vsync for some renderers and never says whether it did, so in vsync
+# mode the pacer times the first frames and caps at the refresh rate if flips do not wait
+VSYNC_PROBE_FRAMES = 30
+VSYNC_MIN_FRACTION = 0.75   # median frame shorter than this share of a refresh: no vsync
+DEFAULT_REFRESH_HZ = 60     # when pygame cannot report the display's refresh rate
 
 # ---------- Visual helper functions ----------
 def draw_table(surface):
@@ -90,35 +100,178 @@ def draw_table(surface):
     gloss.fill((255, 255, 255, 12))
     surface.blit(gloss, (inner_rect.left, inner_rect.top))
 
-def draw_paddle(surface, rect):
-    """Draws a rounded paddle with end-caps and light inner shadow."""
-    pygame.draw.rect(surface, COLOR_WHITE, rect, border_radius=8)
-    cap_r = max(6, rect.width // 2 + 2)
+# Pre-rendered table background; rebuilt only when the window size changes.
+_table_layer = None
+
+def get_table_layer(size):
+    """Return the cached table background for the given window size, rebuilding it if needed."""
+    global _table_layer
+    if _table_layer is None or _table_layer.get_size() != tuple(size):
+        # drop the old layer first so both are never alive at once (matters at 4K)
+        _table_layer = None
+        layer = pygame.Surface(size)
+        if pygame.display.get_surface() is not None:
+            layer = layer.convert()
+        layer.fill(COLOR_BORDER)  # fallback border color
+        draw_table(layer)
+        _table_layer = layer
+    return _table_layer
+
+# Pre-rendered ball/paddle sprites keyed by (kind, size), the size being the caller's
+# rect (the simulation's own paddle/ball sizes), so a match with other sizes gets its own
+# entries. Entries are (sprite, offset) where offset is where the sprite's top-left sits
+# relative to the object's rect.
+_sprite_cache = {}
+
+def _sprite_surface(w, h):
+    s = pygame.Surface((w, h), pygame.SRCALPHA)
+    if pygame.display.get_surface() is not None:
+        s = s.convert_alpha()
+    s.fill((0, 0, 0, 0))
+    return s
+
+def _get_sprite(kind, size):
+    """Return (sprite, offset) for a ball or paddle of the given size, building it once."""
+    key = (kind, size)
+    entry = _sprite_cache.get(key)
+    if entry is None:
+        entry = _build_ball_sprite(size) if kind == 'ball' else _build_paddle_sprite(size)
+        _sprite_cache[key] = entry
+    return entry
+
+def _build_paddle_sprite(size):
+    w, h = size
+    cap_r = max(6, w // 2 + 2)
+    pad = cap_r
+    sprite = _sprite_surface(w + pad * 2, h)
+    rect = pygame.Rect(pad, 0, w, h)
+    pygame.draw.rect(sprite, COLOR_WHITE, rect, border_radius=8)
     left_center = (rect.left + cap_r // 2, rect.centery)
     right_center = (rect.right - cap_r // 2, rect.centery)
-    pygame.draw.circle(surface, COLOR_WHITE, left_center, cap_r)
-    pygame.draw.circle(surface, COLOR_WHITE, right_center, cap_r)
+    pygame.draw.circle(sprite, COLOR_WHITE, left_center, cap_r)
+    pygame.draw.circle(sprite, COLOR_WHITE, right_center, cap_r)
     inner = rect.inflate(-4, -8)
     if inner.width > 0 and inner.height > 0:
         s = pygame.Surface((inner.width, inner.height), pygame.SRCALPHA)
         pygame.draw.rect(s, (0, 0, 0, 18), s.get_rect(), border_radius=6)
-        surface.blit(s, inner.topleft)
+        sprite.blit(s, inner.topleft)
+    return sprite, (-pad, 0)
+
+def _build_ball_sprite(size):
+    # Layers are composed premultiplied so the semi-transparent shadow/glow overlap
+    # blends the same as drawing them one after another onto the table.
+    w, h = size
+    # shadow, glow and highlight placed exactly as the old per-frame version did
+    shadow_pos = (-(w // 1.5), h // 1.5)
+    glow_pos = (-w * 1.5, -h * 1.5)
+    ox, oy = int(glow_pos[0]), int(glow_pos[1])
+    sprite = _sprite_surface(int(w * 4), int(max(h * 4, shadow_pos[1] + h * 2 - oy)))
+
+    def layer(lw, lh, color, pos):
+        s = pygame.Surface((lw, lh), pygame.SRCALPHA)
+        pygame.draw.ellipse(s, color, s.get_rect())
+        sprite.blit(s.premul_alpha(), (pos[0] - ox, pos[1] - oy), special_flags=pygame.BLEND_PREMULTIPLIED)
+
+    layer(w * 3, h * 2, (0, 0, 0, 90), shadow_pos)
+    layer(w * 4, h * 4, (255, 255, 255, 24), glow_pos)
+    layer(w, h, COLOR_WHITE + (255,), (0, 0))
+    layer(max(2, w // 2), max(2, h // 2), (255, 255, 255, 180), (w * 0.12, h * 0.08))
+    return sprite, (ox, oy)
+
+def sprite_rect(kind, rect):
+    """Screen-space bounds of the sprite drawn for rect (used for dirty tracking)."""
+    sprite, (ox, oy) = _get_sprite(kind, rect.size)
+    return sprite.get_rect(topleft=(rect.left + ox, rect.top + oy))
 
-def draw_ball(surface, rect):
-    """Draw ball with shadow, glow and highlight to look real."""
-    shadow_surf = pygame.Surface((rect.width * 3, rect.height * 2), pygame.SRCALPHA)
-    pygame.draw.ellipse(shadow_surf, (0, 0, 0, 90), shadow_surf.get_rect())
-    surface.blit(shadow_surf, (rect.left - rect.width // 1.5, rect.top + rect.height // 1.5))
-
-    glow_surf = pygame.Surface((rect.width * 4, rect.height * 4), pygame.SRCALPHA)
-    pygame.draw.ellipse(glow_surf, (255, 255, 255, 24), glow_surf.get_rect())
-    surface.blit(glow_surf, (rect.left - rect.width * 1.5, rect.top - rect.height * 1.5))
+def draw_paddle(surface, rect):
+    """Draws a rounded paddle with end-caps and light inner shadow (cached sprite, one blit)."""
+    sprite, (ox, oy) = _get_sprite('paddle', rect.size)
+    surface.blit(sprite, (rect.left + ox, rect.top + oy))
 
-    pygame.draw.ellipse(surface, COLOR_WHITE, rect)
-    hl_w, hl_h = max(2, rect.width // 2), max(2, rect.height // 2)
-    highlight = pygame.Surface((hl_w, hl_h), pygame.SRCALPHA)
-    pygame.draw.ellipse(highlight, (255, 255, 255, 180), highlight.get_rect())
-    surface.blit(highlight, (rect.left + rect.width * 0.12, rect.top + rect.height * 0.08))
+def draw_ball(surface, rect):
+    """Draw ball with shadow, glow and highlight to look real (cached sprite, one blit)."""
+    sprite, (ox, oy) = _get_sprite('ball', rect.size)
+    surface.blit(sprite, (rect.left + ox, rect.top + oy), special_flags=pygame.BLEND_PREMULTIPLIED)
+
+def balls_rect(xs, ys, size):
+    """Bounds of the sprites draw_balls draws for the ball position arrays xs, ys."""
+    sprite, (ox, oy) = _get_sprite('ball', (size, size))
+    left, top = round(xs.min()) + ox, round(ys.min()) + oy
+    return pygame.Rect(left, top, round(xs.max()) + ox + sprite.get_width() - left,
+                       round(ys.max()) + oy + sprite.get_height() - top)
+
+# draw_balls() buffers, reused while the ball count stays the same: sprite positions as
+# float and int arrays, and one chunk of [sprite, [x, y], area, flags] Surface.blits items
+BALL_BLIT_CHUNK = 64
+_ball_positions = None
+_ball_blits = []
+
+def draw_balls(surface, xs, ys, size):
+    """Draw every ball of the position arrays xs, ys with Surface.blits, BALL_BLIT_CHUNK
+    balls per call, filling reused buffers rather than building a tuple per ball."""
+    global _ball_positions
+    sprite, (ox, oy) = _get_sprite('ball', (size, size))
+    if _ball_positions is None or len(_ball_positions[0]) != len(xs):
+        _ball_positions = (xs.copy(), ys.copy(), xs.astype(int), ys.astype(int))
+    fx, fy, ix, iy = _ball_positions
+    xs.round(out=fx)
+    fx += ox
+    ix[...] = fx
+    ys.round(out=fy)
+    fy += oy
+    iy[...] = fy
+    items = _ball_blits
+    if not items or items[0][0] is not sprite:
+        items[:] = [[sprite, [0, 0], None, pygame.BLEND_PREMULTIPLIED] for _ in range(BALL_BLIT_CHUNK)]
+    for start in range(0, len(xs), BALL_BLIT_CHUNK):
+        end = min(start + BALL_BLIT_CHUNK, len(xs))
+        for item, x, y in zip(items, ix[start:end].tolist(), iy[start:end].tolist()):
+            dest = item[1]
+            dest[0] = x
+            dest[1] = y
+        count = end - start
+        surface.blits(items if count == BALL_BLIT_CHUNK else itertools.islice(items, count), doreturn=False)
+
+# Rendered text surfaces keyed by (font, string, color), least recently used evicted first.
+TEXT_CACHE_SIZE = 256
+HUD_GLYPHS = '0123456789 -.:CDs'   # rendered up front by load_fonts()
+_text_cache = OrderedDict()
+
+def render_text(font, text, color):
+    """Cached font.render: a given (font, text, color) is only rendered once."""
+    key = (font, text, color)
+    surf = _text_cache.get(key)
+    if surf is None:
+        surf = font.render(text, True, color)
+        _text_cache[key] = surf
+        if len(_text_cache) > TEXT_CACHE_SIZE:
+            _text_cache.popitem(last=False)
+    else:
+        _text_cache.move_to_end(key)
+    return surf
+
+def blit_glyphs(surface, font, text, color, pos):
+    """Blit fast-changing text (countdowns, debug numbers) one cached glyph at a time.
+
+    Returns the rect covered by the text.
+    """
+    x, y = pos
+    height = 0
+    for ch in text:
+        glyph = render_text(font, ch, color)
+        surface.blit(glyph, (x, y))
+        x += glyph.get_width()
+        height = max(height, glyph.get_height())
+    return pygame.Rect(pos[0], y, x - pos[0], height)
+
+def glyphs_rect(font, text, color, pos):
+    """Rect that blit_glyphs would cover, without drawing anything."""
+    width = height = 0
+    for ch in text:
+        glyph = render_text(font, ch, color)
+        width += glyph.get_width()
+        height = max(height, glyph.get_height())
+    return pygame.Rect(pos[0], pos[1], width, height)
 
 def draw_button(surface, rect, text, font, mouse_pos):
     """Draw a rounded button, return True if mouse is hovering (for click handling externally)."""
@@ -126,400 +279,688 @@ def draw_button(surface, rect, text, font, mouse_pos):
     color = COLOR_BUTTON_HOVER if hover else COLOR_BUTTON
     pygame.draw.rect(surface, color, rect, border_radius=12)
     pygame.draw.rect(surface, (255,255,255,20), rect, 2, border_radius=12)  # subtle border
-    txt = font.render(text, True, COLOR_WHITE)
+    txt = render_text(font, text, COLOR_WHITE)
     surface.blit(txt, txt.get_rect(center=rect.center))
     return hover
 
 # ---------- End visuals ----------
 
-def main():
-    pygame.init()
+class Display:
+    """The game window, optionally behind a fixed-size canvas.
+
+    In native mode `surface` is the window itself. In integer/smooth mode `surface` is
+    a SCREEN_WIDTH x SCREEN_HEIGHT canvas, so gameplay coordinates and fill cost do not
+    depend on the monitor; flip() scales it straight into a letterboxed area of the
+    window. flip() and update() mirror pygame.display, so FrameRenderer can present
+    through either.
+    """
+
+    def __init__(self, scale=SCALE_NATIVE, vsync=False):
+        self.scale = scale
+        self.vsync = vsync
+        self.window = None
+        self.canvas = None
+        self.dest = None          # canvas area on the window
+        self.target = None        # window subsurface the canvas is scaled into
+
+    @property
+    def surface(self):
+        return self.canvas if self.canvas is not None else self.window
+
+    def set_mode(self, size, flags=0):
+        """pygame.display.set_mode(); returns the surface to draw on."""
+        try:
+            self.window = pygame.display.set_mode(size, flags, vsync=int(self.vsync))
+        except pygame.error:
+            # no vsync support for this renderer/driver: the pacer caps the frame rate instead
+            self.vsync = False
+            self.window = pygame.display.set_mode(size, flags)
+        if self.scale != SCALE_NATIVE:
+            if self.canvas is None:
+                self.canvas = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+            self._layout()
+        return self.surface
+
+    def refresh_rate(self):
+        """Refresh rate of the window's display in Hz (DEFAULT_REFRESH_HZ if unknown)."""
+        rate = getattr(pygame.display, 'get_current_refresh_rate', None)   # pygame-ce only
+        try:
+            return (rate and rate()) or DEFAULT_REFRESH_HZ
+        except pygame.error:
+            return DEFAULT_REFRESH_HZ
+
+    def _layout(self):
+        cw, ch = self.canvas.get_size()
+        ww, wh = self.window.get_size()
+        factor = min(ww / cw, wh / ch)
+        if self.scale == SCALE_INTEGER and factor >= 1:
+            factor = int(factor)
+        size = (max(1, int(cw * factor)), max(1, int(ch * factor)))
+        self.dest = pygame.Rect((0, 0), size)
+        self.dest.center = (ww // 2, wh // 2)
+        self.window.fill(COLOR_BLACK)
+        self.target = None if size == (cw, ch) else self.window.subsurface(self.dest)
+        pygame.display.flip()
+
+    def to_surface(self, pos):
+        """Window pixel position -> position on `surface` (for mouse input)."""
+        if self.canvas is None:
+            return pos
+        x = (pos[0] - self.dest.x) * self.canvas.get_width() // self.dest.width
+        y = (pos[1] - self.dest.y) * self.canvas.get_height() // self.dest.height
+        return x, y
+
+    def flip(self):
+        if self.canvas is not None:
+            if self.target is None:
+                self.window.blit(self.canvas, self.dest)
+            elif self.scale == SCALE_SMOOTH:
+                pygame.transform.smoothscale(self.canvas, self.dest.size, self.target)
+            else:
+                pygame.transform.scale(self.canvas, self.dest.size, self.target)
+            pygame.display.update(self.dest)
+        else:
+            pygame.display.flip()
+
+    def update(self, rects):
+        if self.canvas is not None:
+            self.flip()   # the whole canvas is scaled anyway
+        else:
+            pygame.display.update(rects)
+
+ALWAYS_DIRTY = object()   # FrameRenderer token for items whose pixels change every frame
+
+class FramePacer:
+    """Ends each frame according to the pacing mode and measures the frame time.
+
+    A numeric mode caps the frame rate against a steady schedule (sleep, then spin the
+    last PACING_SPIN_S for accuracy at 144/240 Hz); uncapped returns at once. vsync
+    returns at once too, unless the first VSYNC_PROBE_FRAMES frames show the flip is
+    not waiting for the display: then it caps at refresh_hz.
+    """
+
+    def __init__(self, mode=PACING_DEFAULT, clock=time.perf_counter, refresh_hz=DEFAULT_REFRESH_HZ):
+        self.period = None if mode in (PACING_VSYNC, PACING_UNCAPPED) else 1.0 / float(mode)
+        self.refresh_hz = refresh_hz
+        self.probe = [] if mode == PACING_VSYNC else None   # frame times while checking vsync
+        self.clock = clock
+        self.last = self.due = clock()
+        self.frame_ms = [0.0] * 60
+        self.index = 0
+
+    def budget_ms(self):
+        """Frame time the pacing aims for (a refresh period when uncapped)."""
+        return 1000.0 * (self.period or 1.0 / self.refresh_hz)
+
+    def cap_at_refresh(self):
+        """Pace vsync mode with a cap at the refresh rate (the flip does not wait)."""
+        self.probe = None
+        self.period = 1.0 / self.refresh_hz
+        self.due = self.clock()
+
+    def wait(self):
+        """Wait until the next frame is due; returns ms since the previous call."""
+        if self.period:
+            self.due += self.period
+            now = self.clock()
+            if self.due < now:
+                self.due = now    # running late: start a new schedule rather than rush
+            else:
+                if self.due - now > PACING_SPIN_S:
+                    time.sleep(self.due - now - PACING_SPIN_S)
+                while self.clock() < self.due:
+                    pass
+        now = self.clock()
+        dt = (now - self.last) * 1000.0
+        self.last = now
+        self.frame_ms[self.index] = dt
+        self.index = (self.index + 1) % len(self.frame_ms)
+        if self.probe is not None:
+            self.probe.append(dt)
+            if len(self.probe) == VSYNC_PROBE_FRAMES:
+                median = sorted(self.probe)[VSYNC_PROBE_FRAMES // 2]
+                self.probe = None
+                if median < VSYNC_MIN_FRACTION * 1000.0 / self.refresh_hz:
+                    self.cap_at_refresh()
+        return dt
+
+    def get_fps(self):
+        total = sum(self.frame_ms)
+        return len(self.frame_ms) * 1000.0 / total if total else 0.0
+
+def pacing_mode(text):
+    """argparse type for --fps: 'vsync', 'uncapped' or a positive frame-rate cap."""
+    if text in (PACING_VSYNC, PACING_UNCAPPED):
+        return text
     try:
-        pygame.mixer.init()
-    except Exception:
+        if float(text) > 0:
+            return text
+    except ValueError:
         pass
+    raise ValueError(text)
+
+class FrameRenderer:
+    """Collects the gameplay frame as (slot, rect, token, draw call) items and presents it.
+
+    In the default mode every frame restores the whole table and flips. With
+    dirty_rects=True only slots whose rect or token changed since the previous frame
+    are restored from the background, redrawn (clipped) and pushed with
+    pygame.display.update(rects). Tokens are compared by identity, so cached text
+    surfaces only count as changed when the text itself changed; ALWAYS_DIRTY marks
+    items (like the profiler graph) that are redrawn every frame. Frames are pushed
+    through `output` (pygame.display or a Display).
+    """
+
+    def __init__(self, dirty_rects=False, output=None):
+        self.dirty_rects = dirty_rects
+        self.output = output or pygame.display
+        self.items = []
+        self.prev = {}
+        self.full = True
+
+    def invalidate(self):
+        """Force the next frame to be drawn and presented in full (resize, menus, pause)."""
+        self.full = True
+
+    def add(self, slot, rect, token, draw, *args):
+        self.items.append((slot, rect, token, draw, args))
+
+    def add_text(self, slot, text_surf, pos):
+        rect = text_surf.get_rect(topleft=pos)
+        self.add(slot, rect, text_surf, pygame.Surface.blit, text_surf, rect.topleft)
+
+    def add_glyphs(self, slot, font, text, color, pos):
+        self.add(slot, glyphs_rect(font, text, color, pos), text, blit_glyphs, font, text, color, pos)
+
+    def present(self, screen, background, profiler=NULL_PROFILER):
+        items = self.items
+        if not self.dirty_rects or self.full:
+            profiler.begin('draw_table')
+            screen.blit(background, (0, 0))
+            for _, _, _, draw, args in items:
+                profiler.begin(_DRAW_PHASES.get(draw, 'hud_text'))
+                draw(screen, *args)
+            profiler.begin('flip')
+            self.output.flip()
+        else:
+            dirty = []
+            cur = {slot: (rect, token) for slot, rect, token, _, _ in items}
+            for slot, (rect, token) in cur.items():
+                old = self.prev.get(slot)
+                if old is None:
+                    dirty.append(rect)
+                elif old[0] != rect or old[1] is not token or token is ALWAYS_DIRTY:
+                    dirty.append(old[0].union(rect))
+            for slot, (rect, _) in self.prev.items():
+                if slot not in cur:
+                    dirty.append(rect)
+            bounds = screen.get_rect()
+            dirty = [r.clip(bounds) for r in dirty]
+            dirty = [r for r in dirty if r.width and r.height]
+            for r in dirty:
+                screen.set_clip(r)
+                profiler.begin('draw_table')
+                screen.blit(background, r.topleft, r)
+                for _, rect, _, draw, args in items:
+                    if rect.colliderect(r):
+                        profiler.begin(_DRAW_PHASES.get(draw, 'hud_text'))
+                        draw(screen, *args)
+            screen.set_clip(None)
+            profiler.begin('flip')
+            if dirty:
+                self.output.update(dirty)
+        self.prev = {slot: (rect, token) for slot, rect, token, _, _ in items}
+        self.items = []
+        self.full = False
+
+def positions(sim):
+    """(ball x, ball y, left paddle y, right paddle y) of the current state."""
+    return sim.ball_x, sim.ball_y, sim.paddle_y[0], sim.paddle_y[1]
+
+def interpolate(prev, cur, alpha):
+    """Positions alpha (0..1) of the way from the previous physics state to the current one."""
+    return tuple(a + (b - a) * alpha for a, b in zip(prev, cur))
+
+_score_text = [None, '']   # last (score, text) pair, see score_text()
+
+def score_text(score):
+    """The score line, as the same str object while the score is unchanged (so its
+    dirty-rect token stays identical)."""
+    key = (score[0], score[1])
+    if _score_text[0] != key:
+        _score_text[0], _score_text[1] = key, f"{score[0]}   -   {score[1]}"
+    return _score_text[1]
+
+def add_gameplay_items(frame, sim, font, small_font, sw, use_ai, view=None):
+    """Queue the paddles, ball and HUD of one gameplay frame on a FrameRenderer.
+
+    view overrides the drawn positions (see positions()), e.g. interpolated ones.
+    """
+    ball_x, ball_y, paddle_1_y, paddle_2_y = view or positions(sim)
+    # draw paddles and ball (visual functions)
+    paddle_1_rect = pygame.Rect(sim.paddle_x[0], round(paddle_1_y), sim.paddle_w, sim.paddle_h)
+    paddle_2_rect = pygame.Rect(sim.paddle_x[1], round(paddle_2_y), sim.paddle_w, sim.paddle_h)
+    frame.add('paddle_1', sprite_rect('paddle', paddle_1_rect), None, draw_paddle, paddle_1_rect)
+    frame.add('paddle_2', sprite_rect('paddle', paddle_2_rect), None, draw_paddle, paddle_2_rect)
+    balls = getattr(sim, 'balls_x', None)
+    if balls is None:
+        ball_rect = pygame.Rect(round(ball_x), round(ball_y), sim.ball_size, sim.ball_size)
+        frame.add('ball', sprite_rect('ball', ball_rect), None, draw_ball, ball_rect)
+    else:
+        # multi-ball mode: all balls are one item, drawn where the last tick left them
+        frame.add('ball', balls_rect(balls, sim.balls_y, sim.ball_size), ALWAYS_DIRTY,
+                  draw_balls, balls, sim.balls_y, sim.ball_size)
+
+    # draw score
+    # cached glyphs: a new score never renders a new text surface
+    score = score_text(sim.score)
+    rect = glyphs_rect(font, score, COLOR_WHITE, (0, 0))
+    frame.add_glyphs('score', font, score, COLOR_WHITE, rect.move(sw // 2 - rect.centerx, 40 - rect.centery).topleft)
+
+    # draw power UI (left and right)
+    left_power_label = render_text(small_font, "Left Power (E):", COLOR_WHITE)
+    frame.add_text('left_label', left_power_label, (10, 60))
+    if sim.power_ready[0] and not sim.power_active[0]:
+        status = render_text(small_font, "READY", COLOR_GREEN)
+        frame.add_text('left_status', status, (160, 60))
+    elif sim.power_active[0]:
+        status = render_text(small_font, "POWER ACTIVE!", COLOR_RED)
+        frame.add_text('left_status', status, (160, 60))
+    else:
+        rem = max(0, (sim.power_cooldown_end[0] - sim.time) / 1000.0)
+        frame.add_glyphs('left_status', small_font, f"CD: {rem:.1f}s", COLOR_GRAY, (160, 60))
+
+    right_power_label = render_text(small_font, "Right Power (K):", COLOR_WHITE)
+    frame.add_text('right_label', right_power_label, (sw - 260, 60))
+    if sim.power_ready[1] and not sim.power_active[1]:
+        status = render_text(small_font, "READY", COLOR_GREEN)
+        frame.add_text('right_status', status, (sw - 100, 60))
+    elif sim.power_active[1]:
+        status = render_text(small_font, "POWER ACTIVE!", COLOR_RED)
+        frame.add_text('right_status', status, (sw - 140, 60))
+    else:
+        rem = max(0, (sim.power_cooldown_end[1] - sim.time) / 1000.0)
+        frame.add_glyphs('right_status', small_font, f"CD: {rem:.1f}s", COLOR_GRAY, (sw - 140, 60))
+
+    # draw small UI state
+    mode = "AI" if use_ai else "2P"
+    ui = render_text(small_font, f"Mode: {mode}    P=Pause    TAB=Toggle AI    F=Fullscreen    R=Reset    D=Debug", COLOR_GRAY)
+    frame.add_text('mode', ui, (10, 10))
+
+def add_debug_items(frame, sim, small_font, fps, inputs, profiler, budget_ms=1000 / 60):
+    """Queue the debug overlay: ball velocity, FPS, input latency and the profiler graph
+    (with budget_ms, the frame time of the pacing in use, marked on it)."""
+    dbg = f"Ball vel: ({sim.ball_vx:.2f},{sim.ball_vy:.2f})   FPS: {fps:.1f}"
+    frame.add_glyphs('debug', small_font, dbg, COLOR_GRAY, (10, 80))
+    frame.add_glyphs('latency', small_font, inputs.summary(), COLOR_GRAY, (10, 104))
+    graph_pos = (10, 128)
+    frame.add('profiler', profiler.overlay_rect(small_font, graph_pos), ALWAYS_DIRTY,
+              profiler.draw, small_font, graph_pos, COLOR_GRAY, blit_glyphs, budget_ms)
+
+# ---------- Menu screens (drawn over the table, full-frame) ----------
+# Dimming layer for the game-over screen; rebuilt only when the window size changes.
+_dim_layer = None
+
+def get_dim_layer(size):
+    """Return the cached translucent black layer laid over the table on game over."""
+    global _dim_layer
+    if _dim_layer is None or _dim_layer.get_size() != tuple(size):
+        layer = pygame.Surface(size, pygame.SRCALPHA)
+        if pygame.display.get_surface() is not None:
+            layer = layer.convert_alpha()
+        layer.fill((0, 0, 0, 160))
+        _dim_layer = layer
+    return _dim_layer
+
+def draw_start_screen(screen, font, small_font, button_font, mouse_pos):
+    """Title, instructions and START button; returns the button rect."""
+    sw, sh = screen.get_size()
+    # Draw instructions and a Start button
+    title = render_text(font, 'PONG', COLOR_WHITE)
+    screen.blit(title, title.get_rect(center=(sw // 2, sh // 2 - 120)))
+    hint = render_text(small_font, 'W/S for left; Up/Down for right (when AI off). E = Power (left)  K = Power (right). R reset.', COLOR_GRAY)
+    screen.blit(hint, (10, sh - 30))
+    instr = render_text(small_font, 'Press SPACE or click START. TAB toggles AI. P = Pause. F = Fullscreen', COLOR_GRAY)
+    screen.blit(instr, instr.get_rect(center=(sw // 2, sh // 2 - 80)))
+
+    # start button dimensions
+    btn_w, btn_h = 220, 60
+    btn_rect = pygame.Rect(0, 0, btn_w, btn_h)
+    btn_rect.center = (sw // 2, sh // 2)
+    draw_button(screen, btn_rect, "START", button_font, mouse_pos)
+    return btn_rect
+
+def draw_game_over_screen(screen, sim, font, small_font, button_font, mouse_pos):
+    """Dimmed table, winner and RESTART button; returns the button rect."""
+    sw, sh = screen.get_size()
+    # overlay dim
+    screen.blit(get_dim_layer((sw, sh)), (0, 0))
+
+    winner_name = "Player 1" if sim.winner == 0 else "Player 2"
+    win_text = render_text(font, f"{winner_name} Wins!", COLOR_WHITE)
+    screen.blit(win_text, win_text.get_rect(center=(sw // 2, sh // 2 - 60)))
+
+    sub = render_text(small_font, "Click RESTART or press R to play again", COLOR_GRAY)
+    screen.blit(sub, sub.get_rect(center=(sw // 2, sh // 2 - 20)))
+
+    # restart button
+    btn_w, btn_h = 260, 64
+    btn_rect = pygame.Rect(0, 0, btn_w, btn_h)
+    btn_rect.center = (sw // 2, sh // 2 + 60)
+    draw_button(screen, btn_rect, "RESTART", button_font, mouse_pos)
+    return btn_rect
+
+def draw_pause_screen(screen, font):
+    sw, sh = screen.get_size()
+    pause_text = render_text(font, 'PAUSED', COLOR_WHITE)
+    screen.blit(pause_text, pause_text.get_rect(center=(sw // 2, sh // 2)))
+
+# profiler phase charged for each FrameRenderer draw call (anything else is HUD text)
+_DRAW_PHASES = {draw_paddle: 'draw_paddle', draw_ball: 'draw_ball', draw_balls: 'draw_ball'}
+
+FONT_NAME = 'Consolas'
+FONT_CACHE = pong_audio.CACHE_DIR / 'fonts.json'   # font name -> file ('' = pygame's default font)
+
+def font_path(name=FONT_NAME, cache=FONT_CACHE):
+    """File of a system font, resolved once and remembered across runs.
+
+    pygame.font.SysFont enumerates every installed font (fc-list on Linux) on first use,
+    which can take most of a second; the cached path skips that on later starts.
+    """
+    try:
+        paths = json.loads(cache.read_text())
+    except (OSError, ValueError):
+        paths = {}
+    path = paths.get(name)
+    if path is not None and (path == '' or Path(path).exists()):
+        return path or None
+    path = pygame.font.match_font(name)
+    paths[name] = path or ''
+    try:
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        cache.write_text(json.dumps(paths))
+    except OSError:
+        pass
+    return path
+
+def load_fonts():
+    """(font, small_font, button_font) used by the HUD and menus."""
+    path = font_path()
+    fonts = pygame.font.Font(path, 32), pygame.font.Font(path, 18), pygame.font.Font(path, 28)
+    # render the glyphs of the score and countdowns now, not the first time a digit shows up
+    for ch in HUD_GLYPHS:
+        render_text(fonts[0], ch, COLOR_WHITE)
+        render_text(fonts[1], ch, COLOR_GRAY)
+    return fonts
+
+def parse_args(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Pong with power shots.')
+    parser.add_argument('--dirty-rects', action='store_true',
+                        help='only redraw and push the screen regions that changed (low-power hardware)')
+    parser.add_argument('--scale', choices=SCALE_MODES, default=SCALE_NATIVE,
+                        help='native: draw at window resolution; integer/smooth: draw a fixed '
+                             f'{SCREEN_WIDTH}x{SCREEN_HEIGHT} frame and scale it to the window')
+    parser.add_argument('--fps', type=pacing_mode, default=PACING_DEFAULT, metavar='MODE',
+                        help="frame pacing: a cap such as 60 (default), 144 or 240, 'vsync' (a cap at the "
+                             "refresh rate where the driver ignores vsync) or 'uncapped'; "
+                             "above 60 Hz paddles and ball are interpolated between physics ticks")
+    parser.add_argument('--physics', choices=(PHYSICS_SWEPT, PHYSICS_DISCRETE), default=PHYSICS_SWEPT,
+                        help='ball collisions: swept (continuous, no tunnelling) or the original discrete checks')
+    parser.add_argument('--ai', choices=sorted(AI_POLICIES), default='track',
+                        help='right paddle AI: track (chase the ball) or intercept (predict where it lands)')
+    parser.add_argument('--difficulty', choices=AI_DIFFICULTY,
+                        help='intercept AI reaction delay and aiming error (default normal)')
+    parser.add_argument('--balls', type=int, default=1, metavar='N',
+                        help='chaos mode: keep N balls in play at once, first to %d x N points wins '
+                             '(needs NumPy)' % MAX_SCORE)
+    parser.add_argument('--record', metavar='PATH', help='record the session to a binary replay file')
+    parser.add_argument('--telemetry', metavar='DIR',
+                        help='write per-rally statistics to rotating .jsonl.gz files in DIR (background thread)')
+    parser.add_argument('--profile-csv', metavar='PATH',
+                        help='profile every frame (per-phase ms) and write the samples to a CSV file')
+    parser.add_argument('--quit-after-first-frame', action='store_true',
+                        help='print the time.monotonic() of the first flip and exit (startup benchmark)')
+    args = parser.parse_args(argv)
+    if args.difficulty and args.ai != 'intercept':
+        parser.error('--difficulty applies to --ai intercept')
+    if args.balls < 1:
+        parser.error('--balls must be at least 1')
+    if args.balls > 1 and args.record:
+        parser.error('multi-ball matches cannot be recorded (replays hold a single ball)')
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    # only what the first frame needs; audio starts once the start screen is up
+    pong_audio.pre_init()
+    pygame.display.init()
+    pygame.font.init()
 
     pygame.display.set_allow_screensaver(False)
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE)
+    display = Display(args.scale, vsync=args.fps == PACING_VSYNC)
+    screen = display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE)
     pygame.display.set_caption('Pong - Power Shot (E/K) — Visual Table')
-    clock = pygame.time.Clock()
-    font = pygame.font.SysFont('Consolas', 32)
-    small_font = pygame.font.SysFont('Consolas', 18)
-    button_font = pygame.font.SysFont('Consolas', 28)
-
-    # paddles and ball (initial positions)
-    paddle_1_rect = pygame.Rect(30, (SCREEN_HEIGHT - PADDLE_H) // 2, PADDLE_W, PADDLE_H)
-    paddle_2_rect = pygame.Rect(SCREEN_WIDTH - 30 - PADDLE_W, (SCREEN_HEIGHT - PADDLE_H) // 2, PADDLE_W, PADDLE_H)
-    ball_rect = pygame.Rect(0, 0, BALL_SIZE, BALL_SIZE)
-    ball_rect.center = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
-
-    # ball velocity vector (pixels per ms)
-    ball_speed = BALL_BASE_SPEED
-    ball_dir = {'x': ball_speed * random.choice((1, -1)), 'y': ball_speed * random.uniform(-0.3, 0.3)}
-
-    paddle_1_move = 0.0
-    paddle_2_move = 0.0
+    table_layer = get_table_layer(screen.get_size())
+    frame = FrameRenderer(dirty_rects=args.dirty_rects, output=display)
+    pacer = FramePacer(args.fps, refresh_hz=display.refresh_rate())
+    if args.fps == PACING_VSYNC and not display.vsync:
+        pacer.cap_at_refresh()
+    # render between the last two physics states unless frames and ticks are both 60 Hz
+    smooth = args.fps != PACING_DEFAULT
+    font, small_font, button_font = load_fonts()
+
+    # the game itself; this loop only turns keys into inputs and draws the state
+    use_ai = True     # AI controls right paddle if True
+    # a fresh serve sequence each session (SDL's timer is not started, so get_ticks() is always 0)
+    seed = random.randrange(2 ** 32)
+    if args.balls > 1:
+        from pong_chaos import ChaosSimulation
+        sim = ChaosSimulation(args.balls, SCREEN_WIDTH, SCREEN_HEIGHT, seed=seed,
+                              right_ai=make_ai(args.ai, args.difficulty), max_score=MAX_SCORE * args.balls,
+                              paddle_w=PADDLE_W, paddle_h=PADDLE_H, ball_size=BALL_SIZE)
+    else:
+        sim = PongSimulation(SCREEN_WIDTH, SCREEN_HEIGHT, seed=seed,
+                             right_ai=make_ai(args.ai, args.difficulty), physics=args.physics, max_score=MAX_SCORE,
+                             paddle_w=PADDLE_W, paddle_h=PADDLE_H, ball_size=BALL_SIZE)
+    accumulator = 0.0
+    previous = None   # positions before the latest tick; None when they must not be blended
+    recorder = ReplayWriter(args.record, sim, policies=[None, sim.ai[1]]) if args.record else None
+    telemetry = TelemetryWriter(args.telemetry) if args.telemetry else None
+    rallies = RallyTracker(telemetry) if telemetry else None
+
+    inputs = InputState()   # keys are sampled per tick; serve/power queue until the next one
 
     # state
-    started = False   # whether gameplay started
     paused = False
-    use_ai = True     # AI controls right paddle if True
     fullscreen = False
 
-    score_left = 0
-    score_right = 0
-    max_score = 7     # first to 7 wins (example)
-
-    # power-shot state for left (player 1) and right (player 2)
-    now = pygame.time.get_ticks()
-    power_ready_left = True
-    power_ready_right = True
-    power_active_left = False
-    power_active_right = False
-    power_cooldown_end_left = 0
-    power_cooldown_end_right = 0
-    power_active_end_left = 0
-    power_active_end_right = 0
-
-    # load sounds (optional)
-    hit_sound = load_sound(HIT_SOUND_FILE)
-    score_sound = load_sound(SCORE_SOUND_FILE)
-    power_sound = load_sound(POWER_SOUND_FILE)
+    # sound effects (silent if there is no audio device), loaded after the first frame
+    audio = pong_audio.AudioBank(load=False)
 
     show_debug = False
-
-    # game over state
-    game_over = False
-    winner_name = None
+    profiler = FrameProfiler(csv_path=args.profile_csv)
+    prof = profiler if args.profile_csv else NULL_PROFILER
 
     while True:
-        now = pygame.time.get_ticks()
-        mouse_pos = pygame.mouse.get_pos()
-
-        # update power readiness from cooldowns
-        if (not power_ready_left) and now >= power_cooldown_end_left:
-            power_ready_left = True
-            power_active_left = False
-        if (not power_ready_right) and now >= power_cooldown_end_right:
-            power_ready_right = True
-            power_active_right = False
-
-        # also expire "active window" automatically
-        if power_active_left and now >= power_active_end_left:
-            power_active_left = False
-        if power_active_right and now >= power_active_end_right:
-            power_active_right = False
-
+        prof.begin('events')
+        mouse_pos = display.to_surface(pygame.mouse.get_pos())
         clicked = False
         click_pos = None
 
         # handle events
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                if recorder:
+                    recorder.close()
+                if telemetry:
+                    telemetry.close()
+                profiler.close()
                 pygame.quit()
                 sys.exit()
 
             if event.type == pygame.VIDEORESIZE:
                 if not fullscreen:
-                    screen = pygame.display.set_mode((event.w, event.h), pygame.RESIZABLE)
+                    screen = display.set_mode((event.w, event.h), pygame.RESIZABLE)
+                    if screen.get_size() != (sim.width, sim.height):
+                        table_layer = get_table_layer(screen.get_size())
+                        sim.resize(*screen.get_size())
+                        previous = None
+                        if recorder:
+                            recorder.keyframe()
+                    frame.invalidate()
 
             if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                 clicked = True
-                click_pos = event.pos
+                click_pos = display.to_surface(event.pos)
 
             if event.type == pygame.KEYDOWN:
-                # movement keys
-                if event.key == pygame.K_w:
-                    paddle_1_move = -PADDLE_SPEED
-                if event.key == pygame.K_s:
-                    paddle_1_move = PADDLE_SPEED
-                if not use_ai:
-                    if event.key == pygame.K_UP:
-                        paddle_2_move = -PADDLE_SPEED
-                    if event.key == pygame.K_DOWN:
-                        paddle_2_move = PADDLE_SPEED
-
-                # start / pause / toggles
+                # start / pause / toggles (movement keys are polled each tick)
                 if event.key == pygame.K_SPACE:
-                    if not started and not game_over:
-                        started = True
+                    if not sim.started and not sim.game_over:
+                        inputs.press(INPUT_SERVE)
                     elif paused:
                         paused = False
                 if event.key == pygame.K_p:
                     paused = not paused
                 if event.key == pygame.K_TAB:
                     use_ai = not use_ai   # toggle AI control
+                    sim.ai[1] = make_ai(args.ai, args.difficulty) if use_ai else None
+                    if recorder:
+                        recorder.keyframe()
 
                 # fullscreen toggle
                 if event.key == pygame.K_f:
                     fullscreen = not fullscreen
                     if fullscreen:
-                        screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+                        screen = display.set_mode((0, 0), pygame.FULLSCREEN)
                     else:
-                        screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE)
+                        screen = display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE)
+                    if screen.get_size() != (sim.width, sim.height):
+                        table_layer = get_table_layer(screen.get_size())
+                        sim.resize(*screen.get_size())
+                        previous = None
+                        if recorder:
+                            recorder.keyframe()
+                    frame.invalidate()
 
                 # reset
                 if event.key == pygame.K_r:
-                    score_left = 0
-                    score_right = 0
-                    ball_speed = BALL_BASE_SPEED
-                    ball_dir = {'x': ball_speed * random.choice((1, -1)), 'y': 0}
-                    ball_rect.center = (screen.get_width() // 2, screen.get_height() // 2)
-                    started = False
-                    game_over = False
-                    winner_name = None
+                    sim.reset()
+                    previous = None
+                    inputs.cancel(INPUT_SERVE)
+                    if recorder:
+                        recorder.keyframe()
 
                 # debug toggle
                 if event.key == pygame.K_d:
                     show_debug = not show_debug
+                    if not args.profile_csv:
+                        prof = profiler if show_debug else NULL_PROFILER
+                        profiler.reset()
 
                 # POWER-SHOT KEYS:
                 if event.key == pygame.K_e:
-                    if power_ready_left and not game_over:
-                        power_active_left = True
-                        power_ready_left = False
-                        power_active_end_left = now + POWER_WINDOW_MS
-                        power_cooldown_end_left = now + POWER_COOLDOWN_MS
-                        if power_sound:
-                            power_sound.play()
+                    inputs.press(INPUT_LEFT_POWER)
                 if event.key == pygame.K_k:
-                    if power_ready_right and not game_over:
-                        power_active_right = True
-                        power_ready_right = False
-                        power_active_end_right = now + POWER_WINDOW_MS
-                        power_cooldown_end_right = now + POWER_COOLDOWN_MS
-                        if power_sound:
-                            power_sound.play()
-
-            if event.type == pygame.KEYUP:
-                if event.key in (pygame.K_w, pygame.K_s):
-                    paddle_1_move = 0.0
-                if event.key in (pygame.K_UP, pygame.K_DOWN):
-                    paddle_2_move = 0.0
-
-        # Draw background & UI (use visual table)
-        screen.fill(COLOR_BORDER)  # fallback border color
+                    inputs.press(INPUT_RIGHT_POWER)
+
+        # time delta, consumed in fixed simulation ticks (timers also stop while paused)
+        prof.begin('wait')
+        dt = pacer.wait()  # ms
+        events = 0
+        if not paused:
+            accumulator = min(accumulator + dt, MAX_FRAME_MS)
+            if accumulator >= sim.tick_ms:
+                pygame.event.pump()   # refresh key state after the wait, just before simulating
+            while accumulator >= sim.tick_ms:
+                bits = inputs.sample(right_human=not use_ai)
+                if recorder:
+                    recorder.record(bits)
+                previous = positions(sim)
+                prof.begin('timers')
+                tick_events = sim.step_timers(bits)
+                prof.begin('physics')
+                tick_events |= sim.step_physics(bits)
+                if rallies:
+                    rallies.tick(sim, tick_events)
+                events |= tick_events
+                accumulator -= sim.tick_ms
+
+        if events & EVENT_POWER_USED:
+            audio.play('power')
+        if events & EVENT_HIT:
+            audio.play('hit')
+        if events & (EVENT_SCORE_LEFT | EVENT_SCORE_RIGHT):
+            audio.play('score')
+            if not sim.started:     # the point stopped play (multi-ball mode plays on)
+                previous = None     # the ball was re-centred: don't draw it sweeping across
+
         sw, sh = screen.get_size()
 
-        # draw table visuals into screen
-        draw_table(screen)
-
-        # Start screen if not started and not game_over
-        if not started and not game_over:
-            # Draw instructions and a Start button
-            title = font.render('PONG', True, COLOR_WHITE)
-            screen.blit(title, title.get_rect(center=(sw // 2, sh // 2 - 120)))
-            hint = small_font.render('W/S for left; Up/Down for right (when AI off). E = Power (left)  K = Power (right). R reset.', True, COLOR_GRAY)
-            screen.blit(hint, (10, sh - 30))
-            instr = small_font.render('Press SPACE or click START. TAB toggles AI. P = Pause. F = Fullscreen', True, COLOR_GRAY)
-            screen.blit(instr, instr.get_rect(center=(sw // 2, sh // 2 - 80)))
-
-            # start button dimensions
-            btn_w, btn_h = 220, 60
-            btn_rect = pygame.Rect(0, 0, btn_w, btn_h)
-            btn_rect.center = (sw // 2, sh // 2)
-            hovered = draw_button(screen, btn_rect, "START", button_font, mouse_pos)
+        # Start screen if not started and not game_over (the table stays up during the
+        # short post-point serve delay, which runs on simulation timers)
+        if not sim.started and not sim.game_over and sim.serve_ready:
+            prof.begin('draw_table')
+            screen.blit(table_layer, (0, 0))
+            prof.begin('hud_text')
+            frame.invalidate()
+            btn_rect = draw_start_screen(screen, font, small_font, button_font, mouse_pos)
 
             # handle click on start button
             if clicked and click_pos and btn_rect.collidepoint(click_pos):
-                started = True
-
-            pygame.display.flip()
-            clock.tick(60)
-            continue
+                inputs.press(INPUT_SERVE)
 
         # If game over, show winner + restart button
-        if game_over:
-            # overlay dim
-            overlay = pygame.Surface((sw, sh), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 160))
-            screen.blit(overlay, (0, 0))
-
-            win_text = font.render(f"{winner_name} Wins!", True, COLOR_WHITE)
-            screen.blit(win_text, win_text.get_rect(center=(sw // 2, sh // 2 - 60)))
-
-            sub = small_font.render("Click RESTART or press R to play again", True, COLOR_GRAY)
-            screen.blit(sub, sub.get_rect(center=(sw // 2, sh // 2 - 20)))
-
-            # restart button
-            btn_w, btn_h = 260, 64
-            btn_rect = pygame.Rect(0, 0, btn_w, btn_h)
-            btn_rect.center = (sw // 2, sh // 2 + 60)
-            hovered = draw_button(screen, btn_rect, "RESTART", button_font, mouse_pos)
+        elif sim.game_over:
+            prof.begin('draw_table')
+            screen.blit(table_layer, (0, 0))
+            prof.begin('hud_text')
+            frame.invalidate()
+            btn_rect = draw_game_over_screen(screen, sim, font, small_font, button_font, mouse_pos)
 
             if clicked and click_pos and btn_rect.collidepoint(click_pos):
                 # reset everything
-                score_left = 0
-                score_right = 0
-                ball_speed = BALL_BASE_SPEED
-                ball_dir = {'x': ball_speed * random.choice((1, -1)), 'y': 0}
-                ball_rect.center = (sw // 2, sh // 2)
-                started = False
-                game_over = False
-                winner_name = None
+                sim.reset()
+                previous = None
+                if recorder:
+                    recorder.keyframe()
+
+        elif paused:
+            prof.begin('draw_table')
+            screen.blit(table_layer, (0, 0))
+            prof.begin('hud_text')
+            frame.invalidate()
+            draw_pause_screen(screen, font)
 
-            pygame.display.flip()
-            clock.tick(60)
-            continue
+        else:
+            view = None
+            if smooth and previous:
+                view = interpolate(previous, positions(sim), accumulator / sim.tick_ms)
+            add_gameplay_items(frame, sim, font, small_font, sw, use_ai, view)
 
-        # time delta
-        dt = clock.tick(60)  # ms
+            if show_debug:
+                add_debug_items(frame, sim, small_font, pacer.get_fps(), inputs, profiler, pacer.budget_ms())
 
-        if paused:
-            pause_text = font.render('PAUSED', True, COLOR_WHITE)
-            screen.blit(pause_text, pause_text.get_rect(center=(sw // 2, sh // 2)))
-            pygame.display.flip()
-            continue
-
-        # move paddles (scaled by dt)
-        paddle_1_rect.top += paddle_1_move * dt
-        paddle_2_rect.top += paddle_2_move * dt
-
-        # AI movement for right paddle
-        if use_ai:
-            diff = ball_rect.centery - paddle_2_rect.centery
-            if abs(diff) > 8:
-                direction = diff / abs(diff)
-                move_amount = min(AI_MAX_SPEED * dt, abs(diff))
-                paddle_2_rect.top += direction * move_amount
-
-        # clamp paddles to current screen height
-        if paddle_1_rect.top < 12:
-            paddle_1_rect.top = 12
-        if paddle_1_rect.bottom > sh - 12:
-            paddle_1_rect.bottom = sh - 12
-
-        if paddle_2_rect.top < 12:
-            paddle_2_rect.top = 12
-        if paddle_2_rect.bottom > sh - 12:
-            paddle_2_rect.bottom = sh - 12
-
-        # update ball position
-        ball_rect.left += ball_dir['x'] * dt
-        ball_rect.top += ball_dir['y'] * dt
-
-        # top/bottom collision (respect 12px inner margin)
-        if ball_rect.top <= 12:
-            ball_rect.top = 12
-            ball_dir['y'] *= -1
-        if ball_rect.bottom >= sh - 12:
-            ball_rect.bottom = sh - 12
-            ball_dir['y'] *= -1
-
-        # left/right out of bounds -> point scored
-        if ball_rect.left <= 0:
-            score_right += 1
-            if score_sound:
-                score_sound.play()
-            ball_speed = BALL_BASE_SPEED
-            ball_dir = {'x': ball_speed * 1, 'y': random.uniform(-0.3, 0.3)}
-            ball_rect.center = (sw // 2, sh // 2)
-            started = False  # wait for space or click to serve
-            pygame.time.delay(250)
-
-        if ball_rect.right >= sw:
-            score_left += 1
-            if score_sound:
-                score_sound.play()
-            ball_speed = BALL_BASE_SPEED
-            ball_dir = {'x': ball_speed * -1, 'y': random.uniform(-0.3, 0.3)}
-            ball_rect.center = (sw // 2, sh // 2)
-            started = False
-            pygame.time.delay(250)
-
-        # paddle collisions (left)
-        if paddle_1_rect.colliderect(ball_rect) and ball_dir['x'] < 0:
-            if power_active_left:
-                ball_dir['x'] *= -1 * POWER_MULTIPLIER
-                ball_dir['y'] *= POWER_MULTIPLIER
-                score_left += POWER_BONUS_POINTS
-                power_active_left = False
-            else:
-                ball_dir['x'] *= -1
-                rel = (ball_rect.centery - paddle_1_rect.centery) / (PADDLE_H / 2)
-                ball_dir['y'] += rel * 0.18
-                ball_dir['x'] *= SPEED_INCREMENT
-                ball_dir['y'] *= SPEED_INCREMENT
-            if hit_sound:
-                hit_sound.play()
-            ball_rect.left = paddle_1_rect.right + 1
-
-        # paddle collisions (right)
-        if paddle_2_rect.colliderect(ball_rect) and ball_dir['x'] > 0:
-            if power_active_right:
-                ball_dir['x'] *= -1 * POWER_MULTIPLIER
-                ball_dir['y'] *= POWER_MULTIPLIER
-                score_right += POWER_BONUS_POINTS
-                power_active_right = False
-            else:
-                ball_dir['x'] *= -1
-                rel = (ball_rect.centery - paddle_2_rect.centery) / (PADDLE_H / 2)
-                ball_dir['y'] += rel * 0.18
-                ball_dir['x'] *= SPEED_INCREMENT
-                ball_dir['y'] *= SPEED_INCREMENT
-            if hit_sound:
-                hit_sound.play()
-            ball_rect.right = paddle_2_rect.left - 1
-
-        # draw paddles and ball (visual functions)
-        draw_paddle(screen, paddle_1_rect)
-        draw_paddle(screen, paddle_2_rect)
-        draw_ball(screen, ball_rect)
-
-        # draw score
-        score_text = font.render(f"{score_left}   -   {score_right}", True, COLOR_WHITE)
-        screen.blit(score_text, score_text.get_rect(center=(sw // 2, 40)))
-
-        # draw power UI (left and right)
-        left_power_label = small_font.render("Left Power (E):", True, COLOR_WHITE)
-        screen.blit(left_power_label, (10, 60))
-        if power_ready_left and not power_active_left:
-            status = small_font.render("READY", True, COLOR_GREEN)
-            screen.blit(status, (160, 60))
-        elif power_active_left:
-            status = small_font.render("POWER ACTIVE!", True, COLOR_RED)
-            screen.blit(status, (160, 60))
-        else:
-            rem = max(0, (power_cooldown_end_left - now) / 1000.0)
-            status = small_font.render(f"CD: {rem:.1f}s", True, COLOR_GRAY)
-            screen.blit(status, (160, 60))
-
-        right_power_label = small_font.render("Right Power (K):", True, COLOR_WHITE)
-        screen.blit(right_power_label, (sw - 260, 60))
-        if power_ready_right and not power_active_right:
-            status = small_font.render("READY", True, COLOR_GREEN)
-            screen.blit(status, (sw - 100, 60))
-        elif power_active_right:
-            status = small_font.render("POWER ACTIVE!", True, COLOR_RED)
-            screen.blit(status, (sw - 140, 60))
+        if frame.items:
+            frame.present(screen, table_layer, prof)
         else:
-            rem = max(0, (power_cooldown_end_right - now) / 1000.0)
-            status = small_font.render(f"CD: {rem:.1f}s", True, COLOR_GRAY)
-            screen.blit(status, (sw - 140, 60))
-
-        # draw small UI state
-        mode = "AI" if use_ai else "2P"
-        ui = small_font.render(f"Mode: {mode}    P=Pause    TAB=Toggle AI    F=Fullscreen    R=Reset    D=Debug", True, COLOR_GRAY)
-        screen.blit(ui, (10, 10))
-
-        if show_debug:
-            dbg = small_font.render(f"Ball vel: ({ball_dir['x']:.2f},{ball_dir['y']:.2f})   FPS: {clock.get_fps():.1f}", True, COLOR_GRAY)
-            screen.blit(dbg, (10, 80))
-
-        # check for win
-        if score_left >= max_score or score_right >= max_score:
-            # name mapping for clarity
-            if score_left > score_right:
-                winner_name = "Player 1"
-            else:
-                winner_name = "Player 2"
-            game_over = True
-            started = False
-            # display the win message for the next frame via the game_over branch
-            pygame.display.flip()
-            continue
-
-        pygame.display.flip()
+            prof.begin('flip')
+            display.flip()
+        inputs.presented()
+        prof.end_frame()
+
+        if not audio.loaded:
+            if args.quit_after_first_frame:
+                print(f"first_flip {time.monotonic():.6f}", flush=True)
+                if recorder:
+                    recorder.close()
+                if telemetry:
+                    telemetry.close()
+                profiler.close()
+                pygame.quit()
+                return
+            audio.load()
 
 if __name__ == '__main__':
     main()
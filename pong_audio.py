@@ -0,0 +1,142 @@
+"""Low-latency sound effects for Pong.
+
+pre_init() must run before pygame.init(): it asks for a small mixer buffer, so a paddle
+hit is heard within a few milliseconds instead of the default buffer's ~20 ms or more.
+AudioBank then loads each effect once and plays it on its own reserved channel, so
+effects never wait for (or steal from) one another.
+
+Each effect is read from its .wav file when present. Otherwise it is synthesized with
+NumPy (an optional dependency) and the PCM is cached on disk, so later starts load the
+bytes instead of synthesizing again. Without the file, NumPy or a working audio device
+the game simply stays silent.
+"""
+import os
+from pathlib import Path
+
+import pygame
+
+SAMPLE_RATE = 44100
+MIXER_BUFFER = 256            # samples per mixer buffer (~6 ms at 44.1 kHz)
+MIXER_CHANNELS = 2            # stereo output
+
+# Effect name -> optional sound file in the working folder / reserved mixer channel
+SOUND_FILES = {'hit': 'hit.wav', 'score': 'score.wav', 'power': 'power.wav'}
+SOUND_CHANNELS = {'hit': 0, 'score': 1, 'power': 2}
+SYNTH_VERSION = 1             # bump when the synthesis changes to invalidate cached PCM
+CACHE_DIR = Path(os.environ.get('PONG_CACHE_DIR', Path.home() / '.cache' / 'pong'))
+
+def pre_init():
+    """Request the low-latency mixer format; call before pygame.init()."""
+    pygame.mixer.pre_init(SAMPLE_RATE, -16, MIXER_CHANNELS, MIXER_BUFFER)
+
+# ---------- Synthesis ----------
+def _envelope(np, n, rate, attack_ms, decay_ms):
+    t = np.arange(n) / rate
+    attack = np.minimum(1.0, t / (attack_ms / 1000))
+    return attack * np.exp(-t / (decay_ms / 1000))
+
+def synthesize(name, rate):
+    """Mono float samples in [-1, 1] for one effect (needs NumPy)."""
+    import numpy as np
+
+    if name == 'hit':
+        # short woody knock: a sine with a quick pitch drop and a fast decay
+        n = int(rate * 0.07)
+        t = np.arange(n) / rate
+        freq = 520 + 380 * np.exp(-t / 0.01)
+        wave = np.sin(2 * np.pi * np.cumsum(freq) / rate)
+        return 0.8 * wave * _envelope(np, n, rate, 1, 18)
+    if name == 'score':
+        # two falling tones
+        parts = []
+        for freq, ms in ((660, 110), (440, 180)):
+            n = int(rate * ms / 1000)
+            t = np.arange(n) / rate
+            tone = np.sin(2 * np.pi * freq * t) + 0.3 * np.sin(4 * np.pi * freq * t)
+            parts.append(0.45 * tone * _envelope(np, n, rate, 4, ms / 2.5))
+        return np.concatenate(parts)
+    if name == 'power':
+        # rising sweep with a little noise for "whoosh"
+        n = int(rate * 0.22)
+        t = np.arange(n) / rate
+        freq = 220 * (1 + 6 * t / t[-1])
+        wave = np.sign(np.sin(2 * np.pi * np.cumsum(freq) / rate)) * 0.25
+        noise = np.random.default_rng(7).uniform(-1, 1, n) * 0.15
+        return (wave + noise) * _envelope(np, n, rate, 5, 90)
+    raise KeyError(name)
+
+def _to_pcm(samples, channels):
+    import numpy as np
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype('<i2')
+    if channels > 1:
+        pcm = np.repeat(pcm[:, None], channels, axis=1)
+    return pcm.tobytes()
+
+def synthesized_pcm(name, rate, channels, cache_dir=CACHE_DIR):
+    """16-bit PCM for a synthesized effect, read from the disk cache when it is there."""
+    path = Path(cache_dir) / f"{name}-v{SYNTH_VERSION}-{rate}hz-{channels}ch.pcm"
+    try:
+        return path.read_bytes()
+    except OSError:
+        pass
+    pcm = _to_pcm(synthesize(name, rate), channels)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp')
+        tmp.write_bytes(pcm)
+        tmp.replace(path)      # never leave a torn cache file behind
+    except OSError:
+        pass                   # read-only home: just synthesize again next time
+    return pcm
+
+# ---------- Playback ----------
+class AudioBank:
+    """The game's effects, each on a reserved channel. play() is a no-op without audio.
+
+    With load=False nothing is touched until load() (the mixer is initialized there), so
+    the first frame can be shown before any audio work.
+    """
+
+    def __init__(self, files=SOUND_FILES, channels=SOUND_CHANNELS, cache_dir=CACHE_DIR, load=True):
+        self.files = files
+        self.reserved = channels
+        self.cache_dir = cache_dir
+        self.sounds = {}
+        self.channels = {}
+        self.loaded = False
+        if load:
+            self.load()
+
+    def load(self):
+        self.loaded = True
+        files, channels, cache_dir = self.files, self.reserved, self.cache_dir
+        try:
+            if not pygame.mixer.get_init():
+                pygame.mixer.init()
+            rate, size, n_channels = pygame.mixer.get_init()
+        except Exception:
+            return
+        pygame.mixer.set_reserved(len(channels))
+        for name, path in files.items():
+            sound = self._load(name, path, rate, size, n_channels, cache_dir)
+            if sound is not None:
+                self.sounds[name] = sound
+                self.channels[name] = pygame.mixer.Channel(channels[name])
+
+    def _load(self, name, path, rate, size, n_channels, cache_dir):
+        if path and Path(path).exists():
+            try:
+                return pygame.mixer.Sound(str(path))
+            except Exception:
+                pass
+        if size != -16:
+            return None        # the synthesized PCM is signed 16-bit
+        try:
+            return pygame.mixer.Sound(buffer=synthesized_pcm(name, rate, n_channels, cache_dir))
+        except Exception:
+            return None        # no NumPy (and nothing cached yet)
+
+    def play(self, name):
+        sound = self.sounds.get(name)
+        if sound is not None:
+            self.channels[name].play(sound)
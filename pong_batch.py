@@ -0,0 +1,273 @@
+"""NumPy batch engine: N independent Pong matches advanced together in one vectorized step.
+
+Applies the same rules as pong_sim.PongSimulation (wall reflection at the inner margin,
+SPEED_INCREMENT and spin on normal hits, POWER_MULTIPLIER power shots with bonus points,
+power cooldown/window timers, the post-point serve delay), but every piece of state is an array with one row per
+match. Serve directions come from a numpy Generator, so individual matches are
+reproducible per seed but not bit-identical to the scalar engine.
+
+    batch = BatchSimulation(4096, seed=1, ai=('track', 'intercept'))
+    while not batch.game_over.all():
+        batch.step()
+
+Run this file directly to measure throughput.
+"""
+import sys
+import time
+
+import numpy as np
+
+from pong_sim import (
+    FIELD_WIDTH, FIELD_HEIGHT, WALL_MARGIN, PADDLE_OFFSET, TICK_MS, AI_MAX_SPEED, AI_DEAD_ZONE,
+    AI_REACTION_MS, AI_ERROR_PX,
+    INPUT_LEFT_UP, INPUT_LEFT_DOWN, INPUT_LEFT_POWER,
+    INPUT_RIGHT_UP, INPUT_RIGHT_DOWN, INPUT_RIGHT_POWER, INPUT_SERVE,
+    EVENT_HIT, EVENT_POWER_HIT, EVENT_SCORE_LEFT, EVENT_SCORE_RIGHT, EVENT_POWER_USED,
+    EVENT_GAME_OVER, EVENT_WALL,
+    default_rules,
+)
+
+class BatchSimulation:
+    """N matches stored column-wise in NumPy arrays. Index 0/1 on the last axis is left/right.
+
+    Each entry of ai is False (keyboard inputs), True or 'track' (the tracking AI) or
+    'intercept' (pong_sim.InterceptAI, tuned by ai_reaction_ms and ai_error_px).
+    """
+
+    def __init__(self, n, width=FIELD_WIDTH, height=FIELD_HEIGHT, seed=0, tick_ms=TICK_MS,
+                 ai=(False, True), ai_max_speed=AI_MAX_SPEED, ai_dead_zone=AI_DEAD_ZONE,
+                 ai_reaction_ms=AI_REACTION_MS, ai_error_px=AI_ERROR_PX, auto_serve=False, **rules):
+        merged = default_rules()
+        unknown = set(rules) - set(merged)
+        if unknown:
+            raise TypeError(f"unknown rule(s): {', '.join(sorted(unknown))}")
+        merged.update(rules)
+        self.rules = merged
+        for name, value in merged.items():
+            setattr(self, name, value)
+        self.n = n
+        self.width = width
+        self.height = height
+        self.tick_ms = tick_ms
+        self.ai = np.array([bool(kind) for kind in ai])
+        self.ai_intercept = np.array([kind == 'intercept' for kind in ai])
+        # per-match AI parameters so one batch can hold a whole parameter sweep
+        self.ai_max_speed = np.broadcast_to(np.asarray(ai_max_speed, dtype=np.float64), (n, 2)).copy()
+        self.ai_dead_zone = np.broadcast_to(np.asarray(ai_dead_zone, dtype=np.float64), (n, 2)).copy()
+        self.ai_reaction_ms = np.broadcast_to(np.asarray(ai_reaction_ms, dtype=np.float64), (n, 2)).copy()
+        self.ai_error_px = np.broadcast_to(np.asarray(ai_error_px, dtype=np.float64), (n, 2)).copy()
+        self.auto_serve = auto_serve
+        self.rng = np.random.default_rng(seed)
+        self.paddle_x = np.array([PADDLE_OFFSET, width - PADDLE_OFFSET - self.paddle_w], dtype=np.float64)
+
+        self.time = 0.0
+        self.tick = 0
+        self.ball_x = np.empty(n)
+        self.ball_y = np.empty(n)
+        self.ball_vx = np.empty(n)
+        self.ball_vy = np.empty(n)
+        self.paddle_y = np.empty((n, 2))
+        self.score = np.zeros((n, 2), dtype=np.int32)
+        self.hits = np.zeros((n, 2), dtype=np.int32)
+        self.started = np.zeros(n, dtype=bool)
+        self.game_over = np.zeros(n, dtype=bool)
+        self.winner = np.full(n, -1, dtype=np.int8)
+        self.power_ready = np.ones((n, 2), dtype=bool)
+        self.power_active = np.zeros((n, 2), dtype=bool)
+        self.power_cooldown_end = np.zeros((n, 2))
+        self.power_active_end = np.zeros((n, 2))
+        self.serve_at = np.zeros(n)       # serves are ignored before this time (after a point)
+        # intercept AI: ball vx the prediction was made for, predicted centre y, reaction end
+        self.ai_seen_vx = np.full((n, 2), np.nan)
+        self.ai_target = np.empty((n, 2))
+        self.ai_react_at = np.zeros((n, 2))
+        self.reset()
+
+    def reset(self, mask=None):
+        """Start fresh matches for the rows in mask (all rows by default)."""
+        if mask is None:
+            mask = np.ones(self.n, dtype=bool)
+        k = int(mask.sum())
+        if not k:
+            return
+        self.paddle_y[mask] = (self.height - self.paddle_h) / 2
+        self.score[mask] = 0
+        self.hits[mask] = 0
+        self.started[mask] = False
+        self.game_over[mask] = False
+        self.winner[mask] = -1
+        self.power_ready[mask] = True
+        self.power_active[mask] = False
+        self.power_cooldown_end[mask] = 0.0
+        self.power_active_end[mask] = 0.0
+        self.serve_at[mask] = 0.0
+        self.ai_seen_vx[mask] = np.nan
+        self._place_ball(mask, self.ball_base_speed * self.rng.choice((1.0, -1.0), k),
+                         self.ball_base_speed * self.rng.uniform(-0.3, 0.3, k))
+
+    def _place_ball(self, mask, vx, vy):
+        self.ball_x[mask] = (self.width - self.ball_size) / 2
+        self.ball_y[mask] = (self.height - self.ball_size) / 2
+        self.ball_vx[mask] = vx
+        self.ball_vy[mask] = vy
+
+    def _predict(self, mask, side):
+        """New intercept targets for the rows in mask (their ball vx changed)."""
+        size = self.ball_size
+        vx, vy = self.ball_vx[mask], self.ball_vy[mask]
+        if side == 0:
+            toward = vx < 0
+            t = (self.paddle_x[0] + self.paddle_w - self.ball_x[mask]) / vx
+        else:
+            toward = vx > 0
+            t = (self.paddle_x[1] - size - self.ball_x[mask]) / vx
+        span = self.height - 2 * WALL_MARGIN - size
+        y = np.mod(self.ball_y[mask] + vy * np.maximum(t, 0.0) - WALL_MARGIN, 2 * span)
+        y = np.where(y > span, 2 * span - y, y)
+        error = self.rng.uniform(-1.0, 1.0, len(vx)) * self.ai_error_px[mask, side]
+        self.ai_target[mask, side] = np.where(toward, WALL_MARGIN + y + size / 2 + error, self.height / 2)
+        self.ai_react_at[mask, side] = self.time + self.ai_reaction_ms[mask, side]
+        self.ai_seen_vx[mask, side] = vx
+
+    def step(self, inputs=None):
+        """Advance every match one tick. inputs is an (n,) array of INPUT_* bits (or None).
+
+        Returns an (n,) uint8 array of EVENT_* bits.
+        """
+        n, dt, now = self.n, self.tick_ms, self.time
+        events = np.zeros(n, dtype=np.uint8)
+        if inputs is None:
+            inputs = np.zeros(n, dtype=np.uint8)
+
+        # power timers: cooldown end re-arms, active window expires
+        ready, active = self.power_ready, self.power_active
+        rearm = ~ready & (now >= self.power_cooldown_end)
+        ready |= rearm
+        active &= ~rearm
+        active &= now < self.power_active_end
+        press = np.stack(((inputs & INPUT_LEFT_POWER) != 0, (inputs & INPUT_RIGHT_POWER) != 0), axis=1)
+        press &= ready
+        press &= ~self.game_over[:, None]
+        active |= press
+        ready &= ~press
+        self.power_active_end[press] = now + self.power_window_ms
+        self.power_cooldown_end[press] = now + self.power_cooldown_ms
+        events[press.any(axis=1)] |= EVENT_POWER_USED
+
+        serve = ~self.started & ~self.game_over & (now >= self.serve_at)
+        if not self.auto_serve:
+            serve &= (inputs & INPUT_SERVE) != 0
+        self.started |= serve
+        self.time = now + dt
+        self.tick += 1
+        live = self.started & ~self.game_over
+        if not live.any():
+            return events
+
+        # paddles: keyboard bits, the tracking AI or the intercept AI, only for matches in play
+        size, ph = self.ball_size, self.paddle_h
+        ball_cy = self.ball_y + size / 2
+        for side, (up_bit, down_bit) in enumerate(((INPUT_LEFT_UP, INPUT_LEFT_DOWN),
+                                                   (INPUT_RIGHT_UP, INPUT_RIGHT_DOWN))):
+            if self.ai[side]:
+                if self.ai_intercept[side]:
+                    changed = live & (self.ball_vx != self.ai_seen_vx[:, side])
+                    if changed.any():
+                        self._predict(changed, side)
+                    diff = self.ai_target[:, side] - (self.paddle_y[:, side] + ph / 2)
+                else:
+                    diff = ball_cy - (self.paddle_y[:, side] + ph / 2)
+                adiff = np.abs(diff)
+                dy = np.sign(diff) * np.minimum(self.ai_max_speed[:, side] * dt, adiff)
+                dy[adiff <= self.ai_dead_zone[:, side]] = 0.0
+                if self.ai_intercept[side]:
+                    dy[self.time < self.ai_react_at[:, side]] = 0.0
+            else:
+                move = ((inputs & down_bit) != 0).astype(np.float64) - ((inputs & up_bit) != 0)
+                dy = move * (self.paddle_speed * dt)
+            y = self.paddle_y[:, side] + dy * live
+            np.clip(y, WALL_MARGIN, self.height - WALL_MARGIN - ph, out=y)
+            self.paddle_y[:, side] = np.where(live, y, self.paddle_y[:, side])
+
+        # ball movement and top/bottom reflection at the inner margin
+        bx = self.ball_x
+        by = self.ball_y
+        vx = self.ball_vx
+        vy = self.ball_vy
+        bx += vx * dt * live
+        by += vy * dt * live
+        top = live & (by <= WALL_MARGIN)
+        by[top] = WALL_MARGIN
+        bottom = live & (by + size >= self.height - WALL_MARGIN)
+        by[bottom] = self.height - WALL_MARGIN - size
+        wall = top | bottom
+        vy[wall] *= -1
+        events[wall] |= EVENT_WALL
+
+        # out of bounds -> point scored, ball back to the centre waiting for a serve
+        for scorer, out, direction, bit in ((1, live & (bx <= 0), 1.0, EVENT_SCORE_RIGHT),
+                                            (0, live & (bx + size >= self.width), -1.0, EVENT_SCORE_LEFT)):
+            k = int(out.sum())
+            if k:
+                self.score[out, scorer] += 1
+                self._place_ball(out, direction * self.ball_base_speed, self.rng.uniform(-0.3, 0.3, k))
+                self.started[out] = False
+                self.serve_at[out] = self.time + self.serve_delay_ms
+                events[out] |= bit
+
+        # paddle collisions: power shots multiply, normal hits add spin then speed up
+        for side in (0, 1):
+            px, py = self.paddle_x[side], self.paddle_y[:, side]
+            moving = vx < 0 if side == 0 else vx > 0
+            hit = (live & moving & (bx < px + self.paddle_w) & (px < bx + size)
+                   & (by < py + ph) & (py < by + size))
+            if not hit.any():
+                continue
+            power = hit & active[:, side]
+            normal = hit & ~power
+            rel = ((by + size / 2) - (py + ph / 2)) / (ph / 2)
+            vx[power] *= -self.power_multiplier
+            vy[power] *= self.power_multiplier
+            vx[normal] *= -self.speed_increment
+            vy[normal] = (vy[normal] + rel[normal] * self.spin_factor) * self.speed_increment
+            self.score[power, side] += self.power_bonus_points
+            active[power, side] = False
+            self.hits[hit, side] += 1
+            bx[hit] = px + self.paddle_w + 1 if side == 0 else px - 1 - size
+            events[hit] |= EVENT_HIT
+            events[power] |= EVENT_POWER_HIT
+
+        # check for win
+        over = ~self.game_over & ((self.score[:, 0] >= self.max_score) | (self.score[:, 1] >= self.max_score))
+        if over.any():
+            self.winner[over] = np.where(self.score[over, 0] > self.score[over, 1], 0, 1)
+            self.game_over |= over
+            self.started &= ~over
+            events[over] |= EVENT_GAME_OVER
+        return events
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Run a batch of AI-vs-AI Pong matches with NumPy.')
+    parser.add_argument('--matches', type=int, default=4096)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-ticks', type=int, default=200000)
+    parser.add_argument('--ai', choices=('track', 'intercept'), default='track',
+                        help='policy for the right paddle (the left one always tracks)')
+    args = parser.parse_args(argv)
+
+    batch = BatchSimulation(args.matches, seed=args.seed, ai=('track', args.ai), auto_serve=True)
+    start = time.perf_counter()
+    while not batch.game_over.all() and batch.tick < args.max_ticks:
+        batch.step()
+    elapsed = time.perf_counter() - start
+    done = int(batch.game_over.sum())
+    left = int((batch.winner == 0).sum())
+    match_ticks = batch.tick * args.matches
+    print(f"{done}/{args.matches} matches finished, left {left} / right {done - left}, "
+          f"{batch.tick} steps in {elapsed:.2f}s ({match_ticks / elapsed:.0f} match-ticks/s, "
+          f"{int(batch.hits.sum())} paddle hits)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,367 @@
+"""Headless rendering benchmarks for the Pong draw helpers.
+
+Runs under the SDL dummy video driver and times draw_table, the cached table blit,
+draw_paddle, draw_ball, draw_button, a full composed gameplay frame and a multi-ball
+frame with CHAOS_BALLS balls at several resolutions. Each result reports calls/sec,
+ms/call, peak Python memory per call (tracemalloc) and pygame Surfaces created per
+call. Results can be saved as a JSON baseline and later runs compared against it:
+
+    python pong_bench.py --save bench_baseline.json
+    python pong_bench.py --baseline bench_baseline.json --threshold 0.15
+
+--startup N instead launches the game N times and reports the time from spawning the
+process to its first display flip (interpreter start, imports and the first frame).
+
+--alloc-check [FRAMES] drives whole game frames (gameplay, debug overlay, multi-ball and
+menus) under tracemalloc and exits 1 if any goes over ALLOC_BUDGET; test_alloc_budget.py
+runs the same check as a test.
+"""
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+
+RESOLUTIONS = ((960, 720), (1920, 1080), (3840, 2160))
+BENCHMARKS = ('draw_table', 'table_blit', 'draw_paddle', 'draw_ball', 'draw_button', 'frame', 'chaos_frame')
+CHAOS_BALLS = 500        # balls in the multi-ball chaos_frame benchmark
+MIN_TIME = 0.25          # seconds each timing repeat runs for
+REPEATS = 5              # timing repeats; the median is reported
+ALLOC_CALLS = 20         # calls measured for memory and Surface counts
+THRESHOLD = 0.15         # allowed slowdown vs baseline before a result counts as a regression
+GAME_SCRIPT = Path(__file__).with_name('pingpong_game.py')
+ALLOC_FRAMES = 600       # frames driven per scenario by --alloc-check
+ALLOC_WARMUP = 120       # untraced frames first, so caches are filled
+# Allocation budgets per frame, checked by --alloc-check and test_alloc_budget.py: peak
+# traced Python bytes while simulating and drawing one frame, bytes still held after it
+# (growth over the second half of the run) and pygame Surfaces created. Every scenario,
+# the debug overlay and the multi-ball frame included, peaks under about 10 KiB (their
+# per-frame buffers are preallocated), so 16 KiB leaves room without hiding a new
+# per-frame Surface, list or cache miss; anything retained frame after frame is a leak.
+ALLOC_BUDGET = {'peak_bytes': 16 * 1024, 'retained_bytes': 64, 'surfaces': 0}
+
+@contextmanager
+def count_surfaces():
+    """Count pygame.Surface constructions made through the pygame module while active,
+    plus the text surfaces the game renders on render_text cache misses."""
+    import pingpong_game as game
+
+    counter = [0]
+    original = pygame.Surface
+    original_render = game.render_text
+
+    def counting_render(font, text, color):
+        if (font, text, color) not in game._text_cache:
+            counter[0] += 1
+        return original_render(font, text, color)
+
+    class CountingSurface(original):
+        def __init__(self, *args, **kwargs):
+            counter[0] += 1
+            super().__init__(*args, **kwargs)
+
+    pygame.Surface = CountingSurface
+    game.render_text = counting_render
+    try:
+        yield counter
+    finally:
+        pygame.Surface = original
+        game.render_text = original_render
+
+def time_call(fn, min_time=MIN_TIME, repeats=REPEATS):
+    """Median seconds per call over `repeats` runs of at least min_time each."""
+    fn()  # warm caches
+    n = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(n):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 4:
+            break
+        n *= 2
+    n = max(1, int(n * min_time / max(elapsed, 1e-9)))
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(n):
+            fn()
+        samples.append((time.perf_counter() - start) / n)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+def measure_allocs(fn, calls=ALLOC_CALLS):
+    """(peak traced bytes per call, Surfaces created per call) in steady state."""
+    fn()
+    with count_surfaces() as surfaces:
+        tracemalloc.start()
+        peak = 0
+        for _ in range(calls):
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            fn()
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+        tracemalloc.stop()
+    return peak, surfaces[0] / calls
+
+def bench_cases(screen):
+    """name -> zero-argument callable drawing onto screen at its current size."""
+    import pingpong_game as game
+    from pong_chaos import ChaosSimulation
+    from pong_sim import PongSimulation, TrackingAI, INPUT_SERVE
+
+    w, h = screen.get_size()
+    font, small_font, button_font = game.load_fonts()
+    table = game.get_table_layer((w, h))
+    paddle = pygame.Rect(30, (h - game.PADDLE_H) // 2, game.PADDLE_W, game.PADDLE_H)
+    ball = pygame.Rect(w // 2, h // 2, game.BALL_SIZE, game.BALL_SIZE)
+    button = pygame.Rect(0, 0, 220, 60)
+    button.center = (w // 2, h // 2)
+
+    sim = PongSimulation(w, h, seed=1, right_ai=TrackingAI())
+    sim.step(INPUT_SERVE)
+    frame = game.FrameRenderer()
+    chaos = ChaosSimulation(CHAOS_BALLS, w, h, seed=1, left_ai=TrackingAI(), right_ai=TrackingAI(),
+                            max_score=sys.maxsize)
+    chaos.step(INPUT_SERVE)
+
+    def full_frame(sim=sim):
+        sim.step()
+        game.add_gameplay_items(frame, sim, font, small_font, w, True)
+        frame.present(screen, table)
+
+    return {
+        'draw_table': lambda: game.draw_table(screen),
+        'table_blit': lambda: screen.blit(table, (0, 0)),
+        'draw_paddle': lambda: game.draw_paddle(screen, paddle),
+        'draw_ball': lambda: game.draw_ball(screen, ball),
+        'draw_button': lambda: game.draw_button(screen, button, "START", button_font, (0, 0)),
+        'frame': full_frame,
+        'chaos_frame': lambda: full_frame(chaos),
+    }
+
+def run(resolutions=RESOLUTIONS, names=BENCHMARKS, min_time=MIN_TIME, out=sys.stdout):
+    pygame.init()
+    results = {}
+    for w, h in resolutions:
+        screen = pygame.display.set_mode((w, h))
+        cases = bench_cases(screen)
+        for name in names:
+            fn = cases[name]
+            per_call = time_call(fn, min_time)
+            peak, surfaces = measure_allocs(fn)
+            key = f"{name}@{w}x{h}"
+            results[key] = {'ms': per_call * 1e3, 'ops_per_sec': 1 / per_call,
+                            'peak_bytes': peak, 'surfaces': surfaces}
+            print(f"{key:<24}{1 / per_call:12.0f} ops/s {per_call * 1e3:10.4f} ms "
+                  f"{peak / 1024:9.1f} KiB peak {surfaces:6.2f} surfaces/call", file=out)
+    pygame.quit()
+    return results
+
+def startup_times(runs, cold=False):
+    """Seconds from spawning the game to its first flip, one per run.
+
+    Each run gets an empty cache directory with cold=True (font lookup from scratch);
+    otherwise all runs share one cache primed by an untimed first run.
+    """
+    times = []
+    with tempfile.TemporaryDirectory() as shared:
+        env = dict(os.environ, PONG_CACHE_DIR=shared)
+        command = [sys.executable, str(GAME_SCRIPT), '--quit-after-first-frame']
+        if not cold:
+            subprocess.run(command, env=env, capture_output=True, check=True)
+        for _ in range(runs):
+            if cold:
+                env['PONG_CACHE_DIR'] = tempfile.mkdtemp(dir=shared)
+            start = time.monotonic()
+            out = subprocess.run(command, env=env, capture_output=True, text=True, check=True).stdout
+            flip = next(float(line.split()[1]) for line in out.splitlines() if line.startswith('first_flip '))
+            times.append(flip - start)
+    return times
+
+def run_startup(runs, cold=False, out=sys.stdout):
+    times = sorted(startup_times(runs, cold))
+    key = f"startup_{'cold' if cold else 'warm'}"
+    median = times[len(times) // 2]
+    print(f"{key:<24}{median * 1e3:10.1f} ms to first flip (min {times[0] * 1e3:.1f}, "
+          f"max {times[-1] * 1e3:.1f}, {runs} runs)", file=out)
+    return {key: {'ms': median * 1e3, 'min_ms': times[0] * 1e3, 'max_ms': times[-1] * 1e3}}
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """Names of results more than `threshold` slower than the baseline."""
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base and result['ms'] > base['ms'] * (1 + threshold):
+            regressions.append(f"{key}: {base['ms']:.4f} -> {result['ms']:.4f} ms "
+                               f"(+{result['ms'] / base['ms'] - 1:.0%})")
+    return regressions
+
+def alloc_scenarios(screen):
+    """name -> zero-argument callable that simulates and draws one complete game frame."""
+    import pingpong_game as game
+    from pong_chaos import ChaosSimulation
+    from pong_input import InputState
+    from pong_profiler import FrameProfiler
+    from pong_sim import PongSimulation, TrackingAI, INPUT_SERVE
+
+    w, h = screen.get_size()
+    font, small_font, button_font = game.load_fonts()
+    table = game.get_table_layer((w, h))
+    mouse = (w // 2, h // 2)    # hovering the menu buttons
+    inputs = InputState()
+    profiler = FrameProfiler()
+
+    def match(sim):
+        # AI vs AI with serves, points, power shots and restarts: the whole steady state
+        def step():
+            if sim.game_over:
+                sim.reset()
+            sim.step(0 if sim.started else INPUT_SERVE)
+        return step
+
+    def gameplay(sim, frame, debug=False):
+        step = match(sim)
+
+        def draw():
+            profiler.begin('physics')
+            step()
+            profiler.begin('draw_table')
+            game.add_gameplay_items(frame, sim, font, small_font, w, True)
+            if debug:
+                game.add_debug_items(frame, sim, small_font, 60.0, inputs, profiler)
+            frame.present(screen, table)
+            profiler.end_frame()
+        return draw
+
+    def menu(draw_content):
+        def draw():
+            screen.blit(table, (0, 0))
+            draw_content()
+            pygame.display.flip()
+        return draw
+
+    def ai_sim(cls=PongSimulation, *args, **rules):
+        return cls(*args, width=w, height=h, seed=1, left_ai=TrackingAI(power_distance=40),
+                   right_ai=TrackingAI(power_distance=60), **rules)
+
+    over = ai_sim()
+    over.score, over.winner, over.game_over = [7, 3], 0, True
+    return {
+        'gameplay': gameplay(ai_sim(), game.FrameRenderer()),
+        'gameplay_dirty': gameplay(ai_sim(), game.FrameRenderer(dirty_rects=True)),
+        'debug_overlay': gameplay(ai_sim(), game.FrameRenderer(), debug=True),
+        'chaos': gameplay(ai_sim(ChaosSimulation, CHAOS_BALLS, max_score=sys.maxsize), game.FrameRenderer()),
+        'start_screen': menu(lambda: game.draw_start_screen(screen, font, small_font, button_font, mouse)),
+        'game_over': menu(lambda: game.draw_game_over_screen(screen, over, font, small_font, button_font, mouse)),
+        'paused': menu(lambda: game.draw_pause_screen(screen, font)),
+    }
+
+def frame_allocs(fn, frames=ALLOC_FRAMES, warmup=ALLOC_WARMUP):
+    """Per-frame (peak traced bytes, retained bytes, Surfaces, gen-0 GC runs) over `frames` calls."""
+    for _ in range(warmup):
+        fn()
+    gc.collect()
+    collections = gc.get_stats()[0]['collections']
+    with count_surfaces() as surfaces:
+        tracemalloc.start()
+        peak = 0
+        for i in range(frames):
+            if i == frames // 2:
+                # growth is measured over the second half only: the interpreter's free lists
+                # (tuples, floats) keep filling for a while and count as traced memory
+                base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            fn()
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+        retained = tracemalloc.get_traced_memory()[0] - base
+        tracemalloc.stop()
+    return peak, retained / (frames - frames // 2), surfaces[0] / frames, gc.get_stats()[0]['collections'] - collections
+
+def check_alloc_budget(name, fn, frames=ALLOC_FRAMES):
+    """Drive one scenario; returns (report line, budget violations as strings)."""
+    peak, retained, surfaces, collections = frame_allocs(fn, frames)
+    measured = {'peak_bytes': peak, 'retained_bytes': retained, 'surfaces': surfaces}
+    over = [key for key, limit in ALLOC_BUDGET.items() if measured[key] > limit]
+    line = (f"{name:<16}{peak / 1024:8.1f} KiB peak {retained:8.1f} B retained {surfaces:5.2f} surfaces "
+            f"{collections:4d} gen-0 GCs/{frames} frames  {'OVER: ' + ', '.join(over) if over else 'ok'}")
+    return line, [f"{name}: {key} {measured[key]:.1f} > {ALLOC_BUDGET[key]}" for key in over]
+
+def run_alloc_check(frames=ALLOC_FRAMES, size=RESOLUTIONS[0], out=sys.stdout):
+    """Drive every scenario headlessly; returns the budget violations (empty when all pass)."""
+    pygame.init()
+    screen = pygame.display.set_mode(size)
+    failures = []
+    for name, fn in alloc_scenarios(screen).items():
+        line, over = check_alloc_budget(name, fn, frames)
+        print(line, file=out)
+        failures.extend(over)
+    pygame.quit()
+    return failures
+
+def _resolution(text):
+    w, _, h = text.partition('x')
+    return int(w), int(h)
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Benchmark the Pong draw helpers headlessly.')
+    parser.add_argument('--resolution', action='append', type=_resolution, metavar='WxH',
+                        help='resolution to test (repeatable; default 960x720, 1920x1080, 3840x2160)')
+    parser.add_argument('--bench', action='append', choices=BENCHMARKS, help='run only these benchmarks')
+    parser.add_argument('--min-time', type=float, default=MIN_TIME, help='seconds per timing repeat')
+    parser.add_argument('--startup', type=int, metavar='RUNS',
+                        help='time process start to first flip over RUNS launches (skips the draw '
+                             'benchmarks unless --bench is given)')
+    parser.add_argument('--cold', action='store_true', help='with --startup, start every run with an empty cache')
+    parser.add_argument('--alloc-check', type=int, nargs='?', const=ALLOC_FRAMES, metavar='FRAMES',
+                        help='drive FRAMES headless game frames per scenario (default %d) and fail if '
+                             'per-frame allocations or Surface creations exceed ALLOC_BUDGET' % ALLOC_FRAMES)
+    parser.add_argument('--save', metavar='PATH', help='write the results as a JSON baseline')
+    parser.add_argument('--baseline', metavar='PATH', help='compare against a saved baseline')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help='fractional slowdown that counts as a regression (default 0.15)')
+    args = parser.parse_args(argv)
+
+    if args.alloc_check:
+        failures = run_alloc_check(args.alloc_check)
+        if failures:
+            print(f"{len(failures)} allocation budget violation(s):")
+            for line in failures:
+                print('  ' + line)
+            return 1
+        print("all scenarios within the allocation budget")
+        return 0
+    results = {}
+    if args.startup:
+        results.update(run_startup(args.startup, args.cold))
+    if args.bench or not args.startup:
+        results.update(run(args.resolution or RESOLUTIONS, args.bench or BENCHMARKS, args.min_time))
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold:.0%}:")
+            for line in regressions:
+                print('  ' + line)
+            return 1
+        print(f"no regressions over {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
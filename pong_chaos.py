@@ -0,0 +1,193 @@
+"""Multi-ball "chaos" Pong: hundreds of balls in one match, stored in NumPy arrays.
+
+ChaosSimulation keeps PongSimulation's paddles, power timers, AI hooks and win check,
+but replaces the single ball with one row per ball. Each tick moves every ball and
+resolves walls, paddles and scoring in a few vectorized passes:
+
+- a ball leaving the field scores a point for the other side and respawns at the
+  centre line at once (play does not stop for a serve);
+- a paddle hit follows the usual rules per ball (spin and SPEED_INCREMENT, or
+  POWER_MULTIPLIER plus POWER_BONUS_POINTS for every ball hit while the side's power
+  window is open; with many balls in play the window stays open for all of its
+  POWER_WINDOW_MS and closes only when its timer runs out);
+- paddle contacts are tested over the whole move, so fast balls do not pass through.
+
+The scalar ball_x/ball_y/ball_vx/ball_vy hold the ball the AI should react to: the one
+that reaches the AI's paddle first. Snapshots, pack_state and replays still describe only
+that ball, so multi-ball matches cannot be recorded.
+
+    sim = ChaosSimulation(500, seed=1, right_ai=TrackingAI(), max_score=3500)
+    sim.step(INPUT_SERVE)
+
+Run this file directly to measure ticks per second for a given ball count.
+"""
+import sys
+import time
+
+import numpy as np
+
+from pong_sim import (
+    FIELD_WIDTH, FIELD_HEIGHT, WALL_MARGIN, TICK_MS,
+    EVENT_HIT, EVENT_POWER_HIT, EVENT_SCORE_LEFT, EVENT_SCORE_RIGHT, EVENT_GAME_OVER, EVENT_WALL,
+    PongSimulation, TrackingAI, move_from_input, run_match,
+)
+
+CHAOS_BALLS = 500
+
+class ChaosSimulation(PongSimulation):
+    """A PongSimulation with `count` balls in the arrays balls_x/balls_y/balls_vx/balls_vy."""
+
+    def __init__(self, count=CHAOS_BALLS, width=FIELD_WIDTH, height=FIELD_HEIGHT, seed=0, tick_ms=TICK_MS,
+                 left_ai=None, right_ai=None, **rules):
+        super().__init__(width, height, seed, tick_ms, left_ai, right_ai, **rules)
+        self.count = count
+        self.rng = np.random.default_rng(seed)
+        self.balls_x = np.empty(count)
+        self.balls_y = np.empty(count)
+        self.balls_vx = np.empty(count)
+        self.balls_vy = np.empty(count)
+        # scratch arrays for step_physics and _aim, so a tick allocates no per-ball temporaries
+        self._old_x = np.empty(count)
+        self._lo = np.empty(count)
+        self._hi = np.empty(count)
+        self._tmp = np.empty(count)
+        self._eta = np.empty(count)
+        self._mask = np.empty(count, dtype=bool)
+        self._hit = np.empty(count, dtype=bool)
+        self._wall = np.empty(count, dtype=bool)
+        self._spawn(np.ones(count, dtype=bool), self.rng.choice((1.0, -1.0), count))
+        self._aim(1)
+
+    def _spawn(self, mask, direction):
+        """Put the balls in mask on the centre line at random heights, heading `direction`
+        at 70-130% of the base speed so they spread out."""
+        k = int(mask.sum())
+        size = self.ball_size
+        self.balls_x[mask] = (self.width - size) / 2
+        self.balls_y[mask] = self.rng.uniform(WALL_MARGIN, max(WALL_MARGIN, self.height - WALL_MARGIN - size), k)
+        self.balls_vx[mask] = direction * self.ball_base_speed * self.rng.uniform(0.7, 1.3, k)
+        self.balls_vy[mask] = self.rng.uniform(-0.3, 0.3, k)
+
+    def _aim(self, side):
+        """Point the scalar ball fields at the ball that reaches this side's paddle first."""
+        eta = self._eta
+        if side == 0:
+            np.subtract(self.paddle_x[0] + self.paddle_w, self.balls_x, out=eta)
+        else:
+            np.subtract(self.paddle_x[1] - self.ball_size, self.balls_x, out=eta)
+        eta /= self.balls_vx
+        np.copyto(eta, np.inf, where=np.less(eta, 0, out=self._mask))
+        i = int(eta.argmin())
+        self.ball_x, self.ball_y = float(self.balls_x[i]), float(self.balls_y[i])
+        self.ball_vx, self.ball_vy = float(self.balls_vx[i]), float(self.balls_vy[i])
+
+    def reset(self):
+        super().reset()
+        self._spawn(np.ones(self.count, dtype=bool), self.rng.choice((1.0, -1.0), self.count))
+        self._aim(1)
+
+    def resize(self, width, height):
+        super().resize(width, height)
+        np.clip(self.balls_y, WALL_MARGIN, max(WALL_MARGIN, height - WALL_MARGIN - self.ball_size),
+                out=self.balls_y)
+
+    def step_physics(self, inputs=0):
+        """Paddles, then every ball at once: move, walls, paddles, scoring and the win check."""
+        if not self.started or self.game_over:
+            return 0
+        dt = self.tick_ms
+        events = 0
+
+        for side in (0, 1):
+            ai = self.ai[side]
+            if ai is not None:
+                self._aim(side)
+                dy = ai.move(self, side, dt)
+            else:
+                dy = move_from_input(inputs, side) * self.paddle_speed * dt
+            self.paddle_y[side] = self._clamp_paddle(self.paddle_y[side] + dy)
+
+        size, ph, pw = self.ball_size, self.paddle_h, self.paddle_w
+        bx, by, vx, vy = self.balls_x, self.balls_y, self.balls_vx, self.balls_vy
+        tmp, mask, hit, wall = self._tmp, self._mask, self._hit, self._wall
+        old_x = self._old_x
+        np.copyto(old_x, bx)
+        bx += np.multiply(vx, dt, out=tmp)
+        by += np.multiply(vy, dt, out=tmp)
+
+        # top/bottom walls
+        np.less_equal(by, WALL_MARGIN, out=wall)
+        np.copyto(by, WALL_MARGIN, where=wall)
+        np.greater_equal(np.add(by, size, out=tmp), self.height - WALL_MARGIN, out=mask)
+        np.copyto(by, self.height - WALL_MARGIN - size, where=mask)
+        wall |= mask
+        if wall.any():
+            np.negative(vy, out=vy, where=wall)
+            events |= EVENT_WALL
+
+        # paddles: the x range swept this tick must overlap the paddle, so nothing tunnels
+        lo = np.minimum(old_x, bx, out=self._lo)
+        hi = np.maximum(old_x, bx, out=self._hi)
+        hi += size
+        for side in (0, 1):
+            px, py = self.paddle_x[side], self.paddle_y[side]
+            if side == 0:
+                np.less(vx, 0, out=hit)
+            else:
+                np.greater(vx, 0, out=hit)
+            hit &= np.less(lo, px + pw, out=mask)
+            hit &= np.greater(hi, px, out=mask)
+            hit &= np.less(by, py + ph, out=mask)
+            hit &= np.greater(np.add(by, size, out=tmp), py, out=mask)
+            if not hit.any():
+                continue
+            if self.power_active[side]:
+                vx[hit] *= -self.power_multiplier
+                vy[hit] *= self.power_multiplier
+                self.score[side] += self.power_bonus_points * int(hit.sum())
+                events |= EVENT_POWER_HIT
+            else:
+                rel = ((by[hit] + size / 2) - (py + ph / 2)) / (ph / 2)
+                vx[hit] *= -self.speed_increment
+                vy[hit] = (vy[hit] + rel * self.spin_factor) * self.speed_increment
+            bx[hit] = px + pw + 1 if side == 0 else px - 1 - size
+            events |= EVENT_HIT
+
+        # out of bounds: one point per ball, which comes straight back from the centre
+        np.less_equal(bx, 0, out=mask)
+        np.greater_equal(np.add(bx, size, out=tmp), self.width, out=hit)
+        for scorer, out, direction, bit in ((1, mask, 1.0, EVENT_SCORE_RIGHT),
+                                            (0, hit, -1.0, EVENT_SCORE_LEFT)):
+            k = int(np.count_nonzero(out))
+            if k:
+                self.score[scorer] += k
+                self._spawn(out, direction)
+                events |= bit
+
+        if self.score[0] >= self.max_score or self.score[1] >= self.max_score:
+            self.winner = 0 if self.score[0] > self.score[1] else 1
+            self.game_over = True
+            self.started = False
+            events |= EVENT_GAME_OVER
+        self._aim(1)
+        return events
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Measure multi-ball Pong simulation speed.')
+    parser.add_argument('--balls', type=int, default=CHAOS_BALLS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--ticks', type=int, default=3600)
+    args = parser.parse_args(argv)
+
+    sim = ChaosSimulation(args.balls, seed=args.seed, left_ai=TrackingAI(), right_ai=TrackingAI(),
+                          max_score=sys.maxsize)
+    start = time.perf_counter()
+    run_match(sim, args.ticks)
+    elapsed = time.perf_counter() - start
+    print(f"{args.balls} balls, {sim.tick} ticks in {elapsed:.2f}s ({sim.tick / elapsed:.0f} ticks/s, "
+          f"{elapsed / sim.tick * 1e3:.3f} ms/tick), score {sim.score[0]} - {sim.score[1]}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,278 @@
+"""Gym-style reinforcement-learning environments for training a Pong paddle.
+
+PongEnv wraps one PongSimulation; VecPongEnv steps many matches at once on the NumPy
+BatchSimulation. Both follow the Gymnasium API (reset() -> obs, info and
+step(actions) -> obs, reward, terminated, truncated, info) without depending on it.
+Neither renders anything: pixel observations are rasterised straight into a small
+NumPy array.
+
+The agent plays one side against a built-in AI. Observations are mirrored for the right
+side, so an agent always sees itself on the left. Each reward is the change in its
+own score minus the change in the opponent's (power-shot bonus points count).
+
+    env = VecPongEnv(1024, seed=0)
+    obs, info = env.reset()
+    obs, reward, terminated, truncated, info = env.step(np.zeros(1024, dtype=np.int64))
+
+Run this file directly to measure environment steps per second.
+"""
+import math
+import sys
+import time
+
+import numpy as np
+
+from pong_sim import (
+    WALL_MARGIN, INPUT_SERVE,
+    INPUT_LEFT_UP, INPUT_LEFT_DOWN, INPUT_LEFT_POWER,
+    INPUT_RIGHT_UP, INPUT_RIGHT_DOWN, INPUT_RIGHT_POWER,
+    PongSimulation, make_ai,
+)
+from pong_batch import BatchSimulation
+
+# Discrete actions: 0 stay, 1 up, 2 down, then the same three while pressing power
+ACTIONS = ('stay', 'up', 'down', 'power', 'up+power', 'down+power')
+ACTION_BITS = (
+    np.array([0, INPUT_LEFT_UP, INPUT_LEFT_DOWN, INPUT_LEFT_POWER,
+              INPUT_LEFT_UP | INPUT_LEFT_POWER, INPUT_LEFT_DOWN | INPUT_LEFT_POWER], dtype=np.uint8),
+    np.array([0, INPUT_RIGHT_UP, INPUT_RIGHT_DOWN, INPUT_RIGHT_POWER,
+              INPUT_RIGHT_UP | INPUT_RIGHT_POWER, INPUT_RIGHT_DOWN | INPUT_RIGHT_POWER], dtype=np.uint8),
+)
+# ball x, y, vx, vy, own paddle y, opponent paddle y, own power ready, own cooldown left,
+# own power active, opponent power ready, opponent cooldown left
+OBS_SIZE = 11
+PIXEL_SIZE = (84, 84)        # (width, height) of pixel observations
+MAX_EPISODE_TICKS = 60 * 60 * 5   # truncate an episode after 5 simulated minutes
+
+def _observation(out, width, height, base_speed, cooldown_ms, now, side,
+                 ball_x, ball_y, ball_vx, ball_vy, ball_size, paddle_y, paddle_h,
+                 ready, active, cooldown_end):
+    """Fill out (n, OBS_SIZE) from BatchSimulation arrays ((n, 2) ones indexed by side)."""
+    x = ball_x / (width - ball_size)
+    vx = ball_vx / base_speed
+    if side == 1:
+        x = 1.0 - x
+        vx = -vx
+    own, opp = side, 1 - side
+    out[:, 0] = x
+    out[:, 1] = (ball_y - WALL_MARGIN) / (height - 2 * WALL_MARGIN - ball_size)
+    out[:, 2] = vx
+    out[:, 3] = ball_vy / base_speed
+    span = height - 2 * WALL_MARGIN - paddle_h
+    out[:, 4] = (paddle_y[:, own] - WALL_MARGIN) / span
+    out[:, 5] = (paddle_y[:, opp] - WALL_MARGIN) / span
+    out[:, 6] = ready[:, own]
+    out[:, 7] = np.maximum(cooldown_end[:, own] - now, 0.0) / cooldown_ms * (1 - ready[:, own])
+    out[:, 8] = active[:, own]
+    out[:, 9] = ready[:, opp]
+    out[:, 10] = np.maximum(cooldown_end[:, opp] - now, 0.0) / cooldown_ms * (1 - ready[:, opp])
+    return out
+
+def _span(start, length, scale, limit):
+    lo = np.clip(np.floor(np.asarray(start) * scale).astype(np.int64), 0, limit - 1)
+    hi = np.maximum(np.ceil((np.asarray(start) + length) * scale).astype(np.int64), lo + 1)
+    return lo, hi
+
+def _rasterize(out, scale_x, scale_y, rects):
+    """Draw (x, y, w, h) rects in field pixels into out (n, H, W) as 255.
+
+    y is an (n,) array; x is a scalar (the same columns in every frame) or one too. Each
+    rect is written through a small (n, rows, cols) index block, never a full-frame mask.
+    """
+    n, h, w = out.shape
+    frames = np.arange(n)[:, None, None]
+    for x, y, rw, rh in rects:
+        x0, x1 = _span(x, rw, scale_x, w)
+        y0, y1 = _span(y, rh, scale_y, h)
+        x0, x1 = np.broadcast_to(x0, (n,)), np.broadcast_to(x1, (n,))
+        # indices past a rect's far edge are clamped onto it (rewriting that pixel is harmless)
+        rows = np.minimum(y0[:, None] + np.arange((y1 - y0).max()), y1[:, None] - 1)
+        cols = np.minimum(x0[:, None] + np.arange((x1 - x0).max()), x1[:, None] - 1)
+        out[frames, rows[:, :, None], cols[:, None, :]] = 255
+    return out
+
+class PongEnv:
+    """One match: the agent controls `side` (0 left, 1 right) against `opponent` (an AI name
+    from pong_sim.AI_POLICIES or a policy object). With pixels=True observations are
+    (H, W) uint8 frames of size PIXEL_SIZE instead of OBS_SIZE float32 vectors."""
+
+    n_actions = len(ACTIONS)
+
+    def __init__(self, side=0, opponent='track', difficulty=None, seed=None, pixels=False,
+                 pixel_size=PIXEL_SIZE, max_ticks=MAX_EPISODE_TICKS, frame_skip=1, **rules):
+        self.side = side
+        self.opponent = make_ai(opponent, difficulty) if isinstance(opponent, str) else opponent
+        self.seed = seed
+        self.episodes = 0
+        self.pixels = pixels
+        self.pixel_size = pixel_size
+        self.max_ticks = max_ticks
+        self.frame_skip = frame_skip
+        self.rules = rules
+        self.sim = None
+        self.obs_shape = pixel_size[::-1] if pixels else (OBS_SIZE,)
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.seed = seed
+            self.episodes = 0
+        base = self.seed if self.seed is not None else np.random.SeedSequence().entropy % 2 ** 31
+        ai = [None, None]
+        ai[1 - self.side] = self.opponent
+        self.sim = PongSimulation(seed=base + self.episodes, left_ai=ai[0], right_ai=ai[1], **self.rules)
+        self.episodes += 1
+        return self._observe(), {}
+
+    def step(self, action):
+        sim = self.sim
+        bits = int(ACTION_BITS[self.side][action])
+        own, opp = self.side, 1 - self.side
+        before = sim.score[own] - sim.score[opp]
+        for _ in range(self.frame_skip):
+            sim.step(bits if sim.started else bits | INPUT_SERVE)
+            if sim.game_over:
+                break
+        reward = float(sim.score[own] - sim.score[opp] - before)
+        truncated = not sim.game_over and sim.tick >= self.max_ticks
+        info = {'score': tuple(sim.score)}
+        return self._observe(), reward, sim.game_over, truncated, info
+
+    def _observe(self):
+        sim = self.sim
+        if self.pixels:
+            return render_pixels(sim, self.pixel_size, self.side)
+        # plain Python floats: building small arrays per step would cost more than the tick
+        own, opp = self.side, 1 - self.side
+        size, now, cooldown = sim.ball_size, sim.time, sim.power_cooldown_ms
+        x = sim.ball_x / (sim.width - size)
+        vx = sim.ball_vx / sim.ball_base_speed
+        if own == 1:
+            x, vx = 1.0 - x, -vx
+        span = sim.height - 2 * WALL_MARGIN - sim.paddle_h
+        ready, end = sim.power_ready, sim.power_cooldown_end
+        return np.array((
+            x, (sim.ball_y - WALL_MARGIN) / (sim.height - 2 * WALL_MARGIN - size),
+            vx, sim.ball_vy / sim.ball_base_speed,
+            (sim.paddle_y[own] - WALL_MARGIN) / span, (sim.paddle_y[opp] - WALL_MARGIN) / span,
+            ready[own], 0.0 if ready[own] else max(end[own] - now, 0.0) / cooldown, sim.power_active[own],
+            ready[opp], 0.0 if ready[opp] else max(end[opp] - now, 0.0) / cooldown,
+        ), dtype=np.float32)
+
+def render_pixels(sim, size=PIXEL_SIZE, side=0, out=None):
+    """Paddles and ball of one simulation as a (H, W) uint8 frame (mirrored for side 1)."""
+    w, h = size
+    out = np.zeros((h, w), dtype=np.uint8) if out is None else out
+    out.fill(0)
+    sx, sy = w / sim.width, h / sim.height
+    rects = [(sim.paddle_x[s], sim.paddle_y[s], sim.paddle_w, sim.paddle_h) for s in (0, 1)]
+    rects.append((sim.ball_x, sim.ball_y, sim.ball_size, sim.ball_size))
+    for x, y, rw, rh in rects:
+        x0 = min(max(math.floor(x * sx), 0), w - 1)
+        y0 = min(max(math.floor(y * sy), 0), h - 1)
+        out[y0:max(math.ceil((y + rh) * sy), y0 + 1), x0:max(math.ceil((x + rw) * sx), x0 + 1)] = 255
+    return out[:, ::-1] if side == 1 else out
+
+class VecPongEnv:
+    """n matches stepped together on BatchSimulation; the agent controls `side` in all of them.
+
+    Finished matches (game over or max_ticks) reset automatically inside step(); the
+    observation returned for them is the first of the new match, and the last one of the
+    old match is in info['final_obs'] for the rows in info['done'].
+    """
+
+    n_actions = len(ACTIONS)
+
+    def __init__(self, n, side=0, opponent='track', seed=0, pixels=False, pixel_size=PIXEL_SIZE,
+                 max_ticks=MAX_EPISODE_TICKS, frame_skip=1, **batch_kwargs):
+        ai = [False, False]
+        ai[1 - side] = opponent
+        self.n = n
+        self.side = side
+        self.pixels = pixels
+        self.pixel_size = pixel_size
+        self.max_ticks = max_ticks
+        self.frame_skip = frame_skip
+        self.batch = BatchSimulation(n, seed=seed, ai=tuple(ai), auto_serve=True, **batch_kwargs)
+        self.bits = ACTION_BITS[side]
+        self.ticks = np.zeros(n, dtype=np.int64)
+        self.obs_shape = pixel_size[::-1] if pixels else (OBS_SIZE,)
+        self.obs = np.empty((n,) + self.obs_shape, dtype=np.uint8 if pixels else np.float32)
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.batch.rng = np.random.default_rng(seed)
+        self.batch.reset()
+        self.ticks[:] = 0
+        return self._observe().copy(), {}
+
+    def step(self, actions):
+        batch = self.batch
+        own, opp = self.side, 1 - self.side
+        before = batch.score[:, own] - batch.score[:, opp]
+        inputs = self.bits[actions]
+        for _ in range(self.frame_skip):
+            batch.step(inputs)
+        self.ticks += self.frame_skip
+        reward = (batch.score[:, own] - batch.score[:, opp] - before).astype(np.float32)
+        terminated = batch.game_over.copy()
+        truncated = ~terminated & (self.ticks >= self.max_ticks)
+        done = terminated | truncated
+        info = {'done': done}
+        if done.any():
+            info['final_obs'] = self._observe()[done]
+            batch.reset(done)
+            self.ticks[done] = 0
+        return self._observe().copy(), reward, terminated, truncated, info
+
+    def _observe(self):
+        b = self.batch
+        if self.pixels:
+            w, h = self.pixel_size
+            out = self.obs
+            out.fill(0)
+            size = b.ball_size
+            rects = [(b.paddle_x[s], b.paddle_y[:, s], b.paddle_w, b.paddle_h) for s in (0, 1)]
+            rects.append((b.ball_x, b.ball_y, size, size))
+            _rasterize(out, w / b.width, h / b.height, rects)
+            return out[:, :, ::-1] if self.side == 1 else out
+        return _observation(self.obs, b.width, b.height, b.ball_base_speed, b.power_cooldown_ms, b.time,
+                            self.side, b.ball_x, b.ball_y, b.ball_vx, b.ball_vy, b.ball_size,
+                            b.paddle_y, b.paddle_h, b.power_ready, b.power_active, b.power_cooldown_end)
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Measure Pong environment steps per second with random actions.')
+    parser.add_argument('--envs', type=int, default=1024, help='matches per VecPongEnv (1 = scalar PongEnv)')
+    parser.add_argument('--steps', type=int, default=2000, help='step() calls to time')
+    parser.add_argument('--pixels', action='store_true', help='pixel observations instead of vectors')
+    parser.add_argument('--opponent', choices=('track', 'intercept'), default='track')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    if args.envs == 1:
+        env = PongEnv(opponent=args.opponent, seed=args.seed, pixels=args.pixels)
+        actions = rng.integers(0, env.n_actions, args.steps)
+    else:
+        env = VecPongEnv(args.envs, opponent=args.opponent, seed=args.seed, pixels=args.pixels)
+        actions = rng.integers(0, env.n_actions, (args.steps, args.envs))
+    env.reset()
+    episodes = 0
+    start = time.perf_counter()
+    for action in actions:
+        _, _, terminated, truncated, _ = env.step(action)
+        if args.envs == 1:
+            if terminated or truncated:
+                episodes += 1
+                env.reset()
+        else:
+            episodes += int(terminated.sum() + truncated.sum())
+    elapsed = time.perf_counter() - start
+    steps = args.steps * args.envs
+    print(f"{steps} env steps in {elapsed:.2f}s: {steps / elapsed:.0f} steps/s "
+          f"({args.envs} env{'s' if args.envs > 1 else ''}, {'pixels' if args.pixels else 'vector'} obs, "
+          f"{episodes} episodes finished)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,313 @@
+"""Faster-than-real-time video export of Pong matches, rendered offscreen.
+
+The match comes from a replay file (pong_replay) or is a seeded AI-vs-AI run. Each
+frame is drawn onto an offscreen Surface with the game's own draw helpers
+(add_gameplay_items + FrameRenderer), so no window is opened and no frame waits
+for a display. The main thread renders; a writer thread takes finished frames from a
+bounded queue and pushes them out, so drawing the next frame overlaps writing the
+last one, and a slow writer holds the renderer back instead of piling up memory.
+
+Frames go to one of:
+
+- ffmpeg, as raw RGBX on its stdin (when ffmpeg is on PATH or given with --ffmpeg);
+- numbered PNG files in a directory, from several writer threads (zlib releases the GIL);
+- numbered raw .rgba files in a directory (width x height x 4 bytes each, opaque).
+
+    python pong_export.py match.mp4 --seed 3
+    python pong_export.py rally.mp4 --replay match.pongrpl --start 600 --end 1800
+    python pong_export.py frames/ --format png --fps 30
+"""
+import itertools
+import os
+import queue
+import shutil
+import struct
+import subprocess
+import sys
+import threading
+import time
+import zlib
+from pathlib import Path
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import pygame
+
+import pingpong_game as game
+from pong_replay import Replay
+from pong_sim import INPUT_SERVE, PongSimulation, TrackingAI
+
+EXPORT_FPS = 60
+QUEUE_FRAMES = 8             # rendered frames waiting for the writer before the renderer blocks
+WRITER_THREADS = min(4, os.cpu_count() or 1)   # for frame files; a video pipe gets one
+PNG_LEVEL = 1                # zlib level for PNG frames: fast, still far smaller than raw
+FORMAT_VIDEO = 'video'
+FORMAT_PNG = 'png'
+FORMAT_RAW = 'raw'
+FORMATS = (FORMAT_VIDEO, FORMAT_PNG, FORMAT_RAW)
+
+class _Offscreen:
+    """FrameRenderer output for an offscreen Surface: presenting shows nothing."""
+
+    def flip(self):
+        pass
+
+    def update(self, rects=None):
+        pass
+
+# ---------- Frame sinks ----------
+def opaque(data):
+    """RGBX pixel data (as rendered) turned into RGBA with every alpha byte 255."""
+    pixels = bytearray(data)
+    pixels[3::4] = b'\xff' * (len(pixels) // 4)
+    return pixels
+
+def encode_png(data, width, height, level=PNG_LEVEL):
+    """PNG file bytes for width x height RGBA pixel data."""
+    stride = width * 4
+    rows = memoryview(data)
+    parts = []
+    for y in range(0, height * stride, stride):
+        parts += (b'\x00', rows[y:y + stride])   # filter type 0 (none) before each row
+    raw = b''.join(parts)
+
+    def chunk(kind, body):
+        return struct.pack('>I', len(body)) + kind + body + struct.pack('>I', zlib.crc32(kind + body))
+
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw, level))
+            + chunk(b'IEND', b''))
+
+class FfmpegSink:
+    """Pipes raw RGBX frames into an ffmpeg process encoding H.264 to path."""
+
+    ordered = True
+
+    def __init__(self, path, size, fps, ffmpeg='ffmpeg'):
+        self.path = path
+        self.size = size
+        cmd = [ffmpeg, '-loglevel', 'error', '-y',
+               '-f', 'rawvideo', '-pix_fmt', 'rgb0', '-s', f"{size[0]}x{size[1]}", '-r', str(fps), '-i', '-',
+               '-c:v', 'libx264', '-preset', 'veryfast', '-pix_fmt', 'yuv420p', str(path)]
+        self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+
+    def write(self, index, data):
+        self.process.stdin.write(data)
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass             # ffmpeg already quit; its exit status says why
+        if self.process.wait():
+            raise RuntimeError(f"ffmpeg exited with status {self.process.returncode}")
+
+class FrameFileSink:
+    """Writes every frame to its own numbered file (frame_000000.png or .rgba) in directory."""
+
+    ordered = False
+
+    def __init__(self, directory, size, fmt=FORMAT_PNG):
+        self.path = Path(directory)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.size = size
+        self.fmt = fmt
+
+    def write(self, index, data):
+        data = opaque(data)
+        if self.fmt == FORMAT_PNG:
+            data = encode_png(data, *self.size)
+            name = f"frame_{index:06d}.png"
+        else:
+            name = f"frame_{index:06d}.rgba"
+        (self.path / name).write_bytes(data)
+
+    def close(self):
+        pass
+
+def open_sink(output, size, fps, fmt=None, ffmpeg=None):
+    """The sink for output: a video through ffmpeg if one can be found, else PNG frames.
+
+    Without an encoder a video request falls back to PNG frames in a directory named
+    after the output file (match.mp4 -> match/).
+    """
+    ffmpeg = ffmpeg or shutil.which('ffmpeg')
+    if fmt in (None, FORMAT_VIDEO):
+        if ffmpeg:
+            return FfmpegSink(output, size, fps, ffmpeg)
+        print("ffmpeg not found: writing PNG frames instead", file=sys.stderr)
+        output = Path(output)
+        output, fmt = output.with_suffix('') if output.suffix else output, FORMAT_PNG
+    return FrameFileSink(output, size, fmt)
+
+# ---------- Writer threads ----------
+class FrameWriter:
+    """Bounded frame queue plus writer threads feeding a sink, so rendering and writing overlap.
+
+    put() blocks while QUEUE_FRAMES frames are waiting. A sink whose frames must arrive in
+    order (ffmpeg's pipe) gets one thread; frame files can be written by several, which
+    run in parallel while zlib and file writes release the GIL. If the sink fails the
+    threads keep draining the queue (so put() never hangs) and close() raises the error,
+    preferring the one from closing the sink (e.g. ffmpeg's exit status over the broken
+    pipe it caused).
+    """
+
+    def __init__(self, sink, queue_frames=QUEUE_FRAMES, threads=1):
+        self.sink = sink
+        self.queue = queue.Queue(queue_frames)
+        self.lock = threading.Lock()
+        self.error = None
+        self.queued = 0
+        self.written = 0
+        self.busy = 0.0          # seconds the threads spent writing, summed
+        count = 1 if sink.ordered else threads
+        self.threads = [threading.Thread(target=self._run, name=f'export-writer-{i}', daemon=True)
+                        for i in range(count)]
+        for thread in self.threads:
+            thread.start()
+
+    def put(self, data):
+        self.queue.put((self.queued, data))
+        self.queued += 1
+
+    def close(self):
+        """Wait for every queued frame to be written, then close the sink."""
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        try:
+            self.sink.close()
+        except (OSError, RuntimeError) as exc:
+            self.error = exc
+        if self.error is not None:
+            raise self.error
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            if self.error is not None:
+                continue
+            start = time.perf_counter()
+            try:
+                self.sink.write(*item)
+            except (OSError, ValueError) as exc:
+                self.error = exc
+                continue
+            with self.lock:
+                self.written += 1
+                self.busy += time.perf_counter() - start
+
+# ---------- Matches ----------
+def ai_match_states(seed, max_ticks=None):
+    """A seeded AI-vs-AI match, yielding the simulation after every tick (serves are automatic)."""
+    sim = PongSimulation(seed=seed, left_ai=TrackingAI(power_distance=30), right_ai=TrackingAI())
+    yield sim
+    while not sim.game_over and (max_ticks is None or sim.tick < max_ticks):
+        sim.step(0 if sim.started else INPUT_SERVE)
+        yield sim
+
+def replay_states(path, start=None, end=None):
+    """The recorded match in path from tick start to end, yielding the simulation after every tick."""
+    with Replay(path) as replay:
+        start = replay.base_tick if start is None else max(start, replay.base_tick)
+        end = replay.end_tick if end is None else min(end, replay.end_tick)
+        sim = replay.seek(start)
+        yield sim
+        while sim.tick < end:
+            replay.step(sim)
+            yield sim
+
+# ---------- Export ----------
+def export(states, writer, size, fps=EXPORT_FPS):
+    """Render states into writer as size frames, one every 1000 / fps ms of match time.
+
+    Match time is counted in ticks. An fps above the tick rate repeats frames; a field
+    resized mid-match (recorded in a replay) is scaled to size.
+    Returns (frames, seconds spent rendering, seconds spent waiting on the writer).
+    """
+    frame = game.FrameRenderer(output=_Offscreen())
+    font, small_font, _ = game.load_fonts()
+    out = pygame.Surface(size)
+    screen = out
+    frame_ms = 1000.0 / fps
+    clock = due = 0.0
+    frames = 0
+    render = wait = 0.0
+    for i, sim in enumerate(states):
+        if writer.error is not None:
+            break            # nothing more can be written; close() reports why
+        if i:
+            clock += sim.tick_ms
+        if clock < due:
+            continue
+        start = time.perf_counter()
+        if screen.get_size() != (sim.width, sim.height):
+            screen = out if out.get_size() == (sim.width, sim.height) else pygame.Surface((sim.width, sim.height))
+            frame.invalidate()
+        game.add_gameplay_items(frame, sim, font, small_font, sim.width, True)
+        frame.present(screen, game.get_table_layer(screen.get_size()))
+        if screen is not out:
+            pygame.transform.smoothscale(screen, size, out)
+        data = pygame.image.tobytes(out, 'RGBX')
+        queued = time.perf_counter()
+        while due <= clock:
+            writer.put(data)
+            frames += 1
+            due += frame_ms
+        render += queued - start
+        wait += time.perf_counter() - queued
+    return frames, render, wait
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Render a Pong match offscreen to a video or to frame files.')
+    parser.add_argument('output', help='video file, or directory for --format png/raw')
+    parser.add_argument('--replay', help='replay file to export (default: a seeded AI-vs-AI match)')
+    parser.add_argument('--start', type=int, help='first replay tick to export')
+    parser.add_argument('--end', type=int, help='last replay tick to export')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-ticks', type=int, help='stop an AI match after this many ticks')
+    parser.add_argument('--fps', type=int, default=EXPORT_FPS)
+    parser.add_argument('--format', choices=FORMATS,
+                        help='default: video through ffmpeg if it is installed, else PNG frames')
+    parser.add_argument('--ffmpeg', help='ffmpeg executable (default: the one on PATH)')
+    parser.add_argument('--queue-frames', type=int, default=QUEUE_FRAMES)
+    parser.add_argument('--writers', type=int, default=WRITER_THREADS, help='writer threads for frame files')
+    args = parser.parse_args(argv)
+    if args.fps < 1 or args.writers < 1 or args.queue_frames < 1:
+        parser.error("--fps, --writers and --queue-frames must be at least 1")
+    if args.replay is None and (args.start is not None or args.end is not None):
+        parser.error("--start/--end need --replay")
+
+    pygame.font.init()
+    if args.replay:
+        states = replay_states(args.replay, args.start, args.end)
+    else:
+        states = ai_match_states(args.seed, args.max_ticks)
+    first = next(states)
+    size = (first.width, first.height)
+    try:
+        sink = open_sink(args.output, size, args.fps, args.format, args.ffmpeg)
+    except OSError as exc:
+        print(f"cannot start the export: {exc}", file=sys.stderr)
+        return 1
+    writer = FrameWriter(sink, args.queue_frames, args.writers)
+    start = time.perf_counter()
+    frames, render, wait = export(itertools.chain([first], states), writer, size, args.fps)
+    try:
+        writer.close()
+    except (OSError, RuntimeError) as exc:
+        print(f"export failed after {writer.written} frames: {exc}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+    print(f"{frames} frames ({frames / args.fps:.1f}s of match) to {sink.path} in {elapsed:.2f}s: "
+          f"{frames / elapsed:.0f} fps, {frames / args.fps / elapsed:.1f}x real time; per frame "
+          f"render {render / max(frames, 1) * 1e3:.2f} ms, waiting on writer {wait / max(frames, 1) * 1e3:.2f} ms, "
+          f"writer busy {writer.busy / max(frames, 1) * 1e3:.2f} ms")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
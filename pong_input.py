@@ -0,0 +1,78 @@
+"""Polled, timestamped input for the Pong main loop.
+
+Held movement comes from the keyboard state sampled right before every physics tick
+(not from KEYDOWN/KEYUP edges), so holding W and S together and releasing one leaves
+the other in effect. One-shot inputs (serve, power) are queued with press() as their
+events arrive and go out with the next tick.
+
+Each input is stamped with time.perf_counter() when it is first seen: the sample
+that first shows a movement change, or the moment a one-shot event is drained.
+presented() is called right after the display flip; the time from each applied input's
+stamp to that flip is its input-to-photon latency.
+"""
+import time
+from collections import deque
+
+import pygame
+
+from pong_sim import INPUT_LEFT_UP, INPUT_LEFT_DOWN, INPUT_RIGHT_UP, INPUT_RIGHT_DOWN
+from pong_profiler import percentile
+
+LATENCY_SAMPLES = 120        # latencies kept for the overlay statistics
+
+class InputState:
+    """Key sampling, one-shot queue and input-to-photon latency tracking."""
+
+    def __init__(self, clock=time.perf_counter, samples=LATENCY_SAMPLES):
+        self.clock = clock
+        self.held = 0
+        self.pending = 0
+        self.unapplied = []      # stamps of inputs seen but not yet simulated
+        self.in_flight = []      # stamps of simulated inputs not yet on screen
+        self.latencies = deque(maxlen=samples)
+
+    def press(self, bits):
+        """Queue one-shot bits (serve, power) for the next tick."""
+        self.pending |= bits
+        self.unapplied.append(self.clock())
+
+    def cancel(self, bits):
+        self.pending &= ~bits
+
+    def sample(self, right_human=True):
+        """Input bits for one tick: the keys held now plus queued one-shots (then cleared)."""
+        keys = pygame.key.get_pressed()
+        held = 0
+        if keys[pygame.K_w]:
+            held |= INPUT_LEFT_UP
+        if keys[pygame.K_s]:
+            held |= INPUT_LEFT_DOWN
+        if right_human:
+            if keys[pygame.K_UP]:
+                held |= INPUT_RIGHT_UP
+            if keys[pygame.K_DOWN]:
+                held |= INPUT_RIGHT_DOWN
+        if held != self.held:
+            self.held = held
+            self.unapplied.append(self.clock())
+        bits = held | self.pending
+        self.pending = 0
+        if self.unapplied:
+            self.in_flight.extend(self.unapplied)
+            self.unapplied.clear()
+        return bits
+
+    def presented(self):
+        """Call right after the flip that shows the latest simulated tick."""
+        if self.in_flight:
+            now = self.clock()
+            self.latencies.extend((now - stamp) * 1000.0 for stamp in self.in_flight)
+            self.in_flight.clear()
+
+    def summary(self):
+        """'input->photon last/avg/p99' text for the debug overlay."""
+        if not self.latencies:
+            return "input->photon: no input yet"
+        ordered = sorted(self.latencies)
+        return (f"input->photon last {self.latencies[-1]:5.1f}  avg {sum(ordered) / len(ordered):5.1f}  "
+                f"p99 {percentile(ordered, 0.99):5.1f} ms")
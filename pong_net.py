@@ -0,0 +1,468 @@
+"""Two-player Pong over UDP with input delay and rollback.
+
+Both peers run the same deterministic PongSimulation. Each tick a peer applies its own
+input after a short delay and guesses the other player's input (holding their last
+known movement). When the real input arrives and differs from the guess, the
+simulation is restored to a snapshot taken before that tick and re-simulated up to the
+present. PongSimulation.snapshot()/restore() cost well under a microsecond, so even a
+rollback of MAX_ROLLBACK ticks stays far inside one 16 ms frame.
+
+    python pong_net.py host 5000                  # left paddle, waits for a peer
+    python pong_net.py join 192.168.1.20:5000     # right paddle
+    python pong_net.py selftest --latency 80 --jitter 20 --loss 0.1   # plus SELFTEST_LOSSY runs
+
+Every packet repeats all inputs the peer has not acknowledged yet, so lost packets
+need no retransmit timer. --latency, --jitter and --loss delay and drop outgoing
+packets on purpose for testing on localhost.
+"""
+import asyncio
+import random
+import struct
+import sys
+import time
+
+from pong_sim import (
+    INPUT_LEFT_UP, INPUT_LEFT_DOWN, INPUT_LEFT_POWER,
+    INPUT_RIGHT_UP, INPUT_RIGHT_DOWN, INPUT_RIGHT_POWER, INPUT_SERVE,
+    EVENT_HIT, EVENT_SCORE_LEFT, EVENT_SCORE_RIGHT, EVENT_POWER_USED,
+    PHYSICS_SWEPT, TICK_MS, PongSimulation,
+)
+
+INPUT_DELAY = 2              # ticks between pressing a key and the tick it applies to
+MAX_ROLLBACK = 12            # ticks the simulation may run ahead of the peer's confirmed input
+MAX_INPUTS_PER_PACKET = 255
+HELLO_INTERVAL = 0.1         # seconds between handshake retries
+LINGER_S = 1.0               # self-test: seconds a finished bot keeps sending for its peer
+SELFTEST_TIMEOUT_S = 30.0    # self-test: seconds allowed beyond the ticks themselves
+# lossy self-test runs (ticks, seed, latency ms, jitter ms, loss) that once ended with one
+# peer waiting forever for acks from a peer that had already finished
+SELFTEST_LOSSY = ((300, 4, 40, 20, 0.3), (900, 7, 5, 40, 0.5))
+
+# Packets: a type byte, then HELLO (seed) or INPUTS (ack, first tick, count, count bytes)
+MSG_HELLO = 1
+MSG_INPUTS = 2
+HELLO = struct.Struct('<Bq')
+INPUTS = struct.Struct('<BqqB')
+
+SIDE_BITS = (INPUT_LEFT_UP | INPUT_LEFT_DOWN | INPUT_LEFT_POWER | INPUT_SERVE,
+             INPUT_RIGHT_UP | INPUT_RIGHT_DOWN | INPUT_RIGHT_POWER | INPUT_SERVE)
+HELD_BITS = (INPUT_LEFT_UP | INPUT_LEFT_DOWN, INPUT_RIGHT_UP | INPUT_RIGHT_DOWN)
+
+# ---------- Rollback ----------
+class RollbackSession:
+    """Drives one peer's simulation. side is the paddle this peer controls (0 left, 1 right).
+
+    Call advance() once per tick with the local input bits and receive() with every
+    batch of remote inputs; local_inputs() gives what still has to be sent.
+    """
+
+    def __init__(self, sim, side, input_delay=INPUT_DELAY, max_rollback=MAX_ROLLBACK):
+        self.sim = sim
+        self.side = side
+        self.input_delay = input_delay
+        self.max_rollback = max_rollback
+        # the first input_delay ticks have no local input yet; they count as "nothing pressed"
+        self.local = {t: 0 for t in range(sim.tick, sim.tick + input_delay)}
+        self.next_local = sim.tick + input_delay
+        self.remote = {}         # tick -> confirmed remote bits
+        self.used = {}           # tick -> remote bits the simulation ran with (guess or confirmed)
+        self.snapshots = {}      # tick -> sim.snapshot() taken before that tick
+        self.confirmed = sim.tick - 1   # every remote input up to here is known
+        self.acked = sim.tick - 1       # the peer has every local input up to here
+        self.rollback_to = None
+        self.pruned = sim.tick          # history below this tick is already dropped
+        # stats
+        self.rollbacks = 0
+        self.resimulated = 0
+        self.max_depth = 0
+        self.max_rollback_ms = 0.0
+        self.stalls = 0
+
+    def advance(self, bits):
+        """Run one tick with this peer's input bits. Returns the tick's EVENT_* bits, or None
+        when the peer is too far behind and this peer has to wait (the input is dropped)."""
+        if self.sim.tick - self.confirmed > self.max_rollback:
+            self.stalls += 1
+            return None
+        self.local[self.next_local] = bits & SIDE_BITS[self.side]
+        self.next_local += 1
+        self.sync()
+        return self._step()
+
+    def _step(self):
+        sim = self.sim
+        tick = sim.tick
+        self.snapshots[tick] = sim.snapshot()
+        remote = self.remote.get(tick)
+        if remote is None:
+            # predict: the other player keeps holding the same direction (never serve/power)
+            remote = self.remote.get(self.confirmed, 0) & HELD_BITS[1 - self.side]
+        self.used[tick] = remote
+        return sim.step(self.local[tick] | remote)
+
+    def receive(self, first, inputs, ack):
+        """Remote inputs for ticks first, first+1, ...; ack is the last local tick the peer has."""
+        self.acked = max(self.acked, ack)
+        now = self.sim.tick
+        for i, bits in enumerate(inputs):
+            tick = first + i
+            if tick <= self.confirmed or tick in self.remote:
+                continue
+            self.remote[tick] = bits
+            if tick < now and self.used[tick] != bits:
+                if self.rollback_to is None or tick < self.rollback_to:
+                    self.rollback_to = tick
+        while self.confirmed + 1 in self.remote:
+            self.confirmed += 1
+
+    def sync(self):
+        """Apply a pending rollback now: restore and re-simulate up to the current tick."""
+        tick = self.rollback_to
+        if tick is None:
+            self._prune()
+            return
+        self.rollback_to = None
+        start = time.perf_counter()
+        end = self.sim.tick
+        self.sim.restore(self.snapshots[tick])
+        while self.sim.tick < end:
+            self._step()
+        self.rollbacks += 1
+        self.resimulated += end - tick
+        self.max_depth = max(self.max_depth, end - tick)
+        self.max_rollback_ms = max(self.max_rollback_ms, (time.perf_counter() - start) * 1e3)
+        self._prune()
+
+    def _prune(self):
+        # with no rollback pending, ticks up to `confirmed` can never be rolled back to again,
+        # and local inputs up to `acked` never need sending again; with input delay both can
+        # run ahead of the simulation, whose next tick still needs its inputs
+        last = min(self.confirmed, self.acked, self.sim.tick - 1)
+        for tick in range(self.pruned, last + 1):
+            self.snapshots.pop(tick, None)
+            self.used.pop(tick, None)
+            self.local.pop(tick, None)
+            self.remote.pop(tick - 1, None)   # keep remote[confirmed] for prediction
+        self.pruned = max(self.pruned, last + 1)
+
+    def local_inputs(self):
+        """(first tick, bytes) of the local inputs the peer has not acknowledged."""
+        first = self.acked + 1
+        last = min(self.next_local, first + MAX_INPUTS_PER_PACKET)
+        return first, bytes(self.local[t] for t in range(first, last))
+
+    def stats(self):
+        return (f"rollbacks {self.rollbacks} (max {self.max_depth} ticks, {self.max_rollback_ms:.3f} ms), "
+                f"resimulated {self.resimulated} ticks, stalls {self.stalls}")
+
+# ---------- Transport ----------
+class NetPeer(asyncio.DatagramProtocol):
+    """UDP endpoint for one session, with optional simulated latency, jitter and loss."""
+
+    def __init__(self, remote_addr=None, seed=None, latency_ms=0, jitter_ms=0, loss=0.0, rng=None):
+        self.remote_addr = remote_addr
+        self.seed = seed
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.loss = loss
+        self.rng = rng or random.Random()
+        self.session = None
+        self.transport = None
+        self.connected = asyncio.get_running_loop().create_future()
+        self.sent = self.dropped = self.received = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        kind = data[0] if data else 0
+        if kind == MSG_HELLO and len(data) == HELLO.size:
+            _, seed = HELLO.unpack(data)
+            if self.seed is None:            # joining: the host picks the seed
+                self.seed = seed
+                self.remote_addr = addr
+            elif self.remote_addr is None:   # hosting: the first peer to say hello is the opponent
+                self.remote_addr = addr
+            if addr == self.remote_addr:
+                if self.seed != seed or not self.connected.done():
+                    self._send(HELLO.pack(MSG_HELLO, self.seed))
+                if not self.connected.done():
+                    self.connected.set_result(self.seed)
+        elif kind == MSG_INPUTS and addr == self.remote_addr and len(data) >= INPUTS.size:
+            _, ack, first, count = INPUTS.unpack_from(data)
+            self.received += 1
+            if self.session is not None:
+                self.session.receive(first, data[INPUTS.size:INPUTS.size + count], ack)
+
+    def error_received(self, exc):
+        pass   # e.g. ICMP port unreachable while the peer is not up yet; UDP just retries
+
+    async def handshake(self):
+        """Say hello until the other peer answers; returns the shared seed."""
+        while not self.connected.done():
+            if self.remote_addr is not None:
+                self._send(HELLO.pack(MSG_HELLO, -1 if self.seed is None else self.seed))
+            await asyncio.wait([self.connected], timeout=HELLO_INTERVAL)
+        return self.connected.result()
+
+    def send_inputs(self):
+        first, inputs = self.session.local_inputs()
+        self._send(INPUTS.pack(MSG_INPUTS, self.session.confirmed, first, len(inputs)) + inputs)
+
+    def _send(self, data):
+        self.sent += 1
+        if self.loss and self.rng.random() < self.loss:
+            self.dropped += 1
+            return
+        delay = self.latency_ms + (self.rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        if delay > 0:
+            asyncio.get_running_loop().call_later(delay / 1000, self._deliver, data)
+        else:
+            self._deliver(data)
+
+    def _deliver(self, data):
+        if not self.transport.is_closing():
+            self.transport.sendto(data, self.remote_addr)
+
+async def bind_peer(local_addr, remote_addr=None, seed=None, **net):
+    """Bind a NetPeer to local_addr. Without remote_addr it hosts (and picks the seed when
+    none is given); with one it joins and learns the seed from the host's hello."""
+    if remote_addr is None and seed is None:
+        seed = random.randrange(2 ** 31)
+    elif remote_addr is not None:
+        seed = None
+    _, peer = await asyncio.get_running_loop().create_datagram_endpoint(
+        lambda: NetPeer(remote_addr, seed, **net), local_addr=local_addr)
+    return peer
+
+async def open_peer(local_addr, remote_addr=None, **kwargs):
+    """bind_peer() and wait for the handshake."""
+    peer = await bind_peer(local_addr, remote_addr, **kwargs)
+    await peer.handshake()
+    return peer
+
+def new_match(seed):
+    return PongSimulation(seed=seed, physics=PHYSICS_SWEPT)
+
+# ---------- Playing ----------
+def local_bits(pygame, keys, side):
+    """This peer's held-key bits: W/S or Up/Down move whichever paddle it controls."""
+    up = keys[pygame.K_w] or keys[pygame.K_UP]
+    down = keys[pygame.K_s] or keys[pygame.K_DOWN]
+    if side == 0:
+        return (INPUT_LEFT_UP if up else 0) | (INPUT_LEFT_DOWN if down else 0)
+    return (INPUT_RIGHT_UP if up else 0) | (INPUT_RIGHT_DOWN if down else 0)
+
+async def play(local_addr, remote_addr, side, **net):
+    """Networked match in a window. Space serves, E or K fires a power shot, Esc quits."""
+    import pygame
+    import pingpong_game as game
+    import pong_audio
+
+    pong_audio.pre_init()
+    pygame.init()
+    screen = pygame.display.set_mode((game.SCREEN_WIDTH, game.SCREEN_HEIGHT))
+    pygame.display.set_caption('Pong - waiting for the other player...')
+    font, small_font, _ = game.load_fonts()
+    table_layer = game.get_table_layer(screen.get_size())
+    screen.blit(table_layer, (0, 0))
+    pygame.display.flip()
+
+    peer_task = asyncio.ensure_future(open_peer(local_addr, remote_addr, **net))
+    while not peer_task.done():
+        if any(e.type == pygame.QUIT for e in pygame.event.get()):
+            peer_task.cancel()
+            pygame.quit()
+            return
+        await asyncio.sleep(0.05)
+    peer = peer_task.result()
+    pygame.display.set_caption(f"Pong - online ({'left' if side == 0 else 'right'} paddle)")
+
+    sim = new_match(peer.seed)
+    session = peer.session = RollbackSession(sim, side)
+    frame = game.FrameRenderer()
+    audio = pong_audio.AudioBank()
+    power_bit = INPUT_LEFT_POWER if side == 0 else INPUT_RIGHT_POWER
+    pending = 0
+    accumulator = 0.0
+    last = time.perf_counter()
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    pending |= INPUT_SERVE
+                if event.key in (pygame.K_e, pygame.K_k):
+                    pending |= power_bit
+
+        now = time.perf_counter()
+        accumulator = min(accumulator + (now - last) * 1000, game.MAX_FRAME_MS)
+        last = now
+        held = local_bits(pygame, pygame.key.get_pressed(), side)
+        while accumulator >= TICK_MS:
+            accumulator -= TICK_MS
+            events = session.advance(held | pending)
+            if events is None:
+                break          # waiting on the peer's inputs
+            pending = 0
+            if events & EVENT_HIT:
+                audio.play('hit')
+            if events & (EVENT_SCORE_LEFT | EVENT_SCORE_RIGHT):
+                audio.play('score')
+            if events & EVENT_POWER_USED:
+                audio.play('power')
+        session.sync()
+        peer.send_inputs()
+
+        sw, sh = screen.get_size()
+        game.add_gameplay_items(frame, sim, font, small_font, sw, False)
+        if sim.game_over:
+            text = game.render_text(font, f"{'LEFT' if sim.winner == 0 else 'RIGHT'} PLAYER WINS  (Esc to quit)",
+                                    game.COLOR_WHITE)
+            frame.add_text('net_status', text, text.get_rect(center=(sw // 2, sh // 2)).topleft)
+        elif not sim.started:
+            text = game.render_text(small_font, "SPACE to serve", game.COLOR_GRAY)
+            frame.add_text('net_status', text, text.get_rect(center=(sw // 2, sh // 2 + 40)).topleft)
+        frame.add_glyphs('net_stats', small_font, session.stats(), game.COLOR_GRAY, (10, 80))
+        frame.present(screen, table_layer)
+        await asyncio.sleep(max(0.0, TICK_MS / 1000 - (time.perf_counter() - now)))
+
+    peer.transport.close()
+    pygame.quit()
+    print(session.stats())
+
+# ---------- Self-test ----------
+class InputBot:
+    """Scripted player for the self-test: serves, wanders up and down, fires powers now and then."""
+
+    def __init__(self, side, seed):
+        self.side = side
+        self.rng = random.Random(seed)
+        up, down = (INPUT_LEFT_UP, INPUT_LEFT_DOWN) if side == 0 else (INPUT_RIGHT_UP, INPUT_RIGHT_DOWN)
+        self.moves = (0, up, down)
+        self.power = INPUT_LEFT_POWER if side == 0 else INPUT_RIGHT_POWER
+        self.held = 0
+
+    def bits(self, sim):
+        if self.rng.random() < 0.05:
+            self.held = self.rng.choice(self.moves)
+        bits = self.held
+        if not sim.started and self.rng.random() < 0.1:
+            bits |= INPUT_SERVE
+        if self.rng.random() < 0.01:
+            bits |= self.power
+        return bits
+
+async def run_bot(peer, side, ticks, seed):
+    """Play `ticks` ticks at 60 Hz, then keep exchanging inputs until this peer has every
+    input it needs and the peer has acknowledged ours; then linger LINGER_S, still
+    sending, so the peer gets the acks it may still be waiting for."""
+    sim = new_match(peer.seed)
+    session = peer.session = RollbackSession(sim, side)
+    bot = InputBot(side, seed)
+    start = time.perf_counter()
+    frame = 0
+    done = None
+    while done is None or time.perf_counter() - done < LINGER_S:
+        if sim.tick < ticks:
+            session.advance(bot.bits(sim))
+        session.sync()
+        peer.send_inputs()
+        if done is None and sim.tick >= ticks and min(session.confirmed, session.acked) >= ticks - 1:
+            done = time.perf_counter()
+        frame += 1
+        await asyncio.sleep(max(0.0, start + frame * TICK_MS / 1000 - time.perf_counter()))
+    session.sync()
+    return session
+
+def rollback_cost(depth=MAX_ROLLBACK, repeats=2000):
+    """ms to restore a snapshot and re-simulate `depth` ticks of a live rally."""
+    sim = new_match(1)
+    sim.step(INPUT_SERVE)
+    snap = sim.snapshot()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        sim.restore(snap)
+        for _ in range(depth):
+            sim.step(INPUT_LEFT_UP)
+    return (time.perf_counter() - start) / repeats * 1e3
+
+async def selftest(ticks, seed, **net):
+    """Two bots on localhost through the simulated network; returns their sessions.
+
+    Raises asyncio.TimeoutError if they are not done SELFTEST_TIMEOUT_S after the ticks.
+    """
+    host = await bind_peer(('127.0.0.1', 0), seed=seed, rng=random.Random(seed), **net)
+    client = await bind_peer(('127.0.0.1', 0), host.transport.get_extra_info('sockname'),
+                             rng=random.Random(seed + 1), **net)
+
+    async def both():
+        await asyncio.gather(host.handshake(), client.handshake())
+        await asyncio.gather(run_bot(host, 0, ticks, seed), run_bot(client, 1, ticks, seed + 1))
+
+    try:
+        await asyncio.wait_for(both(), ticks * TICK_MS / 1000 + SELFTEST_TIMEOUT_S)
+    finally:
+        for peer in (host, client):
+            peer.transport.close()
+    return host, client, (host.session, client.session)
+
+def report_selftest(ticks, seed, **net):
+    """Run and print one self-test; returns True when the peers ended in the same state."""
+    try:
+        host, client, sessions = asyncio.run(selftest(ticks, seed, **net))
+    except asyncio.TimeoutError:
+        print(f"TIMEOUT: {ticks} ticks, seed {seed}, {net} did not finish")
+        return False
+    for name, peer, session in (('host', host, sessions[0]), ('client', client, sessions[1])):
+        print(f"{name}: tick {session.sim.tick}, score {session.sim.score}, {session.stats()}, "
+              f"packets sent {peer.sent} (dropped {peer.dropped}) received {peer.received}")
+    if sessions[0].sim.pack_state() != sessions[1].sim.pack_state():
+        print("DESYNC: the peers finished in different states")
+        return False
+    print("peers finished in identical states")
+    return True
+
+def _address(text):
+    host, _, port = text.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Two-player Pong over UDP with rollback.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('host', help='wait for a peer and play the left paddle')
+    p.add_argument('port', type=int)
+    p = sub.add_parser('join', help='connect to a host and play the right paddle')
+    p.add_argument('address', type=_address, metavar='HOST:PORT')
+    p.add_argument('--port', type=int, default=0, help='local UDP port (default any)')
+    p = sub.add_parser('selftest', help='two scripted peers on localhost; checks they end in the same state')
+    p.add_argument('--ticks', type=int, default=600)
+    p.add_argument('--seed', type=int, default=1)
+    p.add_argument('--no-lossy', action='store_true', help='skip the SELFTEST_LOSSY runs')
+    for p in sub.choices.values():
+        p.add_argument('--latency', type=float, default=0, help='added one-way delay (ms)')
+        p.add_argument('--jitter', type=float, default=0, help='extra random delay up to this (ms)')
+        p.add_argument('--loss', type=float, default=0.0, help='fraction of outgoing packets dropped')
+    args = parser.parse_args(argv)
+    net = {'latency_ms': args.latency, 'jitter_ms': args.jitter, 'loss': args.loss}
+
+    if args.command == 'host':
+        asyncio.run(play(('0.0.0.0', args.port), None, 0, **net))
+    elif args.command == 'join':
+        asyncio.run(play(('0.0.0.0', args.port), args.address, 1, **net))
+    else:
+        ok = report_selftest(args.ticks, args.seed, **net)
+        if not args.no_lossy:
+            for ticks, seed, latency, jitter, loss in SELFTEST_LOSSY:
+                print(f"lossy run: {ticks} ticks, seed {seed}, latency {latency} ms, "
+                      f"jitter {jitter} ms, loss {loss:.0%}")
+                ok = report_selftest(ticks, seed, latency_ms=latency, jitter_ms=jitter, loss=loss) and ok
+        print(f"rollback of {MAX_ROLLBACK} ticks costs {rollback_cost():.3f} ms")
+        return 0 if ok else 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
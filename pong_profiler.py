@@ -0,0 +1,194 @@
+"""Per-phase frame profiler for the Pong main loop.
+
+Each frame is split into named phases with begin(phase); end_frame() stores the phase
+times (ms) in a fixed-size ring buffer. The debug overlay draws a rolling frame-time graph
+with p50/p99, and an optional CSV sink receives every frame as the ring fills.
+"""
+import time
+from array import array
+
+PHASES = ('events', 'timers', 'physics', 'draw_table', 'draw_paddle', 'draw_ball',
+          'hud_text', 'flip', 'wait')
+WORK_PHASES = len(PHASES) - 1   # everything but 'wait' (clock.tick sleeping)
+PROFILE_FRAMES = 240            # ring buffer length (4 s at 60 FPS)
+GRAPH_W, GRAPH_H = 240, 60
+GRAPH_MAX_MS = 33.3             # top of the graph (two 60 Hz frames)
+COLOR_GRAPH_BG = (0, 0, 0, 140)
+COLOR_GRAPH_WORK = (80, 200, 120)
+COLOR_GRAPH_FRAME = (230, 240, 255)
+COLOR_GRAPH_BUDGET = (220, 60, 60)
+
+class NullProfiler:
+    """Stand-in used while profiling is off, so the main loop needs no checks."""
+
+    def begin(self, phase):
+        pass
+
+    def end_frame(self):
+        pass
+
+NULL_PROFILER = NullProfiler()
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+class FrameProfiler:
+    """Phase timer with a ring buffer of the last `size` frames."""
+
+    def __init__(self, size=PROFILE_FRAMES, csv_path=None, clock=time.perf_counter):
+        self.size = size
+        self.clock = clock
+        self.stride = len(PHASES)
+        self.samples = array('d', bytes(8 * size * self.stride))
+        self.index = 0          # next ring slot
+        self.count = 0          # frames recorded in total
+        self.flushed = 0        # frames already written to CSV
+        self.current = [0.0] * self.stride
+        self.phase = None
+        self.started = 0.0
+        # per ring slot work and whole-frame ms, plus the overlay's buffers: everything
+        # draw() needs is filled in place, so an open overlay allocates nothing per frame
+        self.work_ms = [0.0] * size
+        self.frame_ms = [0.0] * size
+        self.sorted_work = [0.0] * size
+        self.sorted_frame = [0.0] * size
+        self.means = [0.0] * self.stride
+        self.points = [[0.0, 0.0] for _ in range(size)]
+        self.graph = None       # overlay graph Surface, created on first draw and reused
+        self.csv = None
+        if csv_path:
+            self.csv = open(csv_path, 'w')
+            self.csv.write('frame,' + ','.join(PHASES) + ',work_ms,frame_ms\n')
+
+    def begin(self, phase):
+        """Close the running phase and start timing `phase` (an index into PHASES or a name)."""
+        now = self.clock()
+        if self.phase is not None:
+            self.current[self.phase] += now - self.started
+        self.phase = phase if isinstance(phase, int) else PHASES.index(phase)
+        self.started = now
+
+    def reset(self):
+        """Drop the frame in progress. Call when profiling resumes after the main loop ran on
+        NULL_PROFILER, or the time in between would be charged to the phase left running."""
+        self.phase = None
+        for i in range(self.stride):
+            self.current[i] = 0.0
+
+    def end_frame(self):
+        self.begin(0)
+        self.phase = None
+        base = self.index * self.stride
+        current = self.current
+        work = 0
+        for i in range(self.stride):
+            self.samples[base + i] = current[i] * 1000.0
+            if i < WORK_PHASES:
+                work += self.samples[base + i]
+            current[i] = 0.0
+        self.work_ms[self.index] = work
+        self.frame_ms[self.index] = work + self.samples[base + WORK_PHASES]
+        self.index = (self.index + 1) % self.size
+        self.count += 1
+        if self.csv and self.index == 0:
+            self.flush()
+
+    def _frame(self, slot):
+        base = slot * self.stride
+        return self.samples[base:base + self.stride]
+
+    def flush(self):
+        """Append every frame not yet written to the CSV sink (still held in the ring)."""
+        if not self.csv:
+            return
+        first = max(self.flushed, self.count - self.size)
+        for n in range(first, self.count):
+            row = self._frame(n % self.size)
+            work = sum(row[:WORK_PHASES])
+            self.csv.write(f"{n}," + ','.join(f"{v:.4f}" for v in row) + f",{work:.4f},{work + row[-1]:.4f}\n")
+        self.flushed = self.count
+        self.csv.flush()
+
+    def close(self):
+        if self.csv:
+            self.flush()
+            self.csv.close()
+            self.csv = None
+
+    def recent(self):
+        """(work_ms, frame_ms) per frame, oldest first."""
+        n = min(self.count, self.size)
+        slots = [(self.index - n + k) % self.size for k in range(n)]
+        return [(self.work_ms[slot], self.frame_ms[slot]) for slot in slots]
+
+    def phase_means(self):
+        """Mean ms per phase over the ring (the same list, refilled on every call)."""
+        n = min(self.count, self.size)
+        means = self.means
+        for i in range(self.stride):
+            means[i] = 0.0
+        for k in range(n):
+            base = k * self.stride
+            for i in range(self.stride):
+                means[i] += self.samples[base + i]
+        for i in range(self.stride):
+            means[i] = means[i] / n if n else 0.0
+        return means
+
+    def _percentile(self, ordered, q):
+        # ordered is a full ring sorted in place; the size - n empty slots hold 0.0 and sort first
+        n = min(self.count, self.size)
+        return ordered[self.size - n + min(n - 1, int(q * n))] if n else 0.0
+
+    def draw(self, surface, font, pos, color, blit_glyphs, budget_ms=1000 / 60):
+        """Draw the rolling graph, p50/p99 and per-phase means with their top-left at pos.
+
+        blit_glyphs is the game's cached glyph blitter (passed in to avoid an import cycle);
+        budget_ms is the frame time of the pacing in use, drawn as a red line.
+        """
+        import pygame
+
+        x, y = pos
+        n = min(self.count, self.size)
+        graph = self.graph
+        if graph is None:
+            graph = self.graph = pygame.Surface((GRAPH_W, GRAPH_H), pygame.SRCALPHA)
+        graph.fill(COLOR_GRAPH_BG)
+        budget_y = GRAPH_H - int(GRAPH_H * min(budget_ms, GRAPH_MAX_MS) / GRAPH_MAX_MS)
+        pygame.draw.line(graph, COLOR_GRAPH_BUDGET, (0, budget_y), (GRAPH_W, budget_y))
+        if n > 1:
+            points = self.points
+            step = GRAPH_W / (self.size - 1)
+            for series, line_color in ((self.frame_ms, COLOR_GRAPH_FRAME), (self.work_ms, COLOR_GRAPH_WORK)):
+                # oldest first; points past the n-th repeat the newest (zero-length segments)
+                for k in range(self.size):
+                    i = min(k, n - 1)
+                    ms = series[(self.index - n + i) % self.size]
+                    point = points[k]
+                    point[0] = i * step
+                    point[1] = GRAPH_H - min(GRAPH_H, GRAPH_H * ms / GRAPH_MAX_MS)
+                pygame.draw.lines(graph, line_color, False, points)
+        surface.blit(graph, (x, y))
+
+        work, total = self.sorted_work, self.sorted_frame
+        work[:] = self.work_ms
+        work.sort()
+        total[:] = self.frame_ms
+        total.sort()
+        line_h = font.get_linesize()
+        ty = y + GRAPH_H + 4
+        blit_glyphs(surface, font, f"frame p50 {self._percentile(total, 0.5):5.2f}  "
+                    f"p99 {self._percentile(total, 0.99):5.2f} ms", color, (x, ty))
+        blit_glyphs(surface, font, f"work  p50 {self._percentile(work, 0.5):5.2f}  "
+                    f"p99 {self._percentile(work, 0.99):5.2f} ms", color, (x, ty + line_h))
+        means = self.phase_means()
+        for i, name in enumerate(PHASES[:WORK_PHASES]):
+            blit_glyphs(surface, font, f"{name:<12}{means[i]:6.3f}", color, (x, ty + line_h * (2 + i)))
+
+    def overlay_rect(self, font, pos):
+        """Screen area draw() covers (for dirty-rect tracking)."""
+        import pygame
+        height = GRAPH_H + 4 + font.get_linesize() * (2 + WORK_PHASES)
+        return pygame.Rect(pos[0], pos[1], max(GRAPH_W, font.size('x' * 40)[0]), height)
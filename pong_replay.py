@@ -0,0 +1,301 @@
+"""Compact binary Pong replays: one input byte per tick plus periodic full-state keyframes.
+
+File layout (little-endian):
+
+    HEADER        magic, meta length, keyframe interval, base tick, tick count,
+                  keyframe count, keyframe table offset
+    meta          JSON: seed, field size, tick length, physics, rules, AI settings
+    inputs        one INPUT_* byte per tick
+    keyframes     pong_sim.STATE_STRUCT records (the tick is the first field)
+
+Playback memory-maps the file. Seeking to any tick restores the nearest keyframe at or
+before it and re-simulates at most one keyframe interval of inputs.
+
+    python pong_replay.py record match.pongrpl --seed 3
+    python pong_replay.py info match.pongrpl
+    python pong_replay.py seek match.pongrpl 5000
+    python pong_replay.py play match.pongrpl
+"""
+import bisect
+import json
+import mmap
+import struct
+import sys
+import time
+
+import pong_sim
+from pong_sim import STATE_STRUCT, INPUT_SERVE, PongSimulation, TrackingAI
+
+MAGIC = b'PONGRPL3'
+HEADER = struct.Struct('<8sIIqqqq')
+KEYFRAME_INTERVAL = 120      # ticks between periodic keyframes (2 s at 60 Hz)
+FLUSH_BYTES = 4096           # input bytes buffered before hitting the file
+
+def _ai_settings(ai):
+    if ai is None:
+        return None
+    return {'type': type(ai).__name__, 'params': dict(vars(ai))}
+
+def _make_ai(settings):
+    if settings is None:
+        return None
+    return getattr(pong_sim, settings['type'])(**settings['params'])
+
+class ReplayWriter:
+    """Records a match as it is played: call record() with each tick's inputs before sim.step().
+
+    Call keyframe() after any change made outside step() (reset, resize, AI toggle) so
+    playback never re-simulates across it. policies overrides the AI stored per side when
+    a side can be switched to AI later in the match.
+    """
+
+    def __init__(self, path, sim, policies=None, keyframe_interval=KEYFRAME_INTERVAL):
+        self.sim = sim
+        self.keyframe_interval = keyframe_interval
+        self.base_tick = sim.tick
+        self.ticks = 0
+        self.keyframes = []
+        self.buffer = bytearray()
+        policies = policies if policies is not None else sim.ai
+        meta = {
+            'seed': sim.seed,
+            'width': sim.width,
+            'height': sim.height,
+            'tick_ms': sim.tick_ms,
+            'physics': sim.physics,
+            'rules': sim.rules,
+            'ai': [_ai_settings(ai) for ai in policies],
+        }
+        self.meta = json.dumps(meta).encode()
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, len(self.meta), keyframe_interval, self.base_tick, 0, 0, 0))
+        self.file.write(self.meta)
+
+    def keyframe(self, sim=None):
+        sim = sim or self.sim
+        state = sim.pack_state()
+        if self.keyframes and self.keyframes[-1][0] == sim.tick:
+            self.keyframes[-1] = (sim.tick, state)   # a later change at the same tick wins
+        else:
+            self.keyframes.append((sim.tick, state))
+
+    def record(self, inputs):
+        if self.sim.tick != self.base_tick + self.ticks:
+            raise ValueError(f"replay expected tick {self.base_tick + self.ticks}, sim is at {self.sim.tick}")
+        if self.ticks % self.keyframe_interval == 0:
+            self.keyframe()
+        self.buffer.append(inputs & 0xFF)
+        self.ticks += 1
+        if len(self.buffer) >= FLUSH_BYTES:
+            self.file.write(self.buffer)
+            self.buffer.clear()
+
+    def close(self):
+        if self.file is None:
+            return
+        self.keyframe()   # final state, so seeking to the end is also cheap
+        self.file.write(self.buffer)
+        self.buffer.clear()
+        keyframe_offset = self.file.tell()
+        for _, state in self.keyframes:
+            self.file.write(state)
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, len(self.meta), self.keyframe_interval, self.base_tick,
+                                    self.ticks, len(self.keyframes), keyframe_offset))
+        self.file.close()
+        self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class Replay:
+    """A memory-mapped replay file. seek(tick) returns a simulation positioned at that tick."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, meta_len, self.keyframe_interval, self.base_tick, self.n_ticks,
+         n_keyframes, keyframe_offset) = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a Pong replay")
+        if not n_keyframes:
+            raise ValueError(f"{path} was not closed cleanly (no keyframe table)")
+        self.meta = json.loads(self.mm[HEADER.size:HEADER.size + meta_len])
+        self.inputs_offset = HEADER.size + meta_len
+        self.inputs = memoryview(self.mm)[self.inputs_offset:self.inputs_offset + self.n_ticks]
+        self.keyframe_offsets = [keyframe_offset + i * STATE_STRUCT.size for i in range(n_keyframes)]
+        self.keyframe_ticks = [struct.unpack_from('<q', self.mm, off)[0] for off in self.keyframe_offsets]
+        self.ai = [_make_ai(settings) for settings in self.meta['ai']]
+
+    @property
+    def end_tick(self):
+        return self.base_tick + self.n_ticks
+
+    def new_sim(self):
+        m = self.meta
+        return PongSimulation(m['width'], m['height'], seed=m['seed'], tick_ms=m['tick_ms'],
+                              physics=m['physics'], **m['rules'])
+
+    def restore(self, sim, index):
+        ai_mask = sim.unpack_state(self.mm, self.keyframe_offsets[index])
+        for side in (0, 1):
+            sim.ai[side] = self.ai[side] if ai_mask & (1 << side) else None
+
+    def seek(self, tick, sim=None):
+        """Simulation state at tick (before that tick's inputs): keyframe + short re-simulation."""
+        if not self.base_tick <= tick <= self.end_tick:
+            raise IndexError(f"tick {tick} outside {self.base_tick}..{self.end_tick}")
+        sim = sim or self.new_sim()
+        index = bisect.bisect_right(self.keyframe_ticks, tick) - 1
+        self.restore(sim, index)
+        inputs = self.inputs
+        for t in range(sim.tick, tick):
+            sim.step(inputs[t - self.base_tick])
+        return sim
+
+    def step(self, sim):
+        """Advance sim one recorded tick (it must be inside the replay); returns the events.
+
+        Keyframes recorded at this tick are applied first, so out-of-band changes replay too.
+        """
+        index = bisect.bisect_left(self.keyframe_ticks, sim.tick)
+        if index < len(self.keyframe_ticks) and self.keyframe_ticks[index] == sim.tick:
+            self.restore(sim, index)
+        return sim.step(self.inputs[sim.tick - self.base_tick])
+
+    def close(self):
+        self.inputs.release()
+        self.mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# ---------- Command line ----------
+def _describe(sim):
+    return (f"tick {sim.tick}  score {sim.score[0]}-{sim.score[1]}  "
+            f"ball ({sim.ball_x:.1f},{sim.ball_y:.1f}) vel ({sim.ball_vx:.3f},{sim.ball_vy:.3f})  "
+            f"paddles {sim.paddle_y[0]:.1f}/{sim.paddle_y[1]:.1f}  "
+            f"power ready {sim.power_ready}  {'GAME OVER' if sim.game_over else ''}")
+
+def record_ai_match(path, seed, physics):
+    sim = PongSimulation(seed=seed, physics=physics,
+                         left_ai=TrackingAI(power_distance=30), right_ai=TrackingAI())
+    with ReplayWriter(path, sim) as writer:
+        while not sim.game_over:
+            inputs = 0 if sim.started else INPUT_SERVE
+            writer.record(inputs)
+            sim.step(inputs)
+    return sim
+
+def play(path):
+    """Watch a replay with the game's draw helpers. Space pauses, Left/Right seek 5 s,
+    Up/Down change speed, Esc quits."""
+    import pygame
+    import pingpong_game as game
+
+    with Replay(path) as replay:
+        pygame.init()
+        sim = replay.seek(replay.base_tick)
+        screen = pygame.display.set_mode((sim.width, sim.height))
+        pygame.display.set_caption(f'Pong replay - {path}')
+        clock = pygame.time.Clock()
+        font = pygame.font.SysFont('Consolas', 32)
+        small_font = pygame.font.SysFont('Consolas', 18)
+        paused = False
+        speed = 1
+        jump = round(5000 / sim.tick_ms)
+        while True:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                    pygame.quit()
+                    return
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_SPACE:
+                        paused = not paused
+                    if event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+                        target = sim.tick + (jump if event.key == pygame.K_RIGHT else -jump)
+                        sim = replay.seek(min(max(target, replay.base_tick), replay.end_tick), sim)
+                    if event.key == pygame.K_UP:
+                        speed = min(speed * 2, 32)
+                    if event.key == pygame.K_DOWN:
+                        speed = max(speed // 2, 1)
+            if not paused:
+                for _ in range(speed):
+                    if sim.tick >= replay.end_tick:
+                        break
+                    replay.step(sim)
+
+            if (sim.width, sim.height) != screen.get_size():
+                screen = pygame.display.set_mode((sim.width, sim.height))
+            screen.blit(game.get_table_layer(screen.get_size()), (0, 0))
+            for side in (0, 1):
+                game.draw_paddle(screen, pygame.Rect(sim.paddle_x[side], round(sim.paddle_y[side]),
+                                                     sim.paddle_w, sim.paddle_h))
+            game.draw_ball(screen, pygame.Rect(round(sim.ball_x), round(sim.ball_y), sim.ball_size, sim.ball_size))
+            score = game.render_text(font, f"{sim.score[0]}   -   {sim.score[1]}", game.COLOR_WHITE)
+            screen.blit(score, score.get_rect(center=(sim.width // 2, 40)))
+            status = f"tick {sim.tick}/{replay.end_tick}  x{speed}{'  PAUSED' if paused else ''}"
+            game.blit_glyphs(screen, small_font, status, game.COLOR_GRAY, (10, 10))
+            pygame.display.flip()
+            clock.tick(60)
+
+def main(argv=None):
+    import argparse
+    import random
+    parser = argparse.ArgumentParser(description='Record, inspect and play back Pong replays.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('record', help='record a headless AI-vs-AI match')
+    p.add_argument('path')
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--physics', default=pong_sim.PHYSICS_SWEPT)
+    p = sub.add_parser('info', help='show the replay header')
+    p.add_argument('path')
+    p = sub.add_parser('seek', help='print the state at a tick and how long the seek took')
+    p.add_argument('path')
+    p.add_argument('tick', type=int)
+    p = sub.add_parser('bench', help='time random seeks')
+    p.add_argument('path')
+    p.add_argument('--seeks', type=int, default=1000)
+    p = sub.add_parser('play', help='watch a replay in a window')
+    p.add_argument('path')
+    args = parser.parse_args(argv)
+
+    if args.command == 'record':
+        sim = record_ai_match(args.path, args.seed, args.physics)
+        print(f"recorded {sim.tick} ticks to {args.path}: {_describe(sim)}")
+    elif args.command == 'info':
+        with Replay(args.path) as replay:
+            size = len(replay.mm)
+            print(f"ticks {replay.base_tick}..{replay.end_tick}, {len(replay.keyframe_ticks)} keyframes "
+                  f"every {replay.keyframe_interval} ticks, {size} bytes ({size / max(replay.n_ticks, 1):.2f} B/tick)")
+            print(json.dumps(replay.meta, indent=2))
+    elif args.command == 'seek':
+        with Replay(args.path) as replay:
+            if not replay.base_tick <= args.tick <= replay.end_tick:
+                parser.error(f"tick must be in {replay.base_tick}..{replay.end_tick}")
+            start = time.perf_counter()
+            sim = replay.seek(args.tick)
+            elapsed = time.perf_counter() - start
+            print(_describe(sim))
+            print(f"seek took {elapsed * 1e3:.3f} ms")
+    elif args.command == 'bench':
+        with Replay(args.path) as replay:
+            sim = replay.new_sim()
+            ticks = [random.randint(replay.base_tick, replay.end_tick) for _ in range(args.seeks)]
+            start = time.perf_counter()
+            for tick in ticks:
+                replay.seek(tick, sim)
+            elapsed = time.perf_counter() - start
+            print(f"{args.seeks} random seeks, {elapsed / args.seeks * 1e3:.3f} ms each")
+    elif args.command == 'play':
+        play(args.path)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,289 @@
+"""Headless Pong server: many concurrent AI-vs-AI matches on one asyncio event loop.
+
+Every match is an authoritative PongSimulation. A single scheduler task steps all of
+them together on a fixed tick schedule: each tick is due at start + n * TICK_MS, so
+lateness never accumulates into drift, and the time each tick actually started after it
+was due is kept as the tick jitter. A finished match is replaced by a fresh one in the
+same slot, so spectators of a slot keep watching.
+
+Spectators connect over TCP and subscribe to match slots. After every tick (or every
+--send-every ticks) each subscribed slot's state is sent as one binary frame:
+
+    server -> client   WELCOME (matches, tick ms, frame size) once on connect, then
+                       STATE frames: type, slot, pong_sim.STATE_STRUCT bytes
+    client -> server   SUBSCRIBE / UNSUBSCRIBE (type, slot)
+
+A spectator that cannot keep up misses frames rather than growing the server's buffers:
+frames are skipped while its socket has more than MAX_PENDING_BYTES queued.
+
+    python pong_server.py serve --port 7000 --matches 500
+    python pong_server.py load 127.0.0.1:7000 --connections 1000 --seconds 10
+    python pong_server.py bench --matches 500 --connections 500
+
+`bench` serves in this process and runs the load generator in a child process, then
+reports tick jitter, CPU per tick and the resulting matches per core.
+"""
+import asyncio
+import struct
+import subprocess
+import sys
+import time
+from collections import deque
+
+from pong_profiler import percentile
+from pong_sim import (
+    INPUT_SERVE, PHYSICS_SWEPT, STATE_STRUCT, TICK_MS, AI_POLICIES, PongSimulation, make_ai,
+)
+
+MATCHES = 100
+MAX_PENDING_BYTES = 64 * 1024   # per-spectator send backlog beyond which frames are skipped
+JITTER_SAMPLES = 3600           # ticks of jitter history kept for the statistics (1 min)
+REPORT_INTERVAL = 5.0           # seconds between statistics lines while serving
+MAX_CATCHUP_TICKS = 5           # ticks run back to back after a stall before the schedule restarts
+
+# Messages: a type byte, then the fields below (little-endian)
+MSG_WELCOME = 1
+MSG_STATE = 2
+MSG_SUBSCRIBE = 3
+MSG_UNSUBSCRIBE = 4
+WELCOME = struct.Struct('<BIdI')
+STATE_HEADER = struct.Struct('<BI')
+REQUEST = struct.Struct('<BI')
+FRAME_SIZE = STATE_HEADER.size + STATE_STRUCT.size
+
+# ---------- Server ----------
+class MatchServer:
+    """Runs `matches` match slots and streams their state to subscribed spectators."""
+
+    def __init__(self, matches=MATCHES, seed=0, ai=('track', 'track'), send_every=1, tick_ms=TICK_MS):
+        self.ai = ai
+        self.seed = seed
+        self.send_every = send_every
+        self.tick_ms = tick_ms
+        self.created = 0
+        self.matches = [self._new_match() for _ in range(matches)]
+        self.subscribers = [set() for _ in range(matches)]
+        self.clients = 0
+        self.tick = 0
+        self.finished = 0
+        # stats: start lateness per tick (ms), CPU seconds spent in ticks, frames sent/skipped
+        self.jitter = deque(maxlen=JITTER_SAMPLES)
+        self.late_ticks = 0
+        self.resyncs = 0
+        self.cpu = 0.0
+        self.frames_sent = 0
+        self.frames_skipped = 0
+
+    def _new_match(self):
+        self.created += 1      # every match gets its own seed
+        return PongSimulation(seed=self.seed * 1000003 + self.created, physics=PHYSICS_SWEPT,
+                              left_ai=make_ai(self.ai[0]), right_ai=make_ai(self.ai[1]))
+
+    def step(self):
+        """Advance every match one tick and broadcast the states that are due."""
+        broadcast = self.tick % self.send_every == 0
+        for slot, sim in enumerate(self.matches):
+            sim.step(0 if sim.started else INPUT_SERVE)
+            if sim.game_over:
+                self.finished += 1
+                sim = self.matches[slot] = self._new_match()
+            if broadcast and self.subscribers[slot]:
+                self._send(slot, STATE_HEADER.pack(MSG_STATE, slot) + sim.pack_state())
+        self.tick += 1
+
+    def _send(self, slot, frame):
+        for writer in self.subscribers[slot]:
+            if writer.transport.get_write_buffer_size() > MAX_PENDING_BYTES:
+                self.frames_skipped += 1
+                continue
+            writer.write(frame)
+            self.frames_sent += 1
+
+    async def run(self, seconds=None):
+        """Tick at the fixed rate until cancelled (or for `seconds`)."""
+        loop = asyncio.get_running_loop()
+        period = self.tick_ms / 1000
+        ticks = None if seconds is None else round(seconds / period)
+        due = loop.time()
+        n = 0
+        while ticks is None or n < ticks:
+            delay = due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            late = loop.time() - due
+            self.jitter.append(late * 1000)
+            if late > period:
+                self.late_ticks += 1
+            if late > MAX_CATCHUP_TICKS * period:
+                # too far behind to catch up: drop the backlog, the matches run slow instead
+                due = loop.time()
+                self.resyncs += 1
+            cpu = time.process_time()
+            self.step()
+            self.cpu += time.process_time() - cpu
+            due += period
+            n += 1
+            if delay <= 0:
+                await asyncio.sleep(0)   # running behind: still let the clients' I/O through
+
+    async def handle_client(self, reader, writer):
+        self.clients += 1
+        writer.write(WELCOME.pack(MSG_WELCOME, len(self.matches), self.tick_ms, FRAME_SIZE))
+        subscribed = set()
+        try:
+            while True:
+                kind, slot = REQUEST.unpack(await reader.readexactly(REQUEST.size))
+                if not 0 <= slot < len(self.matches):
+                    continue
+                if kind == MSG_SUBSCRIBE:
+                    self.subscribers[slot].add(writer)
+                    subscribed.add(slot)
+                elif kind == MSG_UNSUBSCRIBE:
+                    self.subscribers[slot].discard(writer)
+                    subscribed.discard(slot)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for slot in subscribed:
+                self.subscribers[slot].discard(writer)
+            self.clients -= 1
+            writer.close()
+
+    def stats(self):
+        """One-line summary: tick jitter, CPU per tick, matches per core, spectator traffic."""
+        ordered = sorted(self.jitter)
+        cpu_ms = self.cpu / max(1, self.tick) * 1000
+        per_core = len(self.matches) * self.tick_ms / cpu_ms if cpu_ms else 0.0
+        return (f"tick {self.tick}: jitter p50 {percentile(ordered, 0.5):.2f} p99 {percentile(ordered, 0.99):.2f} "
+                f"max {ordered[-1] if ordered else 0.0:.2f} ms, {self.late_ticks} late, {self.resyncs} resyncs; "
+                f"cpu {cpu_ms:.2f} ms/tick ({cpu_ms / self.tick_ms:.0%} of a core) -> "
+                f"~{per_core:.0f} matches/core; {len(self.matches)} matches ({self.finished} finished), "
+                f"{self.clients} clients, {self.frames_sent} frames sent, {self.frames_skipped} skipped")
+
+async def serve(port, host='0.0.0.0', seconds=None, report=REPORT_INTERVAL, started=None, **options):
+    """Run a MatchServer on host:port, printing its stats every `report` seconds (None: only
+    at the end). started, if given, is a future set to the bound port."""
+    server = MatchServer(**options)
+    listener = await asyncio.start_server(server.handle_client, host, port)
+    if started is not None:
+        started.set_result(listener.sockets[0].getsockname()[1])
+    ticking = asyncio.ensure_future(server.run(seconds))
+    try:
+        while not ticking.done():
+            await asyncio.wait([ticking], timeout=report)
+            if report is not None or ticking.done():
+                print(server.stats(), flush=True)
+    finally:
+        ticking.cancel()
+        listener.close()
+        await listener.wait_closed()
+    return server
+
+# ---------- Load generator ----------
+async def spectate(host, port, slot, totals):
+    """One spectator connection: subscribe to one slot and read frames until cancelled."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        kind, matches, _, frame_size = WELCOME.unpack(await reader.readexactly(WELCOME.size))
+        if kind != MSG_WELCOME or frame_size != FRAME_SIZE:
+            raise ValueError('not a Pong server (or a different state format)')
+        writer.write(REQUEST.pack(MSG_SUBSCRIBE, slot % matches))
+        totals['connected'] += 1
+        clock = time.perf_counter
+        last = None
+        while True:
+            frame = await reader.readexactly(frame_size)
+            now = clock()
+            totals['frames'] += 1
+            if last is not None:
+                totals['gaps'].append((now - last) * 1000)
+            last = now
+            STATE_STRUCT.unpack_from(frame, STATE_HEADER.size)   # decode like a real viewer
+    finally:
+        writer.close()
+
+async def load(host, port, connections, seconds):
+    """Run `connections` spectators spread over the server's slots for `seconds` after they
+    have all connected; returns their totals."""
+    totals = {'connected': 0, 'frames': 0, 'gaps': []}
+    tasks = [asyncio.ensure_future(spectate(host, port, i, totals)) for i in range(connections)]
+    while totals['connected'] < connections and not any(task.done() for task in tasks):
+        await asyncio.sleep(0.01)
+    for task in tasks:
+        if task.done():
+            task.result()     # a connection failed: raise its error
+    totals['frames'] = 0
+    totals['gaps'].clear()
+    start = time.perf_counter()
+    await asyncio.sleep(seconds)
+    totals['elapsed'] = time.perf_counter() - start
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return totals
+
+def load_report(totals, connections):
+    gaps = sorted(totals['gaps'])
+    return (f"{connections} spectators: {totals['frames']} frames in {totals['elapsed']:.1f}s "
+            f"({totals['frames'] / totals['elapsed']:.0f}/s), frame gap p50 {percentile(gaps, 0.5):.2f} "
+            f"p99 {percentile(gaps, 0.99):.2f} max {gaps[-1] if gaps else 0.0:.2f} ms")
+
+async def bench(matches, connections, seconds, **options):
+    """Serve here and run the load generator as a child process against it."""
+    started = asyncio.get_running_loop().create_future()
+    serving = asyncio.ensure_future(serve(0, '127.0.0.1', seconds + 2, report=None,
+                                          started=started, matches=matches, **options))
+    port = await started
+    client = await asyncio.create_subprocess_exec(
+        sys.executable, __file__, 'load', f"127.0.0.1:{port}",
+        '--connections', str(connections), '--seconds', str(seconds),
+        stdout=subprocess.PIPE)
+    out, _ = await client.communicate()
+    await serving
+    print(out.decode().strip())
+    return client.returncode
+
+def _address(text):
+    host, _, port = text.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Many headless Pong matches on one asyncio loop.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('serve', help='run matches and stream their state to spectators')
+    p.add_argument('--port', type=int, default=7000)
+    p.add_argument('--seconds', type=float, help='stop after this long (default: run until interrupted)')
+    p = sub.add_parser('load', help='open many spectator connections against a server')
+    p.add_argument('address', type=_address, metavar='HOST:PORT')
+    p.add_argument('--connections', type=int, default=100)
+    p.add_argument('--seconds', type=float, default=10)
+    p = sub.add_parser('bench', help='serve and load-test in one go (the load runs in a child process)')
+    p.add_argument('--connections', type=int, default=100)
+    p.add_argument('--seconds', type=float, default=10)
+    for name in ('serve', 'bench'):
+        p = sub.choices[name]
+        p.add_argument('--matches', type=int, default=MATCHES)
+        p.add_argument('--seed', type=int, default=0)
+        p.add_argument('--ai', nargs=2, choices=sorted(AI_POLICIES), default=('track', 'track'),
+                       metavar=('LEFT', 'RIGHT'), help='AI policy of each paddle (default track track)')
+        p.add_argument('--send-every', type=int, default=1, metavar='TICKS',
+                       help='broadcast the state every this many ticks (default every tick)')
+    args = parser.parse_args(argv)
+
+    if args.command == 'load':
+        totals = asyncio.run(load(*args.address, args.connections, args.seconds))
+        print(load_report(totals, args.connections))
+        return 0
+    options = {'seed': args.seed, 'ai': tuple(args.ai), 'send_every': args.send_every}
+    try:
+        if args.command == 'serve':
+            asyncio.run(serve(args.port, seconds=args.seconds, matches=args.matches, **options))
+        else:
+            return asyncio.run(bench(args.matches, args.connections, args.seconds, **options))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,625 @@
+"""Headless Pong simulation: the rules of pingpong_game.main() without pygame or a display.
+
+The simulation advances in fixed ticks and is driven by explicit input bitmasks, so a
+match is fully determined by its seed, rules and the sequence of inputs.
+
+    sim = PongSimulation(seed=1, right_ai=TrackingAI())
+    while not sim.game_over:
+        sim.step(INPUT_SERVE)
+
+Run this file directly to play a batch of AI-vs-AI matches and report throughput.
+"""
+import heapq
+import math
+import random
+import struct
+import sys
+import time
+
+# Playing field (matches the windowed game)
+FIELD_WIDTH = 960
+FIELD_HEIGHT = 720
+WALL_MARGIN = 12             # inner table border the ball/paddles bounce off
+PADDLE_OFFSET = 30           # distance of each paddle from its side of the field
+
+# Gameplay settings
+PADDLE_W, PADDLE_H = 12, 110
+BALL_SIZE = 20
+PADDLE_SPEED = 0.6           # pixels per ms (player)
+AI_MAX_SPEED = 0.45          # max speed of AI paddle (pixels per ms)
+AI_DEAD_ZONE = 8             # AI ignores offsets smaller than this (pixels)
+AI_REACTION_MS = 180         # intercept AI: delay before following a new ball trajectory (ms)
+AI_ERROR_PX = 35             # intercept AI: maximum aiming error (pixels)
+AI_MEMORY_SLOTS = 4          # floats of per-side scratch state an AI keeps on the simulation
+BALL_BASE_SPEED = 0.35       # base speed factor (pixels per ms)
+SPEED_INCREMENT = 1.05       # multiply speed on paddle hit
+SPIN_FACTOR = 0.18           # vertical speed added per unit of off-centre paddle hit
+MAX_SCORE = 7                # first to 7 wins
+
+# Power-shot settings
+POWER_MULTIPLIER = 1.6         # how much stronger the ball gets on a power-hit
+POWER_COOLDOWN_MS = 3000       # cooldown after using power (ms)
+POWER_WINDOW_MS = 250          # how long the "power active" window lasts after pressing key (ms)
+POWER_BONUS_POINTS = 1         # immediate points awarded on successful power-hit
+SERVE_DELAY_MS = 250           # after a point, the next serve is ignored for this long (ms)
+
+TICK_MS = 1000 / 60          # fixed simulation timestep (ms)
+
+# Ball physics: 'discrete' moves then tests overlap (the original behaviour, can tunnel at
+# high speed); 'swept' finds the time of impact with walls and paddle faces inside the tick.
+PHYSICS_DISCRETE = 'discrete'
+PHYSICS_SWEPT = 'swept'
+MAX_SWEEP_CONTACTS = 8       # contacts resolved per tick before the rest of the move is dropped
+
+# Input bits (one small int per tick)
+INPUT_LEFT_UP = 1
+INPUT_LEFT_DOWN = 2
+INPUT_LEFT_POWER = 4
+INPUT_RIGHT_UP = 8
+INPUT_RIGHT_DOWN = 16
+INPUT_RIGHT_POWER = 32
+INPUT_SERVE = 64
+
+# Timer kinds in PongSimulation.timers, a heap of (due time, kind, side) entries
+TIMER_POWER_COOLDOWN = 0     # power becomes ready again
+TIMER_POWER_WINDOW = 1       # the "power active" window closes
+TIMER_SERVE = 2              # the post-point serve delay is over
+
+# Event bits returned by PongSimulation.step()
+EVENT_HIT = 1
+EVENT_POWER_HIT = 2
+EVENT_SCORE_LEFT = 4
+EVENT_SCORE_RIGHT = 8
+EVENT_POWER_USED = 16
+EVENT_GAME_OVER = 32
+EVENT_WALL = 64
+
+# Fixed-width binary layout of the full mutable match state (see PongSimulation.pack_state):
+# tick, time, serves, width, height, ball x/y/vx/vy, paddle y (2), score (2), started,
+# game_over, winner (-1 = none), power ready (2), active (2), cooldown end (2),
+# active-window end (2), AI memory (2 x AI_MEMORY_SLOTS), serve ready, serve allowed at,
+# AI bitmask (bit 0 left, bit 1 right).
+STATE_STRUCT = struct.Struct('<qdqii4d2d2i??b2?2?2d2d8d?dB')
+
+def default_rules():
+    """The tunable rules, read from the module constants at call time."""
+    return {
+        'paddle_w': PADDLE_W,
+        'paddle_h': PADDLE_H,
+        'ball_size': BALL_SIZE,
+        'paddle_speed': PADDLE_SPEED,
+        'ball_base_speed': BALL_BASE_SPEED,
+        'speed_increment': SPEED_INCREMENT,
+        'spin_factor': SPIN_FACTOR,
+        'max_score': MAX_SCORE,
+        'power_multiplier': POWER_MULTIPLIER,
+        'power_cooldown_ms': POWER_COOLDOWN_MS,
+        'power_window_ms': POWER_WINDOW_MS,
+        'power_bonus_points': POWER_BONUS_POINTS,
+        'serve_delay_ms': SERVE_DELAY_MS,
+    }
+
+def move_from_input(inputs, side):
+    """-1, 0 or 1 paddle direction for one side; up and down together cancel out."""
+    if side == 0:
+        up, down = inputs & INPUT_LEFT_UP, inputs & INPUT_LEFT_DOWN
+    else:
+        up, down = inputs & INPUT_RIGHT_UP, inputs & INPUT_RIGHT_DOWN
+    return (1 if down else 0) - (1 if up else 0)
+
+# ---------- AI policies ----------
+class TrackingAI:
+    """The original AI: chase the ball's centre at a capped speed, ignoring small offsets.
+
+    With power_distance set, it also fires a power shot once the approaching ball is
+    that many pixels from its paddle (the original AI never uses power).
+    """
+
+    def __init__(self, max_speed=AI_MAX_SPEED, dead_zone=AI_DEAD_ZONE, power_distance=None):
+        self.max_speed = max_speed
+        self.dead_zone = dead_zone
+        self.power_distance = power_distance
+
+    def move(self, sim, side, dt):
+        """Vertical paddle displacement for this tick."""
+        diff = (sim.ball_y + sim.ball_size / 2) - (sim.paddle_y[side] + sim.paddle_h / 2)
+        if abs(diff) > self.dead_zone:
+            return math.copysign(min(self.max_speed * dt, abs(diff)), diff)
+        return 0.0
+
+    def power(self, sim, side):
+        """True to press the power key this tick."""
+        if self.power_distance is None or not sim.power_ready[side]:
+            return False
+        if side == 0:
+            gap = sim.ball_x - (sim.paddle_x[0] + sim.paddle_w)
+            approaching = sim.ball_vx < 0
+        else:
+            gap = sim.paddle_x[1] - (sim.ball_x + sim.ball_size)
+            approaching = sim.ball_vx > 0
+        return approaching and gap <= self.power_distance
+
+# Intercept AI difficulty presets: reaction delay (ms) before following a new ball
+# trajectory and the maximum aiming error (pixels). The speed cap stays AI_MAX_SPEED.
+AI_DIFFICULTY = {
+    'easy': {'reaction_ms': 300, 'error_px': 70},
+    'normal': {'reaction_ms': AI_REACTION_MS, 'error_px': AI_ERROR_PX},
+    'hard': {'reaction_ms': 90, 'error_px': 12},
+    'perfect': {'reaction_ms': 0, 'error_px': 0},
+}
+
+class InterceptAI(TrackingAI):
+    """Predict where the ball crosses the paddle's face, reflections off the walls included.
+
+    The prediction is redone only when the ball's horizontal velocity changes (a paddle
+    hit or a new serve; wall bounces are already folded into it), so each tick costs O(1).
+    After each new prediction the paddle waits reaction_ms, then heads for the predicted
+    point plus an error of up to error_px. While the ball moves away it drifts back to the
+    middle. The prediction is kept in sim.ai_memory, so snapshots and replays include it.
+    """
+
+    def __init__(self, reaction_ms=AI_REACTION_MS, error_px=AI_ERROR_PX, max_speed=AI_MAX_SPEED,
+                 dead_zone=AI_DEAD_ZONE, power_distance=None):
+        super().__init__(max_speed, dead_zone, power_distance)
+        self.reaction_ms = reaction_ms
+        self.error_px = error_px
+
+    def predict(self, sim, side):
+        """Ball centre y when it reaches this side's paddle face (None if moving away)."""
+        vx = sim.ball_vx
+        if side == 0:
+            if vx >= 0:
+                return None
+            t = (sim.paddle_x[0] + sim.paddle_w - sim.ball_x) / vx
+        else:
+            if vx <= 0:
+                return None
+            t = (sim.paddle_x[1] - sim.ball_size - sim.ball_x) / vx
+        top = WALL_MARGIN
+        span = sim.height - WALL_MARGIN - sim.ball_size - top
+        y = sim.ball_y + sim.ball_vy * max(t, 0.0) - top
+        if span > 0:
+            # unfold the wall bounces: the path is a triangle wave of period 2 * span
+            y %= 2 * span
+            if y > span:
+                y = 2 * span - y
+        return top + y + sim.ball_size / 2
+
+    def move(self, sim, side, dt):
+        memory = sim.ai_memory[side]   # [seen vx, seen serve, target centre y, react at]
+        if sim.ball_vx != memory[0] or sim.serves != memory[1]:
+            memory[0] = sim.ball_vx
+            memory[1] = sim.serves
+            memory[3] = sim.time + self.reaction_ms
+            target = self.predict(sim, side)
+            if target is None:
+                target = sim.height / 2
+            elif self.error_px:
+                rng = random.Random((sim.seed * 1000003 + sim.tick) * 2 + side)
+                target += rng.uniform(-self.error_px, self.error_px)
+            memory[2] = target
+        if sim.time < memory[3]:
+            return 0.0
+        diff = memory[2] - (sim.paddle_y[side] + sim.paddle_h / 2)
+        if abs(diff) > self.dead_zone:
+            return math.copysign(min(self.max_speed * dt, abs(diff)), diff)
+        return 0.0
+
+AI_POLICIES = {'track': TrackingAI, 'intercept': InterceptAI}
+
+def make_ai(kind, difficulty=None, **params):
+    """AI policy by name ('track' or 'intercept'); difficulty picks intercept presets."""
+    if difficulty is not None:
+        params = {**AI_DIFFICULTY[difficulty], **params}
+    return AI_POLICIES[kind](**params)
+
+# ---------- Simulation ----------
+class PongSimulation:
+    """One Pong match. Positions are floats (top-left corners), times are simulation ms."""
+
+    def __init__(self, width=FIELD_WIDTH, height=FIELD_HEIGHT, seed=0, tick_ms=TICK_MS,
+                 left_ai=None, right_ai=None, physics=PHYSICS_DISCRETE, **rules):
+        if physics not in (PHYSICS_DISCRETE, PHYSICS_SWEPT):
+            raise ValueError(f"unknown physics mode {physics!r}")
+        merged = default_rules()
+        unknown = set(rules) - set(merged)
+        if unknown:
+            raise TypeError(f"unknown rule(s): {', '.join(sorted(unknown))}")
+        merged.update(rules)
+        self.rules = merged
+        for name, value in merged.items():
+            setattr(self, name, value)
+        self.seed = seed
+        self.tick_ms = tick_ms
+        self.physics = physics
+        self.ai = [left_ai, right_ai]
+        self.width = width
+        self.height = height
+        self.paddle_x = [PADDLE_OFFSET, width - PADDLE_OFFSET - self.paddle_w]
+        self.paddle_y = [(height - self.paddle_h) / 2] * 2
+
+        self.time = 0.0
+        self.tick = 0
+        self.serves = 0
+        self.score = [0, 0]
+        self.started = False
+        self.game_over = False
+        self.winner = None
+
+        # power-shot state for left (0) and right (1)
+        self.power_ready = [True, True]
+        self.power_active = [False, False]
+        self.power_cooldown_end = [0.0, 0.0]
+        self.power_active_end = [0.0, 0.0]
+        # scratch state AI policies keep here rather than on themselves, so it is snapshotted
+        self.ai_memory = [[0.0, -1.0, 0.0, 0.0], [0.0, -1.0, 0.0, 0.0]]
+        # serving is blocked until serve_at after a point
+        self.serve_ready = True
+        self.serve_at = 0.0
+        # pending timers; nothing is polled, so idle timers cost one comparison per tick
+        self.timers = []
+
+        rng = self._serve_rng()
+        self._place_ball(self.ball_base_speed * rng.choice((1, -1)),
+                         self.ball_base_speed * rng.uniform(-0.3, 0.3))
+
+    def _serve_rng(self):
+        # each serve gets its own stream so the state needs no RNG object (cheap to copy)
+        rng = random.Random(self.seed * 1000003 + self.serves)
+        self.serves += 1
+        return rng
+
+    def _place_ball(self, vx, vy):
+        self.ball_x = (self.width - self.ball_size) / 2
+        self.ball_y = (self.height - self.ball_size) / 2
+        self.ball_vx = vx
+        self.ball_vy = vy
+
+    def reset(self):
+        """Start a new match (the R key / RESTART button). Power timers keep running."""
+        self.serve_ready = True
+        self.score = [0, 0]
+        self._place_ball(self.ball_base_speed * self._serve_rng().choice((1, -1)), 0.0)
+        self.started = False
+        self.game_over = False
+        self.winner = None
+
+    def resize(self, width, height):
+        """Follow a new field size (window resize / fullscreen)."""
+        self.width = width
+        self.height = height
+        self.paddle_x[1] = width - PADDLE_OFFSET - self.paddle_w
+        for side in (0, 1):
+            self.paddle_y[side] = self._clamp_paddle(self.paddle_y[side])
+
+    def _clamp_paddle(self, y):
+        if y < WALL_MARGIN:
+            return WALL_MARGIN
+        if y + self.paddle_h > self.height - WALL_MARGIN:
+            return self.height - WALL_MARGIN - self.paddle_h
+        return y
+
+    def _use_power(self, side, now):
+        if not self.power_ready[side] or self.game_over:
+            return 0
+        self.power_active[side] = True
+        self.power_ready[side] = False
+        self.power_active_end[side] = now + self.power_window_ms
+        self.power_cooldown_end[side] = now + self.power_cooldown_ms
+        heapq.heappush(self.timers, (self.power_active_end[side], TIMER_POWER_WINDOW, side))
+        heapq.heappush(self.timers, (self.power_cooldown_end[side], TIMER_POWER_COOLDOWN, side))
+        return EVENT_POWER_USED
+
+    def _point_scored(self):
+        # the next serve waits serve_delay_ms of simulation time (paused games don't count)
+        self.started = False
+        if self.serve_delay_ms > 0:
+            self.serve_ready = False
+            self.serve_at = self.time + self.serve_delay_ms
+            heapq.heappush(self.timers, (self.serve_at, TIMER_SERVE, 0))
+
+    def _run_timers(self, now):
+        """Fire every timer due at `now`. An entry whose state has since changed (a reset,
+        or a power window already used up by a hit) no longer matches and is skipped."""
+        timers = self.timers
+        while timers and timers[0][0] <= now:
+            due, kind, side = heapq.heappop(timers)
+            if kind == TIMER_POWER_COOLDOWN:
+                if not self.power_ready[side] and due == self.power_cooldown_end[side]:
+                    self.power_ready[side] = True
+                    self.power_active[side] = False
+            elif kind == TIMER_POWER_WINDOW:
+                if self.power_active[side] and due == self.power_active_end[side]:
+                    self.power_active[side] = False
+            elif not self.serve_ready and due == self.serve_at:
+                self.serve_ready = True
+
+    def _rebuild_timers(self):
+        # the pending timers follow from the state, so snapshots and packed states omit them
+        timers = []
+        for side in (0, 1):
+            if not self.power_ready[side]:
+                timers.append((self.power_cooldown_end[side], TIMER_POWER_COOLDOWN, side))
+            if self.power_active[side]:
+                timers.append((self.power_active_end[side], TIMER_POWER_WINDOW, side))
+        if not self.serve_ready:
+            timers.append((self.serve_at, TIMER_SERVE, 0))
+        heapq.heapify(timers)
+        self.timers = timers
+
+    def step(self, inputs=0):
+        """Advance one tick with the given input bits; returns the EVENT_* bits that fired."""
+        return self.step_timers(inputs) | self.step_physics(inputs)
+
+    def step_timers(self, inputs=0):
+        """First half of step(): due timers, power/serve inputs and the tick clock."""
+        now = self.time
+        events = 0
+
+        if self.timers and self.timers[0][0] <= now:
+            self._run_timers(now)
+        if inputs & INPUT_LEFT_POWER:
+            events |= self._use_power(0, now)
+        if inputs & INPUT_RIGHT_POWER:
+            events |= self._use_power(1, now)
+        for side in (0, 1):
+            ai = self.ai[side]
+            if ai is not None and self.started and ai.power(self, side):
+                events |= self._use_power(side, now)
+        if inputs & INPUT_SERVE and not self.started and not self.game_over and self.serve_ready:
+            self.started = True
+
+        self.time = now + self.tick_ms
+        self.tick += 1
+        return events
+
+    def step_physics(self, inputs=0):
+        """Second half of step(): paddles, ball, scoring and the win check."""
+        if not self.started or self.game_over:
+            return 0
+        dt = self.tick_ms
+        events = 0
+
+        # move paddles (AI replaces the keyboard for its side)
+        for side in (0, 1):
+            ai = self.ai[side]
+            if ai is not None:
+                dy = ai.move(self, side, dt)
+            else:
+                dy = move_from_input(inputs, side) * self.paddle_speed * dt
+            self.paddle_y[side] = self._clamp_paddle(self.paddle_y[side] + dy)
+
+        size = self.ball_size
+        swept = self.physics == PHYSICS_SWEPT
+        if swept:
+            # walls and paddles resolved in time order inside the tick
+            events |= self._sweep_ball(dt)
+        else:
+            # update ball position
+            self.ball_x += self.ball_vx * dt
+            self.ball_y += self.ball_vy * dt
+
+            # top/bottom collision (respect the inner margin)
+            if self.ball_y <= WALL_MARGIN:
+                self.ball_y = WALL_MARGIN
+                self.ball_vy *= -1
+                events |= EVENT_WALL
+            if self.ball_y + size >= self.height - WALL_MARGIN:
+                self.ball_y = self.height - WALL_MARGIN - size
+                self.ball_vy *= -1
+                events |= EVENT_WALL
+
+        # left/right out of bounds -> point scored, wait for the next serve
+        if self.ball_x <= 0:
+            self.score[1] += 1
+            events |= EVENT_SCORE_RIGHT
+            self._place_ball(self.ball_base_speed, self._serve_rng().uniform(-0.3, 0.3))
+            self._point_scored()
+        if self.ball_x + size >= self.width:
+            self.score[0] += 1
+            events |= EVENT_SCORE_LEFT
+            self._place_ball(-self.ball_base_speed, self._serve_rng().uniform(-0.3, 0.3))
+            self._point_scored()
+
+        # paddle collisions
+        if not swept and self.ball_vx < 0 and self._touches_paddle(0):
+            events |= self._paddle_hit(0)
+            self.ball_x = self.paddle_x[0] + self.paddle_w + 1
+        if not swept and self.ball_vx > 0 and self._touches_paddle(1):
+            events |= self._paddle_hit(1)
+            self.ball_x = self.paddle_x[1] - 1 - size
+
+        # check for win
+        if self.score[0] >= self.max_score or self.score[1] >= self.max_score:
+            self.winner = 0 if self.score[0] > self.score[1] else 1
+            self.game_over = True
+            self.started = False
+            events |= EVENT_GAME_OVER
+        return events
+
+    def _touches_paddle(self, side):
+        px, py = self.paddle_x[side], self.paddle_y[side]
+        bx, by, size = self.ball_x, self.ball_y, self.ball_size
+        return bx < px + self.paddle_w and px < bx + size and by < py + self.paddle_h and py < by + size
+
+    def pack_state(self):
+        """The full mutable state as STATE_STRUCT bytes (rules, seed and AI settings excluded)."""
+        return STATE_STRUCT.pack(*self._state_fields())
+
+    def pack_state_into(self, buffer, offset):
+        STATE_STRUCT.pack_into(buffer, offset, *self._state_fields())
+
+    def _state_fields(self):
+        ai_mask = (self.ai[0] is not None) | ((self.ai[1] is not None) << 1)
+        return (self.tick, self.time, self.serves, self.width, self.height,
+                self.ball_x, self.ball_y, self.ball_vx, self.ball_vy,
+                self.paddle_y[0], self.paddle_y[1], self.score[0], self.score[1],
+                self.started, self.game_over, -1 if self.winner is None else self.winner,
+                self.power_ready[0], self.power_ready[1], self.power_active[0], self.power_active[1],
+                self.power_cooldown_end[0], self.power_cooldown_end[1],
+                self.power_active_end[0], self.power_active_end[1],
+                *self.ai_memory[0], *self.ai_memory[1], self.serve_ready, self.serve_at, ai_mask)
+
+    def unpack_state(self, buffer, offset=0):
+        """Load state written by pack_state. Returns the AI bitmask; the caller decides
+        which policy objects to attach for the sides that were AI-controlled."""
+        (self.tick, self.time, self.serves, width, height,
+         self.ball_x, self.ball_y, self.ball_vx, self.ball_vy,
+         py0, py1, s0, s1, self.started, self.game_over, winner,
+         r0, r1, a0, a1, c0, c1, e0, e1, *memory, self.serve_ready, self.serve_at,
+         ai_mask) = STATE_STRUCT.unpack_from(buffer, offset)
+        self.width, self.height = width, height
+        self.paddle_x[1] = width - PADDLE_OFFSET - self.paddle_w
+        self.paddle_y = [py0, py1]
+        self.score = [s0, s1]
+        self.winner = None if winner < 0 else winner
+        self.power_ready = [r0, r1]
+        self.power_active = [a0, a1]
+        self.power_cooldown_end = [c0, c1]
+        self.power_active_end = [e0, e1]
+        self.ai_memory = [memory[:AI_MEMORY_SLOTS], memory[AI_MEMORY_SLOTS:]]
+        self._rebuild_timers()
+        return ai_mask
+
+    def snapshot(self):
+        """The full mutable state as a flat tuple: a few microseconds to take or restore(),
+        for rollback. Unlike pack_state it is not meant to leave the process."""
+        return (self.tick, self.time, self.serves, self.width, self.height,
+                self.ball_x, self.ball_y, self.ball_vx, self.ball_vy,
+                *self.paddle_y, *self.score, self.started, self.game_over, self.winner,
+                *self.power_ready, *self.power_active, *self.power_cooldown_end, *self.power_active_end,
+                *self.ai_memory[0], *self.ai_memory[1], self.serve_ready, self.serve_at)
+
+    def restore(self, snapshot):
+        """Return to a state taken with snapshot() (AI policy objects are left attached)."""
+        (self.tick, self.time, self.serves, width, height,
+         self.ball_x, self.ball_y, self.ball_vx, self.ball_vy,
+         py0, py1, s0, s1, self.started, self.game_over, self.winner,
+         r0, r1, a0, a1, c0, c1, e0, e1, m0, m1, m2, m3, m4, m5, m6, m7, self.serve_ready, self.serve_at) = snapshot
+        if width != self.width:
+            self.paddle_x[1] = width - PADDLE_OFFSET - self.paddle_w
+        self.width, self.height = width, height
+        self.paddle_y = [py0, py1]
+        self.score = [s0, s1]
+        self.power_ready = [r0, r1]
+        self.power_active = [a0, a1]
+        self.power_cooldown_end = [c0, c1]
+        self.power_active_end = [e0, e1]
+        self.ai_memory = [[m0, m1, m2, m3], [m4, m5, m6, m7]]
+        self._rebuild_timers()
+
+    def _paddle_toi(self, side, remaining):
+        """Time (ms) until the ball reaches the front face of a paddle, or None if it misses."""
+        vx = self.ball_vx
+        px, py = self.paddle_x[side], self.paddle_y[side]
+        if side == 0:
+            face = px + self.paddle_w
+            if vx >= 0 or self.ball_x < face:
+                return None
+            t = (face - self.ball_x) / vx
+        else:
+            if vx <= 0 or self.ball_x + self.ball_size > px:
+                return None
+            t = (px - (self.ball_x + self.ball_size)) / vx
+        if t > remaining:
+            return None
+        y = self.ball_y + self.ball_vy * t
+        if y < py + self.paddle_h and py < y + self.ball_size:
+            return t
+        return None
+
+    def _sweep_ball(self, dt):
+        """Move the ball dt ms, resolving wall and paddle contacts in time order (no tunnelling)."""
+        events = 0
+        size = self.ball_size
+        top, bottom = WALL_MARGIN, self.height - WALL_MARGIN - size
+        remaining = dt
+        for _ in range(MAX_SWEEP_CONTACTS):
+            vx, vy = self.ball_vx, self.ball_vy
+            side = 0 if vx < 0 else 1
+            # a paddle that moved onto the ball counts as an immediate hit, as in discrete mode
+            if vx and self._touches_paddle(side):
+                hit_t = 0.0
+            else:
+                hit_t = self._paddle_toi(side, remaining)
+            wall_t = None
+            if vy < 0:
+                wall_t = max(0.0, (top - self.ball_y) / vy)
+            elif vy > 0:
+                wall_t = max(0.0, (bottom - self.ball_y) / vy)
+            if wall_t is not None and wall_t > remaining:
+                wall_t = None
+
+            if hit_t is None and wall_t is None:
+                self.ball_x += vx * remaining
+                self.ball_y += vy * remaining
+                break
+            if hit_t is not None and (wall_t is None or hit_t <= wall_t):
+                self.ball_y += vy * hit_t
+                events |= self._paddle_hit(side)
+                if side == 0:
+                    self.ball_x = self.paddle_x[0] + self.paddle_w + 1
+                else:
+                    self.ball_x = self.paddle_x[1] - 1 - size
+                remaining -= hit_t
+            else:
+                self.ball_x += vx * wall_t
+                self.ball_y = top if vy < 0 else bottom
+                self.ball_vy = -vy
+                events |= EVENT_WALL
+                remaining -= wall_t
+            if remaining <= 0:
+                break
+        return events
+
+    def _paddle_hit(self, side):
+        if self.power_active[side]:
+            self.ball_vx *= -1 * self.power_multiplier
+            self.ball_vy *= self.power_multiplier
+            self.score[side] += self.power_bonus_points
+            self.power_active[side] = False
+            return EVENT_HIT | EVENT_POWER_HIT
+        self.ball_vx *= -1
+        rel = ((self.ball_y + self.ball_size / 2) - (self.paddle_y[side] + self.paddle_h / 2)) / (self.paddle_h / 2)
+        self.ball_vy += rel * self.spin_factor
+        self.ball_vx *= self.speed_increment
+        self.ball_vy *= self.speed_increment
+        return EVENT_HIT
+
+def run_match(sim, max_ticks=None):
+    """Play sim to the end, serving immediately after every point. Returns the sim."""
+    while not sim.game_over:
+        if max_ticks is not None and sim.tick >= max_ticks:
+            break
+        sim.step(0 if sim.started else INPUT_SERVE)
+    return sim
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Run headless AI-vs-AI Pong matches.')
+    parser.add_argument('--matches', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-ticks', type=int, default=200000, help='give up on a match after this many ticks')
+    parser.add_argument('--ai', choices=sorted(AI_POLICIES), default='track',
+                        help='policy for the right paddle (the left one always tracks)')
+    parser.add_argument('--difficulty', choices=AI_DIFFICULTY, help='intercept AI preset (default normal)')
+    args = parser.parse_args(argv)
+    if args.difficulty and args.ai != 'intercept':
+        parser.error('--difficulty applies to --ai intercept')
+
+    wins = [0, 0]
+    ticks = 0
+    start = time.perf_counter()
+    for i in range(args.matches):
+        sim = run_match(PongSimulation(seed=args.seed + i, left_ai=TrackingAI(),
+                                       right_ai=make_ai(args.ai, args.difficulty)), args.max_ticks)
+        if sim.winner is not None:
+            wins[sim.winner] += 1
+        ticks += sim.tick
+    elapsed = time.perf_counter() - start
+    print(f"{args.matches} matches, left {wins[0]} / right {wins[1]}, "
+          f"{ticks} ticks in {elapsed:.2f}s ({args.matches / elapsed:.1f} matches/s, {ticks / elapsed:.0f} ticks/s)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,223 @@
+"""Per-rally telemetry written off the frame loop.
+
+RallyTracker watches each simulation tick's EVENT_* bits and, when a point is scored,
+emits one record for the rally: its length, paddle hits, peak ball speed, power-shot
+attempts and successes per side, and who scored. TelemetryWriter takes records from the
+game thread with a non-blocking put on a bounded queue; a background thread batches
+them into gzip-compressed JSONL files, rotating to a new file every ROTATE_RECORDS
+records and keeping the newest KEEP_FILES. When the queue is full the record is
+dropped and counted: telemetry never makes a frame wait. The writer thread adds a
+{"type": "dropped"} record whenever the count has grown.
+
+    python pingpong_game.py --telemetry telemetry/
+    python pong_telemetry.py record telemetry/ --matches 200
+    python pong_telemetry.py summary telemetry/
+"""
+import gzip
+import json
+import math
+import queue
+import sys
+import threading
+import time
+from pathlib import Path
+
+from pong_sim import (
+    EVENT_HIT, EVENT_POWER_HIT, EVENT_SCORE_LEFT, EVENT_SCORE_RIGHT,
+    INPUT_SERVE, PongSimulation, TrackingAI,
+)
+
+QUEUE_SIZE = 1024            # records waiting for the writer thread before new ones are dropped
+BATCH_RECORDS = 256          # records written per batch at most
+FLUSH_INTERVAL = 1.0         # seconds the writer waits for more records before flushing
+ROTATE_RECORDS = 10000       # records per file
+KEEP_FILES = 20              # newest files kept; older ones are deleted
+FILE_PATTERN = 'telemetry-*.jsonl.gz'
+
+# ---------- Writer ----------
+class TelemetryWriter:
+    """Bounded queue plus a daemon thread writing rotating .jsonl.gz files into directory."""
+
+    def __init__(self, directory, queue_size=QUEUE_SIZE, rotate_records=ROTATE_RECORDS, keep_files=KEEP_FILES,
+                 flush_interval=FLUSH_INTERVAL):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.rotate_records = rotate_records
+        self.keep_files = keep_files
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(queue_size)
+        self.emitted = 0
+        self.dropped = 0
+        self.written = 0
+        self.file = None
+        self.file_records = 0
+        self.files = 0
+        self.thread = threading.Thread(target=self._run, name='telemetry-writer', daemon=True)
+        self.thread.start()
+
+    def emit(self, record):
+        """Queue a record (a JSON-serializable dict) without ever blocking."""
+        try:
+            self.queue.put_nowait(record)
+            self.emitted += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        """Write out everything queued and stop the thread (this call may block)."""
+        self.queue.put(None)
+        self.thread.join()
+
+    def _run(self):
+        reported = 0
+        done = False
+        while not done:
+            batch = []
+            try:
+                batch.append(self.queue.get(timeout=self.flush_interval))
+                while len(batch) < BATCH_RECORDS:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+            if None in batch:
+                done = True
+                batch = batch[:batch.index(None)]
+            dropped = self.dropped
+            if dropped != reported:
+                batch.append({'type': 'dropped', 'time': time.time(), 'count': dropped - reported})
+                reported = dropped
+            if batch:
+                self._write(batch)
+            elif self.file:
+                self.file.flush()
+        if self.file:
+            self.file.close()
+
+    def _write(self, records):
+        for record in records:
+            if self.file is None or self.file_records >= self.rotate_records:
+                self._rotate()
+            self.file.write(json.dumps(record, separators=(',', ':')).encode() + b'\n')
+            self.file_records += 1
+            self.written += 1
+
+    def _rotate(self):
+        if self.file:
+            self.file.close()
+        self.files += 1
+        name = f"telemetry-{time.strftime('%Y%m%d-%H%M%S')}-{self.files:04d}.jsonl.gz"
+        self.file = gzip.open(self.directory / name, 'wb', compresslevel=6)
+        self.file_records = 0
+        for old in sorted(self.directory.glob(FILE_PATTERN))[:-self.keep_files]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+    def stats(self):
+        return f"telemetry: {self.emitted} queued, {self.written} written, {self.dropped} dropped"
+
+# ---------- Rally tracking ----------
+class RallyTracker:
+    """Turns the per-tick EVENT_* bits of one match into rally records for a writer."""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.start_tick = None       # tick the current rally was served on (None between rallies)
+        self.ready = [True, True]    # power readiness after the previous tick
+        self._new_rally()
+
+    def _new_rally(self):
+        self.hits = 0
+        self.peak_speed = 0.0
+        self.power_attempts = [0, 0]
+        self.power_hits = [0, 0]
+
+    def tick(self, sim, events):
+        """Call after every simulation tick with the events that tick returned."""
+        used = [self.ready[side] and not sim.power_ready[side] for side in (0, 1)]
+        self.ready = list(sim.power_ready)
+        scored = events & (EVENT_SCORE_LEFT | EVENT_SCORE_RIGHT)
+        if self.start_tick is None:
+            if not (sim.started or scored):
+                return               # waiting for the serve
+            self.start_tick = sim.tick - 1
+        for side in (0, 1):
+            self.power_attempts[side] += used[side]
+        if events & EVENT_HIT:
+            self.hits += 1
+            if events & EVENT_POWER_HIT:
+                self.power_hits[0 if sim.ball_vx > 0 else 1] += 1
+        if scored:
+            ticks = sim.tick - self.start_tick
+            self.writer.emit({
+                'type': 'rally', 'time': time.time(), 'tick': sim.tick, 'ticks': ticks,
+                'ms': round(ticks * sim.tick_ms, 1), 'hits': self.hits, 'peak_speed': round(self.peak_speed, 4),
+                'power_attempts': self.power_attempts, 'power_hits': self.power_hits,
+                'scorer': 'left' if events & EVENT_SCORE_LEFT else 'right', 'score': list(sim.score),
+            })
+            self._new_rally()
+            self.start_tick = sim.tick if sim.started else None   # multi-ball play goes straight on
+        elif not sim.started:
+            self.start_tick = None   # reset mid-rally
+            self._new_rally()
+        else:
+            self.peak_speed = max(self.peak_speed, math.hypot(sim.ball_vx, sim.ball_vy))
+
+# ---------- Tools ----------
+def read_records(directory):
+    """Every record in the directory's telemetry files, oldest file first."""
+    for path in sorted(Path(directory).glob(FILE_PATTERN)):
+        try:
+            with gzip.open(path, 'rt') as f:
+                for line in f:
+                    yield json.loads(line)
+        except (EOFError, OSError, ValueError):
+            continue   # the file still being written (or cut off by a crash)
+
+def summary(directory):
+    rallies = [r for r in read_records(directory) if r.get('type') == 'rally']
+    dropped = sum(r['count'] for r in read_records(directory) if r.get('type') == 'dropped')
+    if not rallies:
+        return f"no rallies recorded ({dropped} records dropped)"
+    n = len(rallies)
+    attempts = [sum(r['power_attempts'][side] for r in rallies) for side in (0, 1)]
+    successes = [sum(r['power_hits'][side] for r in rallies) for side in (0, 1)]
+    left = sum(r['scorer'] == 'left' for r in rallies)
+    return (f"{n} rallies: mean {sum(r['ms'] for r in rallies) / n / 1000:.2f}s, "
+            f"{sum(r['hits'] for r in rallies) / n:.1f} hits, "
+            f"peak speed max {max(r['peak_speed'] for r in rallies):.3f} px/ms; "
+            f"power shots left {successes[0]}/{attempts[0]} right {successes[1]}/{attempts[1]}; "
+            f"points left {left} / right {n - left}; {dropped} records dropped")
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Pong rally telemetry.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('record', help='play headless AI matches and write their telemetry')
+    p.add_argument('directory')
+    p.add_argument('--matches', type=int, default=100)
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--queue-size', type=int, default=QUEUE_SIZE)
+    p = sub.add_parser('summary', help='aggregate the rallies in a telemetry directory')
+    p.add_argument('directory')
+    args = parser.parse_args(argv)
+
+    if args.command == 'summary':
+        print(summary(args.directory))
+        return 0
+    writer = TelemetryWriter(args.directory, queue_size=args.queue_size)
+    start = time.perf_counter()
+    for i in range(args.matches):
+        sim = PongSimulation(seed=args.seed + i, left_ai=TrackingAI(power_distance=40),
+                             right_ai=TrackingAI(power_distance=60))
+        tracker = RallyTracker(writer)
+        while not sim.game_over:
+            tracker.tick(sim, sim.step(0 if sim.started else INPUT_SERVE))
+    elapsed = time.perf_counter() - start
+    writer.close()
+    print(f"{args.matches} matches in {elapsed:.2f}s; {writer.stats()}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,219 @@
+"""Headless tournament runner for tuning the Pong AI and power-shot rules.
+
+Plays every pair of AI policies against each other (both sides, to cancel side bias)
+under every combination of swept rules, spreading the matches over a process pool.
+Each finished chunk of matches is appended to a JSONL results file straight away, so an
+interrupted sweep picks up where it stopped when run again with the same arguments.
+
+    python pong_tournament.py \\
+        --policy base:max_speed=0.45,dead_zone=8 \\
+        --policy fast:max_speed=0.55,dead_zone=4,power_distance=40 \\
+        --policy predict:ai=intercept,reaction_ms=120,error_px=20 \\
+        --rule power_window_ms=150,250,400 --rule power_cooldown_ms=2000,3000 \\
+        --matches 400 --out sweep.jsonl
+"""
+import itertools
+import json
+import math
+import os
+import sys
+import time
+from multiprocessing import Pool
+from pathlib import Path
+
+from pong_sim import (
+    EVENT_HIT, EVENT_SCORE_LEFT, EVENT_SCORE_RIGHT, INPUT_SERVE,
+    AI_POLICIES, PongSimulation, default_rules, make_ai,
+)
+
+POLICY_PARAMS = ('ai', 'max_speed', 'dead_zone', 'power_distance', 'reaction_ms', 'error_px')
+CHUNK_MATCHES = 20            # matches per pool task; small enough to keep every core busy
+MAX_TICKS = 200000            # abandon a match that has not finished after this many ticks
+Z95 = 1.959964
+
+def _number(text):
+    value = float(text)
+    return int(value) if value.is_integer() and '.' not in text else value
+
+def parse_policy(spec):
+    """'name:max_speed=0.5,dead_zone=8' -> ('name', {'max_speed': 0.5, 'dead_zone': 8}).
+
+    ai=track (the default) or ai=intercept picks the policy; reaction_ms and error_px
+    only apply to intercept.
+    """
+    name, _, params = spec.partition(':')
+    kwargs = {}
+    for item in filter(None, params.split(',')):
+        key, _, value = item.partition('=')
+        if key not in POLICY_PARAMS:
+            raise ValueError(f"unknown policy parameter {key!r} (expected one of {', '.join(POLICY_PARAMS)})")
+        if key == 'ai':
+            if value not in AI_POLICIES:
+                raise ValueError(f"unknown AI {value!r} (expected one of {', '.join(AI_POLICIES)})")
+            kwargs[key] = value
+        else:
+            kwargs[key] = _number(value)
+    if kwargs.get('ai', 'track') != 'intercept' and {'reaction_ms', 'error_px'} & set(kwargs):
+        raise ValueError('reaction_ms and error_px need ai=intercept')
+    return name, kwargs
+
+def _policy(params):
+    params = dict(params)
+    return make_ai(params.pop('ai', 'track'), **params)
+
+def parse_rule(spec):
+    """'power_window_ms=150,250' -> ('power_window_ms', [150, 250])."""
+    key, _, values = spec.partition('=')
+    if key not in default_rules():
+        raise ValueError(f"unknown rule {key!r}")
+    return key, [_number(v) for v in values.split(',')]
+
+def play_chunk(task):
+    """Worker: play one chunk of matches and return aggregate counts (picklable dict)."""
+    key, rules, left, right, seeds = task
+    wins = [0, 0]
+    unfinished = 0
+    rallies = rally_sum = rally_sq = rally_max = 0
+    ticks = 0
+    for seed in seeds:
+        sim = PongSimulation(seed=seed, left_ai=_policy(left), right_ai=_policy(right), **rules)
+        rally = 0
+        while not sim.game_over and sim.tick < MAX_TICKS:
+            events = sim.step(0 if sim.started else INPUT_SERVE)
+            if events & EVENT_HIT:
+                rally += 1
+            if events & (EVENT_SCORE_LEFT | EVENT_SCORE_RIGHT):
+                rallies += 1
+                rally_sum += rally
+                rally_sq += rally * rally
+                rally_max = max(rally_max, rally)
+                rally = 0
+        ticks += sim.tick
+        if sim.game_over:
+            wins[sim.winner] += 1
+        else:
+            unfinished += 1
+    return {'key': key, 'left_wins': wins[0], 'right_wins': wins[1], 'unfinished': unfinished,
+            'rallies': rallies, 'rally_sum': rally_sum, 'rally_sq': rally_sq, 'rally_max': rally_max,
+            'ticks': ticks}
+
+def rules_key(rules):
+    return json.dumps(rules, sort_keys=True)
+
+def chunk_key(rules, a, a_kw, b, b_kw, seeds):
+    """Resume key of a chunk: everything that decides its results, as canonical JSON, so a
+    rerun with other policy parameters or seeds never reuses stale rows."""
+    return json.dumps([rules, a, a_kw, b, b_kw, seeds[0], seeds[-1]], sort_keys=True, separators=(',', ':'))
+
+def build_tasks(policies, rule_sets, matches, seed):
+    tasks = []
+    for rules in rule_sets:
+        for (a, a_kw), (b, b_kw) in itertools.permutations(policies, 2):
+            for chunk_start in range(0, matches, CHUNK_MATCHES):
+                seeds = range(seed + chunk_start, seed + min(matches, chunk_start + CHUNK_MATCHES))
+                tasks.append((chunk_key(rules, a, a_kw, b, b_kw, seeds), rules, a_kw, b_kw, list(seeds)))
+    return tasks
+
+def load_done(path):
+    """Chunk results already in the output file (skipping a torn last line)."""
+    done = {}
+    if path.exists():
+        with path.open() as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue
+                done[row['key']] = row
+    return done
+
+def wilson(successes, n):
+    """95% Wilson score interval for a win rate."""
+    if n == 0:
+        return 0.0, 1.0
+    p = successes / n
+    denom = 1 + Z95 ** 2 / n
+    centre = (p + Z95 ** 2 / (2 * n)) / denom
+    half = Z95 * math.sqrt(p * (1 - p) / n + Z95 ** 2 / (4 * n * n)) / denom
+    return centre - half, centre + half
+
+def summarize(rows, policies, rule_sets):
+    """Head-to-head table: one line per rule set and policy pair, both sides combined."""
+    names = [name for name, _ in policies]
+    lines = []
+    for rules in rule_sets:
+        lines.append(f"rules: {rules_key(rules) if rules else 'defaults'}")
+        for a, b in itertools.combinations(names, 2):
+            a_wins = b_wins = unfinished = rallies = rally_sum = rally_sq = rally_max = 0
+            for row in rows:
+                r, left, _, right, _, _, _ = json.loads(row['key'])
+                if r != rules or {left, right} != {a, b}:
+                    continue
+                a_wins += row['left_wins'] if left == a else row['right_wins']
+                b_wins += row['right_wins'] if left == a else row['left_wins']
+                unfinished += row['unfinished']
+                rallies += row['rallies']
+                rally_sum += row['rally_sum']
+                rally_sq += row['rally_sq']
+                rally_max = max(rally_max, row['rally_max'])
+            n = a_wins + b_wins
+            lo, hi = wilson(a_wins, n)
+            mean = rally_sum / rallies if rallies else 0.0
+            var = rally_sq / rallies - mean * mean if rallies else 0.0
+            half = Z95 * math.sqrt(max(var, 0.0) / rallies) if rallies else 0.0
+            rate = a_wins / n if n else 0.0
+            lines.append(f"  {a} vs {b}: {a} wins {rate:.1%} [{lo:.1%}, {hi:.1%}] of {n}"
+                         f"{f' ({unfinished} unfinished)' if unfinished else ''}; "
+                         f"rally {mean:.2f} +/- {half:.2f} hits (max {rally_max})")
+    return '\n'.join(lines)
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Run a headless Pong AI tournament across a process pool.')
+    parser.add_argument('--policy', action='append', default=[], metavar='NAME:k=v,...',
+                        help=f"AI policy (parameters: {', '.join(POLICY_PARAMS)}); give at least two")
+    parser.add_argument('--rule', action='append', default=[], metavar='RULE=v1,v2,...',
+                        help='sweep a rule over several values (cartesian product with other --rule)')
+    parser.add_argument('--matches', type=int, default=100, help='matches per ordered policy pair and rule set')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--out', default='tournament.jsonl', help='results file (appended to; reused to resume)')
+    args = parser.parse_args(argv)
+
+    try:
+        policies = [parse_policy(spec) for spec in args.policy] or [('base', {}), ('fast', {'max_speed': 0.55})]
+        swept = [parse_rule(spec) for spec in args.rule]
+    except ValueError as exc:
+        parser.error(str(exc))
+    if len(policies) < 2:
+        parser.error('need at least two policies')
+    if len({name for name, _ in policies}) != len(policies):
+        parser.error('policy names must be unique')
+    if args.workers < 1:
+        parser.error('--workers must be >= 1')
+    rule_sets = [dict(zip([k for k, _ in swept], combo)) for combo in itertools.product(*[v for _, v in swept])]
+
+    out = Path(args.out)
+    done = load_done(out)
+    tasks = build_tasks(policies, rule_sets, args.matches, args.seed)
+    todo = [t for t in tasks if t[0] not in done]
+    print(f"{len(tasks)} chunks ({len(tasks) - len(todo)} already done), {args.workers} workers", file=sys.stderr)
+
+    start = time.perf_counter()
+    ticks = 0
+    with out.open('a') as f, Pool(args.workers) as pool:
+        for i, row in enumerate(pool.imap_unordered(play_chunk, todo), 1):
+            f.write(json.dumps(row) + '\n')
+            f.flush()
+            done[row['key']] = row
+            ticks += row['ticks']
+            if i % 10 == 0 or i == len(todo):
+                elapsed = time.perf_counter() - start
+                print(f"  {i}/{len(todo)} chunks, {ticks / elapsed:.0f} ticks/s", file=sys.stderr)
+
+    keys = {t[0] for t in tasks}
+    print(summarize([row for key, row in done.items() if key in keys], policies, rule_sets))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,34 @@
+"""Allocation regression test: steady-state game frames stay within pong_bench.ALLOC_BUDGET.
+
+Drives every pong_bench.alloc_scenarios() frame type headlessly (SDL dummy driver) for
+ALLOC_FRAMES frames under tracemalloc and fails on any scenario whose per-frame peak
+bytes, retained bytes or Surface creations go over its budget.
+
+    python -m pytest test_alloc_budget.py
+    python -m unittest test_alloc_budget
+"""
+import unittest
+
+import pong_bench
+import pygame
+
+class AllocBudgetTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pygame.init()
+        cls.screen = pygame.display.set_mode(pong_bench.RESOLUTIONS[0])
+        cls.scenarios = pong_bench.alloc_scenarios(cls.screen)
+
+    @classmethod
+    def tearDownClass(cls):
+        pygame.quit()
+
+    def test_scenarios_within_budget(self):
+        for name, fn in self.scenarios.items():
+            with self.subTest(scenario=name):
+                line, over = pong_bench.check_alloc_budget(name, fn)
+                self.assertEqual(over, [], line)
+
+if __name__ == '__main__':
+    unittest.main()